@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import logging
+
+from agents.graph import run_agent
+from scraper.utils.sink import JsonlSink, is_jsonl_path, write_json_array
+
+
+def parse_args():
+    p = argparse.ArgumentParser(prog="python -m agents", description="Crawl a board in agent mode")
+    p.add_argument("--url", required=True)
+    p.add_argument("--prompt", default="")
+    p.add_argument("--max-items", type=int, default=1000)
+    p.add_argument("--max-rounds", type=int, default=3000)
+    p.add_argument("--headless", action="store_true")
+    p.add_argument("--storage-state", type=str, default=None)
+    p.add_argument("--dedupe-db", type=str, default=None)
+    p.add_argument("--lean", action="store_true")
+    p.add_argument("--pacing", choices=["fixed", "adaptive"], default="fixed")
+    p.add_argument("--out-json", default="pins.json", help=".json array, or .jsonl[.gz|.zst] streamed")
+    p.add_argument("--no-langgraph", action="store_true", help="Use the plain driver even if langgraph is installed")
+    p.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    return p.parse_args()
+
+
+async def main():
+    args = parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    sink = JsonlSink(args.out_json) if is_jsonl_path(args.out_json) else None
+    try:
+        pins = await run_agent(
+            args.url, prompt=args.prompt, use_langgraph=False if args.no_langgraph else None,
+            max_items=args.max_items, max_rounds=args.max_rounds, headless=args.headless,
+            storage_state=args.storage_state, dedupe_db=args.dedupe_db, lean=args.lean,
+            pacing=args.pacing, on_item=sink, keep_items=sink is None,
+            flush_output=(lambda: sink.flush(fsync=True)) if sink else None,
+        )
+    finally:
+        if sink:
+            sink.close()
+    if sink:
+        print(f"[OK] Extracted {sink.written} pins → {args.out_json}")
+    else:
+        write_json_array(args.out_json, pins)
+        print(f"[OK] Extracted {len(pins)} pins → {args.out_json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
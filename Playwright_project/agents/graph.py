@@ -0,0 +1,78 @@
+"""
+Agent execution mode: navigate → extract → (done? end : navigate).
+
+    python -m agents --url https://www.pinterest.com/<user>/<board>/ --max-items 500 --out-json pins.jsonl
+
+Each step returns a delta with only the round's new pins and counters;
+the page, the seen-key index and all collected pins stay in the CrawlRun
+behind `state["handle"]` (agents/runtime.py), so a step costs the same in
+round 5 and round 500. With langgraph installed the loop runs as a
+compiled StateGraph, otherwise a plain driver applies the same deltas.
+"""
+from typing import Any, List, Optional
+
+from agents.nodes.extraction import extraction_node
+from agents.nodes.navigation import navigation_node
+from agents.runtime import get_run, open_run
+from agents.state import AgentState
+from scraper.adapters.base import Pin
+
+try:
+    from langgraph.graph import END, StateGraph   # Optional: run_agent works without it
+except ImportError:
+    END = StateGraph = None
+
+
+def _route(state: AgentState) -> str:
+    return "done" if state["is_complete"] else "next"
+
+
+def build_graph():
+    """Compiled langgraph StateGraph over AgentState."""
+    if StateGraph is None:
+        raise RuntimeError("build_graph needs the 'langgraph' package (pip install langgraph)")
+    graph = StateGraph(AgentState)
+    graph.add_node("navigate", navigation_node)
+    graph.add_node("extract", extraction_node)
+    graph.set_entry_point("navigate")
+    graph.add_conditional_edges("navigate", _route, {"next": "extract", "done": END})
+    graph.add_conditional_edges("extract", _route, {"next": "navigate", "done": END})
+    return graph.compile()
+
+
+def initial_state(url: str, handle: str, prompt: str = "") -> AgentState:
+    return AgentState(
+        prompt=prompt, url=url, handle=handle, new_pins=[], collected=0,
+        stagnant_counter=0, round_idx=0, is_complete=False, stop_reason="", error_count=0,
+    )
+
+
+async def _drive(state: AgentState) -> AgentState:
+    # Same edges as build_graph(), without langgraph
+    node = navigation_node
+    while not state["is_complete"]:
+        state.update(await node(state))
+        node = extraction_node if node is navigation_node else navigation_node
+    return state
+
+
+async def run_agent(url: str, prompt: str = "", use_langgraph: Optional[bool] = None,
+                    **run_opts: Any) -> List[Pin]:
+    """
+    Crawls `url` in agent mode and returns the collected pins (empty with
+    keep_items=False; pins then only reach `on_item`). `run_opts` go to
+    open_run (max_items, headless, storage_state, dedupe_db, on_item,
+    governor, step_ratio, ...). use_langgraph=None → langgraph if installed.
+    """
+    if use_langgraph is None:
+        use_langgraph = StateGraph is not None
+    async with open_run(url, **run_opts) as handle:
+        run = get_run(handle)
+        state = initial_state(url, handle, prompt)
+        if use_langgraph:
+            # Two steps per round; the run's own limits end the crawl first
+            limit = 2 * run.max_rounds + 10
+            await build_graph().ainvoke(state, {"recursion_limit": limit})
+        else:
+            await _drive(state)
+        return run.collector.out
@@ -1,39 +1,70 @@
-from typing import List
-from scraper.adapters.pinterest import PinterestAdapter
-from scraper.dispatcher import  pick_adapter
-from agents.nodes.navigation import get_page
+import logging
+
+from agents.runtime import get_run
 from agents.state import AgentState
+from scraper.utils.stream import extract_new_cards
+
+log = logging.getLogger(__name__)
 
 
 async def extraction_node(state: AgentState):
-    # Canlı sayfaya doğrudan erişim [cite: 15]
-    pw, browser, context, page = await get_page("auth.json")
-    adapter = pick_adapter(state["url"])
-    
-    # Senin paylaştığın 'streaming_scroll_and_collect_stepwise' içindeki 
-    # tek bir 'round' mantığını burada uyguluyoruz
-    item_selector = adapter.PIN
-    
-    # Mevcut görünümdeki node'ları bul
-    loc = page.locator(item_selector)
-    count = await loc.count()
-    
+    # Tekilleştirme indeksi ve toplanan pin'ler CrawlRun'da: tur maliyeti sabit kalır
+    run = get_run(state["handle"])
+    collector, stats = run.collector, run.stats
+    stats.rounds += 1
+    errors = state["error_count"]
+
+    try:
+        # Sadece önceki turlarda okunmamış kartlar (tek evaluate)
+        stats.cdp_calls += 1
+        cards, skipped = await extract_new_cards(run.page, run.adapter.PIN, run.adapter.CARD_SCHEMA)
+    except Exception as e:
+        stats.errors += 1
+        errors += 1
+        log.warning("[ERR ] Round %d: Extraction failed -> %s", state["round_idx"], e)
+        cards, skipped = [], 0
+    stats.nodes_skipped += skipped
+
     new_pins = []
-    current_seen_keys = {pin.image_url for pin in state["raw_media_urls"]} # Tekilleştirme [cite: 30]
-
-    for i in range(count):
-        node_handle = await loc.nth(i).element_handle()
-        # build_item senin adapter'ındaki mantığı kullanır [cite: 15]
-        pin = await adapter.build_item(node_handle, page) 
-        
-        if pin and pin.image_url not in current_seen_keys:
+    board_url = run.page.url
+    for card in cards:
+        stats.nodes_read += 1
+        pin = run.adapter._pin_from_card(card, board_url)
+        if await collector.push(pin, stats.nodes_read):
             new_pins.append(pin)
-            current_seen_keys.add(pin.image_url)
+            if collector.accepted >= run.max_items:
+                break
+
+    # Durağanlık kontrolü: önceki çalışmalardan bilinen key'ler de ilerleme sayılır
+    progress = collector.progress
+    gained = progress - run.last_progress
+    stagnant = 0 if gained > 0 else state["stagnant_counter"] + 1
+    run.last_progress = progress
+    run.pacer.update(gained)
+    if run.governor is not None:
+        if gained > 0:
+            run.governor.reward(board_url)
+        else:
+            run.governor.penalize(board_url, "empty")
 
-    # Stagnant (durağanlık) kontrolü [cite: 63]
-    stagnant_inc = 1 if len(new_pins) == 0 else -state["stagnant_counter"]
+    stop_reason = ""
+    if errors >= run.max_errors:
+        stop_reason = "errors"
+    elif collector.accepted >= run.max_items:
+        stop_reason = "target"
+    elif stagnant >= run.stagnant_tolerance:
+        stop_reason = "stagnant"
+    elif state["round_idx"] >= run.max_rounds:
+        stop_reason = "max_rounds"
+    stats.stop_reason = stop_reason
+    log.info("--- Round %d | new: %d | total: %d | stagnant: %d/%d ---",
+             state["round_idx"], len(new_pins), collector.accepted, stagnant, run.stagnant_tolerance)
 
     return {
-        "raw_media_urls": new_pins, # operator.add ile listeye eklenir
-        "stagnant_counter": state["stagnant_counter"] + stagnant_inc
-    }
\ No newline at end of file
+        "new_pins": new_pins,           # Sadece bu turun delta'sı
+        "collected": collector.accepted,
+        "stagnant_counter": stagnant,
+        "is_complete": bool(stop_reason),
+        "stop_reason": stop_reason,
+        "error_count": errors,
+    }
@@ -1,42 +1,37 @@
-from typing import Dict, Any
-from scraper.dispatcher import  pick_adapter
+import logging
+
+from agents.runtime import get_run
 from agents.state import AgentState
-from scraper.browser import open_page
-import random
+from scraper.utils.stream import install_seen_observer
 
-# global_browser.py (Singleton Tasarımı)
-_browser_instance = None
+log = logging.getLogger(__name__)
 
-async def get_page(storage_state):
-    global _browser_instance
-    if _browser_instance is None:
-        # İlk kez başlat ve açık tut
-        pw, browser, context, page = await open_page(headless=True, storage_state=storage_state)
-        _browser_instance = (pw, browser, context, page)
-    return _browser_instance
 
 async def navigation_node(state: AgentState):
-    # Singleton üzerinden canlı sayfayı al [cite: 20]
-    pw, browser, context, page = await get_page("auth.json")
-    url = state["url"] if isinstance(state["url"], str) else state["url"][0]
+    # Canlı sayfa global değil, state'teki handle ile CrawlRun'dan gelir
+    run = get_run(state["handle"])
+    page = run.page
 
     try:
-        # İlk turda sayfayı aç [cite: 13, 14]
+        # İlk turda sayfayı aç, sonraki turlarda sadece kaydır
         if state["round_idx"] == 0:
-            adapter = pick_adapter(url)
-            await adapter.pre_open(page)
-            await adapter.navigate_board(page, url)
-        
-        # Sadece kaydır ve içeriğin yüklenmesini bekle [cite: 13]
-        viewport_h = await page.evaluate("() => window.innerHeight || 900")
-        step_px = int(viewport_h * 0.6) 
-        await page.evaluate(f"window.scrollBy(0, {step_px})")
-        
-        await page.wait_for_timeout(random.randint(1000, 2000))
-
-        return {
-            "round_idx": state["round_idx"] + 1,
-            "is_complete": False
-        }
+            await run.adapter.pre_open(page)
+            await run.adapter.navigate_board(page, run.url)
+            run.viewport_h = await page.evaluate("() => window.innerHeight || 900")
+            # Okunan kartlar DOM'da işaretlenir: her tur sadece yeni kartları serileştirir
+            await install_seen_observer(page)
+        else:
+            if run.governor is not None:
+                run.stats.throttled_ms += int(await run.governor.acquire(page.url) * 1000)
+            step_px = max(200, int(run.viewport_h * run.pacer.step_ratio))
+            _, waited = await run.pacer.scroll_and_wait(page, run.adapter.PIN, step_px)
+            run.stats.wait_ms += waited
+        return {"round_idx": state["round_idx"] + 1}
     except Exception as e:
-        return {"error_count": state["error_count"] + 1}
\ No newline at end of file
+        run.stats.errors += 1
+        log.warning("[ERR ] Navigation round %d failed -> %s", state["round_idx"], e)
+        errors = state["error_count"] + 1
+        if errors >= run.max_errors:
+            run.stats.stop_reason = "errors"
+            return {"error_count": errors, "is_complete": True, "stop_reason": "errors"}
+        return {"error_count": errors}
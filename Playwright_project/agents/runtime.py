@@ -0,0 +1,99 @@
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from scraper.adapters.base import SiteAdapter
+from scraper.browser import close_page, open_page
+from scraper.dispatcher import pick_adapter
+from scraper.utils.dedupe import SqliteDedupeIndex
+from scraper.utils.governor import DomainGovernor
+from scraper.utils.pacing import make_pacer
+from scraper.utils.stream import CollectStats, ItemCollector, OnItem
+
+# Graf state'i sadece handle taşır; büyüyen/serileştirilemeyen her şey burada
+_RUNS: Dict[str, "CrawlRun"] = {}
+
+
+@dataclass
+class CrawlRun:
+    """
+    Side store of one agent crawl: the live page, the seen-key index and the
+    collected pins (inside `collector`). Graph state references it by handle,
+    so each graph step only carries the round's new pins and a few counters.
+    """
+    url: str
+    adapter: SiteAdapter
+    page: Any
+    collector: ItemCollector
+    pacer: Any
+    max_items: int = 1000
+    max_rounds: int = 3000
+    stagnant_tolerance: int = 8
+    max_errors: int = 3
+    governor: Optional[DomainGovernor] = None
+    viewport_h: int = 900
+    last_progress: int = 0
+
+    @property
+    def stats(self) -> CollectStats:
+        return self.collector.stats
+
+
+def get_run(handle: str) -> CrawlRun:
+    try:
+        return _RUNS[handle]
+    except KeyError:
+        raise ValueError(f"Unknown or finished crawl handle: {handle}") from None
+
+
+@asynccontextmanager
+async def open_run(
+    url: str,
+    max_items: int = 1000,
+    headless: bool = True,
+    storage_state: Optional[str] = None,
+    dedupe_db: Optional[str] = None,
+    lean: bool = False,
+    on_item: Optional[OnItem] = None,
+    keep_items: bool = True,
+    container: Optional[Any] = None,
+    governor: Optional[DomainGovernor] = None,
+    max_rounds: int = 3000,
+    stagnant_tolerance: int = 8,
+    step_ratio: float = 0.6,
+    wait_min_ms: int = 1000,
+    wait_jitter_ms: int = 800,
+    pacing: str = "fixed",
+    flush_output: Optional[Callable[[], None]] = None,
+):
+    """
+    Opens a browser page for `url` and registers a CrawlRun for it; yields
+    the handle to put into AgentState. Page, browser and dedupe index are
+    closed when the block exits, also on errors or cancellation.
+    `flush_output` runs before every dedupe DB commit (pins before keys).
+    """
+    adapter = pick_adapter(url)
+    index = SqliteDedupeIndex(dedupe_db, namespace=url, before_commit=flush_output) if dedupe_db else None
+    collector = ItemCollector(adapter._make_key, index=index, on_item=on_item,
+                              keep_items=keep_items, container=container)
+    pw = browser = context = None
+    handle = uuid.uuid4().hex
+    try:
+        pw, browser, context, page = await open_page(
+            headless=headless, storage_state=storage_state,
+            lean=adapter.lean_profile() if lean else None,
+        )
+        _RUNS[handle] = CrawlRun(
+            url=url, adapter=adapter, page=page, collector=collector,
+            pacer=make_pacer(pacing, step_ratio, wait_min_ms, wait_jitter_ms),
+            max_items=max_items, max_rounds=max_rounds, stagnant_tolerance=stagnant_tolerance,
+            governor=governor,
+        )
+        yield handle
+    finally:
+        _RUNS.pop(handle, None)
+        if context is not None:
+            await close_page(pw, browser, context)
+        if index is not None:
+            index.close()
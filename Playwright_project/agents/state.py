@@ -1,13 +1,15 @@
-from typing import TypedDict, Annotated, List, Dict, Any, Union
-import operator
+from typing import TypedDict, List
 from scraper.adapters.base import Pin
 
 class AgentState(TypedDict):
     prompt: str
     url: str
-    # HTML taşımıyoruz, sadece koordinasyon verileri
-    raw_media_urls: Annotated[List[Pin], operator.add] 
+    # Sayfa, görülen key'ler ve toplanan tüm pin'ler agents.runtime'da; state sadece handle taşır
+    handle: str
+    new_pins: List[Pin]   # Sadece bu turun yeni pin'leri (her turda üzerine yazılır, birikmez)
+    collected: int        # Şimdiye kadar toplanan pin sayısı
     stagnant_counter: int # Üst üste kaç tur yeni veri gelmedi?
     round_idx: int        # Kaçıncı kaydırma turundayız?
     is_complete: bool
-    error_count: int
\ No newline at end of file
+    stop_reason: str      # target | stagnant | max_rounds | errors
+    error_count: int
@@ -0,0 +1,96 @@
+"""
+Offline benchmark for the collectors and adapters.
+
+    python -m bench run --items 300 --out bench.json
+    python -m bench run --pacing adaptive --baseline bench.json --out new.json
+    python -m bench compare bench.json new.json --threshold 0.1
+
+Exits with status 1 when a comparison finds a regression.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from bench.compare import compare, format_report, format_table
+from bench.fixtures import SITES
+from bench.harness import BenchConfig, run_bench
+
+
+def parse_args():
+    p = argparse.ArgumentParser(prog="python -m bench", description="Offline crawl benchmark")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="Crawl synthetic boards from a local server and report throughput")
+    run.add_argument("--sites", nargs="+", choices=SITES, default=list(SITES))
+    run.add_argument("--items", type=int, default=300, help="Target items per site")
+    run.add_argument("--total", type=int, default=None, help="Synthetic board size (default: 2 x --items)")
+    run.add_argument("--page-size", type=int, default=25, help="Items per feed response")
+    run.add_argument("--latency-ms", type=int, default=150, help="Feed response delay")
+    run.add_argument("--repeat", type=int, default=1, help="Runs per site (median is reported)")
+    run.add_argument("--mode", choices=["dom", "network"], default="dom")
+    run.add_argument("--pacing", choices=["fixed", "adaptive"], default=None)
+    run.add_argument("--wait-min-ms", type=int, default=None, help="Override the adapters' scroll wait")
+    run.add_argument("--wait-jitter-ms", type=int, default=None)
+    run.add_argument("--no-incremental", action="store_true", help="Re-read the whole grid every round")
+    run.add_argument("--lean", action="store_true")
+    run.add_argument("--headed", action="store_true")
+    run.add_argument("--out", type=str, default=None, help="Write the JSON report here")
+    run.add_argument("--baseline", type=str, default=None, help="Report to compare against")
+    run.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as regression")
+
+    cmp_ = sub.add_parser("compare", help="Compare two saved reports")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("current")
+    cmp_.add_argument("--threshold", type=float, default=0.10)
+    return p.parse_args()
+
+
+def _load(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _report_regressions(baseline, current, threshold: float) -> int:
+    deltas = compare(baseline, current, threshold)
+    print(format_table(deltas, threshold))
+    return 1 if any(d.regression for d in deltas) else 0
+
+
+def main() -> int:
+    args = parse_args()
+    if args.cmd == "compare":
+        return _report_regressions(_load(args.baseline), _load(args.current), args.threshold)
+
+    collect_opts = {}
+    if args.pacing is not None:
+        collect_opts["pacing"] = args.pacing
+    if args.wait_min_ms is not None:
+        collect_opts["wait_min_ms"] = args.wait_min_ms
+    if args.wait_jitter_ms is not None:
+        collect_opts["wait_jitter_ms"] = args.wait_jitter_ms
+    if args.no_incremental:
+        collect_opts["incremental"] = False
+
+    config = BenchConfig(
+        sites=args.sites, items=args.items, total=args.total, page_size=args.page_size,
+        latency_ms=args.latency_ms, mode=args.mode, repeat=args.repeat,
+        headless=not args.headed, lean=args.lean, collect_opts=collect_opts,
+    )
+    report = asyncio.run(run_bench(config))
+    print(format_report(report))
+
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[OK] Report → {args.out}")
+
+    if args.baseline:
+        return _report_regressions(_load(args.baseline), report, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Metric → +1 if higher is better, -1 if lower is better
+DIRECTIONS = {
+    "items_per_s": +1,
+    "coverage": +1,
+    "cdp_per_item": -1,
+    "peak_rss_mb": -1,
+    "seconds": -1,
+}
+# time_to entries ("time_to.100", ...) are lower-is-better as well
+
+
+@dataclass
+class Delta:
+    site: str
+    metric: str
+    baseline: float
+    current: float
+    change: float            # Relative change, signed so that > 0 is an improvement
+    regression: bool
+
+
+def _flatten(result: Dict[str, Any]) -> Dict[str, float]:
+    flat = {k: v for k, v in result.items() if k in DIRECTIONS}
+    for milestone, seconds in (result.get("time_to") or {}).items():
+        flat[f"time_to.{milestone}"] = seconds
+    return flat
+
+
+def _direction(metric: str) -> int:
+    return DIRECTIONS.get(metric, -1)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[Delta]:
+    """
+    Compares two bench reports site by site. A metric regresses when it got
+    worse by more than `threshold` (relative; 0.10 = 10%). Sites or metrics
+    missing from either report are skipped.
+    """
+    deltas = []
+    for site, cur in current["results"].items():
+        base = baseline["results"].get(site)
+        if base is None:
+            continue
+        base_flat, cur_flat = _flatten(base), _flatten(cur)
+        for metric in sorted(base_flat.keys() & cur_flat.keys()):
+            b, c = float(base_flat[metric]), float(cur_flat[metric])
+            if b == 0:
+                change = 0.0 if c == 0 else _direction(metric) * (1.0 if c > 0 else -1.0)
+            else:
+                change = _direction(metric) * (c - b) / abs(b)
+            deltas.append(Delta(site, metric, b, c, round(change, 4) + 0.0, change < -threshold))
+    return deltas
+
+
+def format_table(deltas: List[Delta], threshold: Optional[float] = None) -> str:
+    lines = [f"{'site':<11} {'metric':<16} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for d in deltas:
+        flag = "  REGRESSION" if d.regression else ""
+        lines.append(
+            f"{d.site:<11} {d.metric:<16} {d.baseline:>10.4g} {d.current:>10.4g} {d.change:>+8.1%}{flag}"
+        )
+    if threshold is not None:
+        bad = sum(d.regression for d in deltas)
+        lines.append(f"{bad} regression(s) beyond {threshold:.0%}")
+    return "\n".join(lines)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'site':<11} {'items':>6} {'items/s':>9} {'cdp/item':>9} {'coverage':>9} "
+             f"{'rss MB':>8} {'wait s':>7}  time-to-N (s)"]
+    for site, r in report["results"].items():
+        time_to = " ".join(f"{k}:{v:.2f}" for k, v in r["time_to"].items())
+        lines.append(
+            f"{site:<11} {r['items']:>6} {r['items_per_s']:>9.2f} {r['cdp_per_item']:>9.3f} "
+            f"{r['coverage']:>9.1%} {r['peak_rss_mb']:>8.1f} {r['wait_s']:>7.1f}  {time_to}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from scraper.utils.blocking import PIXEL_GIF
+
+SITES = ("pinterest", "instagram", "artstation")
+
+# Grid geometry per site: columns and row height (px) of the synthetic layout
+GRID = {
+    "pinterest":  {"cols": 5, "row_h": 360},
+    "instagram":  {"cols": 3, "row_h": 300},
+    "artstation": {"cols": 5, "row_h": 280},
+}
+
+# Feed endpoint per site; Pinterest mimics the real resource path so the
+# network collector (FEED_RESOURCES) picks it up.
+FEED_PATH = {
+    "pinterest":  "/pinterest/resource/BoardFeedResource/get/",
+    "instagram":  "/instagram/feed",
+    "artstation": "/artstation/projects.json",
+}
+
+
+def _token(site: str, i: int, n: int = 11) -> str:
+    return hashlib.sha1(f"{site}:{i}".encode()).hexdigest()[:n]
+
+
+def make_item(site: str, i: int, base: str) -> Dict[str, Any]:
+    """Deterministic item i of a site's synthetic board (site-native JSON shape)."""
+    if site == "pinterest":
+        pin_id = str(10**12 + i)
+        item = {
+            "type": "pin",
+            "id": pin_id,
+            "grid_title": f"Synthetic pin {i}",
+            "auto_alt_text": f"Alt text for pin {i}",
+            "images": {
+                "236x": {"url": f"{base}/img/236x/{pin_id}.jpg"},
+                "474x": {"url": f"{base}/img/474x/{pin_id}.jpg"},
+                "orig": {"url": f"{base}/img/originals/{pin_id}.jpg"},
+            },
+        }
+        if i % 15 == 7:
+            item["videos"] = {"video_list": {"V_720P": {"url": f"{base}/vid/{pin_id}.mp4"}}}
+        return item
+    if site == "instagram":
+        code = _token(site, i)
+        return {
+            "code": code,
+            "src": f"{base}/img/320/{code}.jpg",
+            "srcset": f"{base}/img/320/{code}.jpg 320w, {base}/img/1080/{code}.jpg 1080w",
+            "alt": f"Photo {i}",
+        }
+    if site == "artstation":
+        slug = _token(site, i, 6)
+        return {
+            "hash_id": slug,
+            "permalink": f"https://www.artstation.com/artwork/{slug}",
+            "src": f"{base}/img/smaller_square/{slug}.jpg",
+            "srcset": f"{base}/img/smaller_square/{slug}.jpg 1x, {base}/img/large/{slug}.jpg 2x",
+            "title": f"Project {i}",
+        }
+    raise ValueError(f"Unknown fixture site: {site}")
+
+
+def feed_page(site: str, offset: int, page_size: int, total: int, base: str) -> Dict[str, Any]:
+    """One feed response in the site's own envelope; the last page marks the end."""
+    items = [make_item(site, i, base) for i in range(offset, min(total, offset + page_size))]
+    nxt = offset + len(items)
+    ended = nxt >= total
+    if site == "pinterest":
+        return {"resource_response": {"data": items, "bookmark": "-end-" if ended else str(nxt)}}
+    return {"data": items, "next": None if ended else nxt}
+
+
+# Card DOM per site, modelled on the selectors the adapters use.
+_CARD_JS = {
+    "pinterest": """
+    make() {
+        const n = document.createElement("div");
+        n.setAttribute("data-test-id", "pinWrapper");
+        n.innerHTML = '<a><img></a>';
+        return n;
+    },
+    fill(n, it) {
+        n.querySelector("a").setAttribute("href", `/pin/${it.id}/`);
+        const img = n.querySelector("img");
+        img.setAttribute("src", it.images["236x"].url);
+        img.setAttribute("srcset", `${it.images["236x"].url} 1x, ${it.images["474x"].url} 2x, ${it.images.orig.url} 4x`);
+        img.setAttribute("alt", it.auto_alt_text);
+        const old = n.querySelector("video");
+        if (old) old.remove();
+        if (it.videos) {
+            const v = document.createElement("video");
+            v.setAttribute("src", it.videos.video_list.V_720P.url);
+            n.appendChild(v);
+        }
+    },
+    parse(j) {
+        const r = j.resource_response;
+        return { items: r.data, next: r.bookmark === "-end-" ? null : Number(r.bookmark) };
+    },""",
+    "instagram": """
+    make() {
+        const n = document.createElement("a");
+        n.innerHTML = '<div><img></div>';
+        return n;
+    },
+    fill(n, it) {
+        n.setAttribute("href", `/p/${it.code}/`);
+        const img = n.querySelector("img");
+        img.setAttribute("src", it.src);
+        img.setAttribute("srcset", it.srcset);
+        img.setAttribute("alt", it.alt);
+    },
+    parse(j) { return { items: j.data, next: j.next }; },""",
+    "artstation": """
+    make() {
+        const n = document.createElement("a");
+        n.className = "project-image";
+        n.innerHTML = '<img>';
+        return n;
+    },
+    fill(n, it) {
+        n.setAttribute("href", it.permalink);
+        const img = n.querySelector("img");
+        img.setAttribute("src", it.src);
+        img.setAttribute("srcset", it.srcset);
+        img.setAttribute("alt", it.title);
+    },
+    parse(j) { return { items: j.data, next: j.next }; },""",
+}
+
+# Virtualized infinite grid: only rows near the viewport are in the DOM and
+# nodes leaving the window go to a pool and are re-filled for new items
+# (the recycling pattern that makes naive collectors miss or re-read cards).
+_GRID_JS = """
+(() => {
+    const cfg = window.__BENCH__;
+    const site = {%CARD_JS%
+    };
+    const grid = document.getElementById("grid");
+    const items = cfg.initial.slice();
+    const live = new Map();
+    const pool = [];
+    let next = cfg.initialNext, loading = false;
+
+    const place = (n, i) => {
+        n.style.position = "absolute";
+        n.style.left = `${(i % cfg.cols) * (100 / cfg.cols)}%`;
+        n.style.top = `${Math.floor(i / cfg.cols) * cfg.rowH}px`;
+        n.style.width = `${100 / cfg.cols}%`;
+        n.style.height = `${cfg.rowH - 8}px`;
+    };
+    const layout = () => {
+        grid.style.height = `${Math.ceil(items.length / cfg.cols) * cfg.rowH + cfg.rowH}px`;
+    };
+    const render = () => {
+        const buffer = cfg.bufferRows * cfg.rowH;
+        const top = Math.max(0, window.scrollY - buffer);
+        const bottom = window.scrollY + window.innerHeight + buffer;
+        const first = Math.floor(top / cfg.rowH) * cfg.cols;
+        const last = Math.min(items.length, Math.ceil(bottom / cfg.rowH) * cfg.cols);
+        for (const [i, n] of live) {
+            if (i < first || i >= last) { n.remove(); live.delete(i); pool.push(n); }
+        }
+        for (let i = first; i < last; i++) {
+            if (live.has(i)) continue;
+            const n = pool.pop() || site.make();
+            site.fill(n, items[i]);
+            place(n, i);
+            grid.appendChild(n);
+            live.set(i, n);
+        }
+        if (next !== null && !loading && last >= items.length - cfg.cols * 2) loadMore();
+    };
+    const loadMore = async () => {
+        loading = true;
+        try {
+            const r = await fetch(`${cfg.feedPath}?offset=${next}`);
+            const page = site.parse(await r.json());
+            items.push(...page.items);
+            next = page.next;
+        } finally {
+            loading = false;
+        }
+        layout();
+        render();
+    };
+    let queued = false;
+    window.addEventListener("scroll", () => {
+        if (queued) return;
+        queued = true;
+        requestAnimationFrame(() => { queued = false; render(); });
+    });
+    layout();
+    render();
+})();
+"""
+
+
+def board_html(site: str, page_size: int, total: int, base: str, buffer_rows: int = 1) -> str:
+    first = feed_page(site, 0, page_size, total, base)
+    geom = GRID[site]
+    if site == "pinterest":
+        initial, initial_next = first["resource_response"]["data"], first["resource_response"]["bookmark"]
+        initial_next = None if initial_next == "-end-" else int(initial_next)
+        # Real boards embed the first page as JSON (read by network mode)
+        embedded = json.dumps({"props": {"initialReduxState": {"pins": initial}}})
+        data_script = f'<script id="__PWS_DATA__" type="application/json">{embedded}</script>'
+    else:
+        initial, initial_next = first["data"], first["next"]
+        data_script = ""
+    cfg = {
+        "initial": initial,
+        "initialNext": initial_next,
+        "feedPath": FEED_PATH[site],
+        "cols": geom["cols"],
+        "rowH": geom["row_h"],
+        "bufferRows": buffer_rows,
+    }
+    script = _GRID_JS.replace("%CARD_JS%", _CARD_JS[site])
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'><title>bench</title>"
+        "<style>body{margin:0} #grid{position:relative;width:100%}</style></head>"
+        f"<body>{data_script}<div id='grid'></div>"
+        f"<script>window.__BENCH__ = {json.dumps(cfg)};</script>"
+        f"<script>{script}</script></body></html>"
+    )
+
+
+class FixtureServer:
+    """
+    Local HTTP server for the synthetic boards:
+        /<site>/board        → grid page with the first page embedded
+        FEED_PATH[site]      → feed pages (?offset=N), delayed by `latency_ms`
+        /img/..., /vid/...   → 1x1 GIF / empty media (never leaves the box)
+    """
+
+    def __init__(self, total: int = 600, page_size: int = 25, latency_ms: int = 150,
+                 buffer_rows: int = 1, host: str = "127.0.0.1", port: int = 0):
+        self.total = total
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.buffer_rows = buffer_rows
+        self.host = host
+        self.port = port
+        self.base: Optional[str] = None
+        self.feed_requests = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    def url(self, site: str) -> str:
+        return f"{self.base}/{site}/board"
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        for site in SITES:
+            app.router.add_get(f"/{site}/board", self._board(site))
+            app.router.add_get(FEED_PATH[site], self._feed(site))
+        app.router.add_get("/img/{tail:.*}", self._image)
+        app.router.add_get("/vid/{tail:.*}", self._video)
+        return app
+
+    def _board(self, site: str):
+        async def handler(request: web.Request) -> web.Response:
+            html = board_html(site, self.page_size, self.total, self.base, self.buffer_rows)
+            return web.Response(text=html, content_type="text/html")
+        return handler
+
+    def _feed(self, site: str):
+        async def handler(request: web.Request) -> web.Response:
+            self.feed_requests += 1
+            offset = int(request.query.get("offset", "0"))
+            await asyncio.sleep(self.latency_ms / 1000)
+            return web.json_response(feed_page(site, offset, self.page_size, self.total, self.base))
+        return handler
+
+    async def _image(self, request: web.Request) -> web.Response:
+        return web.Response(body=PIXEL_GIF, content_type="image/gif",
+                            headers={"Cache-Control": "max-age=3600"})
+
+    async def _video(self, request: web.Request) -> web.Response:
+        return web.Response(status=204)
+
+    async def __aenter__(self) -> "FixtureServer":
+        self._runner = web.AppRunner(self._app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base = f"http://{host}:{port}"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._runner.cleanup()
+
+
+def expected_keys(site: str, total: int, base: str) -> List[str]:
+    """Dedupe keys an adapter should produce for the whole synthetic board."""
+    keys = []
+    for i in range(total):
+        it = make_item(site, i, base)
+        if site == "pinterest":
+            keys.append(f"https://www.pinterest.com/pin/{it['id']}/")
+        elif site == "instagram":
+            keys.append(f"https://www.instagram.com/p/{it['code']}/")
+        else:
+            keys.append(it["permalink"])
+    return keys
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from bench.fixtures import SITES, FixtureServer, expected_keys
+from scraper.adapters.base import SiteAdapter
+from scraper.browser import close_browser, launch_browser, new_context_page
+from scraper.adapters.registry import REGISTRY
+from scraper.utils.metrics import Metrics
+from scraper.utils.netcapture import FeedCapture
+from scraper.utils.stream import CollectStats
+
+try:
+    import psutil                       # Optional: portable process-tree RSS
+except ImportError:
+    psutil = None
+
+MILESTONES = (50, 100, 250, 500, 1000, 2500)
+
+
+@dataclass
+class BenchConfig:
+    sites: Sequence[str] = SITES
+    items: int = 300                 # Target per site (max_items)
+    total: Optional[int] = None      # Synthetic board size (default: 2 x items)
+    page_size: int = 25
+    latency_ms: int = 150            # Feed response delay
+    mode: str = "dom"
+    repeat: int = 1                  # Runs per site; the report keeps the median
+    headless: bool = True
+    lean: bool = False
+    collect_opts: Dict[str, Any] = field(default_factory=dict)   # pacing, wait_min_ms, incremental...
+
+
+@dataclass
+class SiteResult:
+    site: str
+    items: int
+    seconds: float                   # Collect phase only (navigation excluded)
+    items_per_s: float
+    cdp_calls: int
+    cdp_per_item: float
+    rounds: int
+    wait_s: float
+    coverage: float                  # Share of the first N feed items actually collected
+    peak_rss_mb: float
+    time_to: Dict[str, float]        # "100" → seconds until the 100th item
+
+
+def _proc_tree_rss_bytes(root: int) -> int:
+    """Sum of RSS of `root` and all its descendants, from /proc (Linux)."""
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        ppid = int(stat[stat.rindex(b")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(name))
+
+    page = os.sysconf("SC_PAGE_SIZE")
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page
+        except OSError:
+            pass
+        stack.extend(children.get(pid, ()))
+    return total
+
+
+def rss_source() -> str:
+    if psutil is not None:
+        return "psutil"
+    if os.path.isdir("/proc"):
+        return "proc"
+    return "python-only"
+
+
+def current_rss_bytes() -> int:
+    """RSS of this process plus the Playwright driver and Chromium below it."""
+    if psutil is not None:
+        me = psutil.Process()
+        total = me.memory_info().rss
+        for child in me.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    if os.path.isdir("/proc"):
+        return _proc_tree_rss_bytes(os.getpid())
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    """Samples process-tree RSS in the background and keeps the peak."""
+
+    def __init__(self, interval_s: float = 0.1):
+        self.interval_s = interval_s
+        self.peak = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            self.peak = max(self.peak, await asyncio.to_thread(current_rss_bytes))
+            await asyncio.sleep(self.interval_s)
+
+    async def __aenter__(self) -> "RssSampler":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+def adapter_for(site: str) -> SiteAdapter:
+    return REGISTRY.get(site)
+
+
+async def run_site(browser, server: FixtureServer, site: str, config: BenchConfig) -> SiteResult:
+    """One crawl of a synthetic board in a fresh context; navigation is not timed."""
+    adapter = adapter_for(site)
+    url = server.url(site)
+    capture = FeedCapture(adapter.FEED_RESOURCES) if config.mode == "network" else None
+    context, page, _ = await new_context_page(
+        browser,
+        on_response=capture.on_response if capture else None,
+        lean=adapter.lean_profile() if config.lean else None,
+    )
+
+    stats = CollectStats()
+    metrics = Metrics()
+    stamps: Dict[str, float] = {}
+    milestones = sorted({m for m in MILESTONES if m < config.items} | {config.items})
+    accepted = 0
+    t0 = 0.0
+
+    async def on_item(pin) -> None:
+        nonlocal accepted
+        accepted += 1
+        if accepted in milestones:
+            stamps[str(accepted)] = round(time.perf_counter() - t0, 4)
+
+    try:
+        await adapter.pre_open(page)
+        await page.goto(url, wait_until="domcontentloaded")   # No cookie dialogs to dismiss
+        async with RssSampler() as rss:
+            t0 = time.perf_counter()
+            opts = dict(config.collect_opts, stats=stats, metrics=metrics, on_item=on_item)
+            if capture is not None:
+                pins = await adapter.network_scroll_and_collect(page, capture, max_items=config.items, **opts)
+            else:
+                pins = await adapter.stream_scroll_and_collect(page, max_items=config.items, **opts)
+            seconds = time.perf_counter() - t0
+    finally:
+        await context.close()
+
+    target = min(config.items, server.total)
+    expected = set(expected_keys(site, server.total, server.base)[:target])
+    got = {adapter._make_key(p) for p in pins}
+    return SiteResult(
+        site=site,
+        items=len(pins),
+        seconds=round(seconds, 4),
+        items_per_s=round(len(pins) / seconds, 3) if seconds else 0.0,
+        cdp_calls=stats.cdp_calls,
+        cdp_per_item=round(stats.cdp_calls / len(pins), 4) if pins else 0.0,
+        rounds=stats.rounds,
+        wait_s=round(stats.wait_ms / 1000, 3),
+        coverage=round(len(expected & got) / target, 4) if target else 0.0,
+        peak_rss_mb=round(rss.peak / 2**20, 1),
+        time_to=stamps,
+    )
+
+
+def _median_result(runs: List[SiteResult]) -> SiteResult:
+    """Per-field median over repeated runs (time_to per milestone reached by every run)."""
+    if len(runs) == 1:
+        return runs[0]
+    med = lambda xs: statistics.median(xs)
+    common = set.intersection(*(set(r.time_to) for r in runs))
+    return SiteResult(
+        site=runs[0].site,
+        items=int(med([r.items for r in runs])),
+        seconds=round(med([r.seconds for r in runs]), 4),
+        items_per_s=round(med([r.items_per_s for r in runs]), 3),
+        cdp_calls=int(med([r.cdp_calls for r in runs])),
+        cdp_per_item=round(med([r.cdp_per_item for r in runs]), 4),
+        rounds=int(med([r.rounds for r in runs])),
+        wait_s=round(med([r.wait_s for r in runs]), 3),
+        coverage=round(min(r.coverage for r in runs), 4),       # Worst run: misses must not hide
+        peak_rss_mb=round(max(r.peak_rss_mb for r in runs), 1), # Peak: worst run
+        time_to={k: round(med([r.time_to[k] for r in runs]), 4) for k in sorted(common, key=int)},
+    )
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def run_bench(config: BenchConfig) -> Dict[str, Any]:
+    """Runs every configured site against the fixture server; returns a JSON-ready report."""
+    total = config.total or config.items * 2
+    results: Dict[str, Any] = {}
+    async with FixtureServer(total=total, page_size=config.page_size, latency_ms=config.latency_ms) as server:
+        pw, browser = await launch_browser(headless=config.headless, lean=config.lean)
+        try:
+            for site in config.sites:
+                if config.mode == "network" and not adapter_for(site).FEED_RESOURCES:
+                    continue
+                runs = [await run_site(browser, server, site, config) for _ in range(config.repeat)]
+                results[site] = asdict(_median_result(runs))
+        finally:
+            await close_browser(pw, browser)
+
+    return {
+        "meta": {
+            "created_at": time.time(),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rss_source": rss_source(),
+            "config": {**asdict(config), "sites": list(config.sites), "total": total},
+        },
+        "results": results,
+    }
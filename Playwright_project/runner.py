@@ -1,41 +1,307 @@
 import argparse
 import asyncio
-import json
-from pathlib import Path
+import itertools
+import logging
 
-from scraper.dispatcher import crawl_board
-from scraper.utils.download import download_pins
+from scraper.dispatcher import crawl_board, crawl_many
+from scraper.enrich import Enricher, enriched
+from scraper.pipeline import crawl_with_downloads
+from scraper.adapters.registry import REGISTRY
+from scraper.profiles import load_profiles, parse_settings
+from scraper.sessions import STRATEGIES, SessionPool
+from scraper.sharding import crawl_sharded
+from scraper.utils.dedupe import connect_dedupe_db
+from scraper.utils.governor import DomainGovernor
+from scraper.utils.mediastore import LINK_MODES, MediaStore
+from scraper.utils.metrics import Metrics, sink_from_spec
+from scraper.utils.pinbatch import PinBatch
+from scraper.utils.sink import JsonlSink, is_jsonl_path, write_json_array
 
 def parse_args():
     p = argparse.ArgumentParser(description="Multi-site pin crawler")
-    p.add_argument("--url", required=True, help="Board/hashtag/listing URL")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--url", help="Board/hashtag/listing URL")
+    src.add_argument("--urls-file", type=str,
+                     help="Text file with one URL per line (# comments allowed), crawled on one shared browser")
     p.add_argument("--max-items", type=int, default=1000, help="Max items to pull")
     p.add_argument("--headless", action="store_true", help="Run headless browser")
     p.add_argument("--storage-state", type=str, default=None,
                    help="Playwright storage_state json (for sites needing login)")
-    p.add_argument("--out-json", type=str, default="pins.json", help="Output JSON path")
+    p.add_argument("--sessions", type=str, default=None, metavar="DIR",
+                   help="Session pool: storage_state files as DIR/<site>/*.json, rotated per context; "
+                        "soft-blocked sessions cool down (health kept in DIR/.health.json)")
+    p.add_argument("--session-strategy", choices=STRATEGIES, default="least_throttled")
+    p.add_argument("--session-cooldown", type=float, default=600.0,
+                   help="Seconds a soft-blocked session rests (doubles per consecutive block)")
+    p.add_argument("--out-json", type=str, default="pins.json",
+                   help="Output path: .json → one array at the end; "
+                        ".jsonl / .jsonl.gz / .jsonl.zst → pins streamed to disk as they are found")
     p.add_argument("--download-dir", type=str, default=None,
                    help="If set, downloads images to this folder (async)")
-    return p.parse_args()
+    p.add_argument("--media-store", type=str, default=None, metavar="DIR",
+                   help="Keep downloads once per content hash in DIR; --download-dir then holds "
+                        "per-board links, and URLs fetched in earlier runs skip the network")
+    p.add_argument("--link", choices=LINK_MODES, default="hardlink",
+                   help="How --media-store files appear in --download-dir")
+    p.add_argument("--phash", action="store_true",
+                   help="With --media-store: flag near-duplicate images by perceptual hash (needs Pillow)")
+    p.add_argument("--dedupe-db", type=str, default=None,
+                   help="SQLite file of seen keys; re-crawls skip pins harvested before")
+    p.add_argument("--mode", choices=["dom", "network"], default="dom",
+                   help="dom: read the rendered grid; network: parse intercepted feed JSON (Pinterest)")
+    p.add_argument("--concurrency", type=int, default=4,
+                   help="Max pages crawled at once with --urls-file")
+    p.add_argument("--per-domain", type=int, default=2,
+                   help="Max pages per site at once with --urls-file")
+    p.add_argument("--workers", type=int, default=1,
+                   help="With --urls-file: spread URLs over N processes (own browser each); "
+                        "--concurrency/--per-domain then apply per process")
+    p.add_argument("--checkpoint", type=str, default=None,
+                   help="Save crawl state here every few rounds and on failure (single --url, dom mode, .jsonl --out-json)")
+    p.add_argument("--resume", action="store_true",
+                   help="Continue from --checkpoint: restore seen keys and fast-scroll past harvested depth")
+    p.add_argument("--pacing", choices=["fixed", "adaptive"], default=None,
+                   help="fixed: constant step + random sleep; adaptive: wait for new cards, tune step (dom mode). "
+                        "Default: the profile's, else fixed (Pinterest's grid collector: adaptive)")
+    p.add_argument("--profile", type=str, default=None, metavar="NAME",
+                   help="Crawl tuning profile (fast, stealth, deep or one from --profiles); default: 'default'")
+    p.add_argument("--profiles", type=str, default=None, metavar="FILE",
+                   help="Profile file (TOML/YAML) layered over scraper/profiles.toml, "
+                        "e.g. one written by python -m scraper.profiles tune")
+    p.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                   help="Override one tuning setting for this run, e.g. wait_min_ms=500 (repeatable)")
+    p.add_argument("--daemon", type=str, default=None, metavar="STATE|URL",
+                   help="Use a warm browser daemon (python -m scraper.daemon): its state file or a CDP URL; "
+                        "skips the browser launch, --headless/--storage-state come from the daemon")
+    p.add_argument("--rate", action="append", default=[], metavar="DOMAIN=RPS",
+                   help="Shared request budget for a domain, e.g. pinimg.com=8 (scrolls and downloads; repeatable)")
+    p.add_argument("--default-rate", type=float, default=None, metavar="RPS",
+                   help="Budget for domains without --rate; either option turns the governor on")
+    p.add_argument("--enrich", action="store_true",
+                   help="Open every pin's detail page (site JSON API first, browser tab fallback) "
+                        "for title, full-resolution media and carousel items")
+    p.add_argument("--enrich-cache", type=str, default=None, metavar="DB",
+                   help="SQLite cache of detail pages by page_url; re-crawls don't refetch them")
+    p.add_argument("--enrich-concurrency", type=int, default=8, help="Detail fetches at once")
+    p.add_argument("--enrich-tabs", type=int, default=2, help="Browser tabs for the detail fallback")
+    p.add_argument("--lean", action="store_true",
+                   help="Lean browser profile: skip fonts, video, trackers and image bytes (URLs are still read)")
+    p.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                   help="DEBUG also logs one line per node (slows big crawls)")
+    p.add_argument("--metrics", action="append", default=[], metavar="SINK",
+                   help="Metrics sink, repeatable: log[:LEVEL], out.jsonl (events + snapshot), out.prom (Prometheus text)")
+    args = p.parse_args()
+    if args.resume and not args.checkpoint:
+        p.error("--resume needs --checkpoint")
+    if args.checkpoint and args.urls_file:
+        p.error("--checkpoint works with a single --url")
+    # Checkpoints commit seen keys; the pins behind them must already be on disk
+    if args.checkpoint and not is_jsonl_path(args.out_json):
+        p.error("--checkpoint needs a streamed --out-json (.jsonl, .jsonl.gz or .jsonl.zst)")
+    if args.checkpoint and args.enrich:
+        p.error("--checkpoint cannot be combined with --enrich (pins in enrichment are not on disk yet)")
+    if args.workers > 1 and not args.urls_file:
+        p.error("--workers needs --urls-file")
+    if args.sessions and (args.daemon or args.workers > 1):
+        p.error("--sessions cannot be combined with --daemon or --workers")
+    args.rates = {}
+    for item in args.rate:
+        domain, _, rps = item.partition("=")
+        try:
+            args.rates[domain] = float(rps)
+        except ValueError:
+            p.error(f"--rate expects DOMAIN=RPS, got {item!r}")
+        if args.rates[domain] <= 0:
+            p.error(f"--rate must be positive, got {item!r}")
+    if (args.rates or args.default_rate) and args.workers > 1:
+        p.error("--rate/--default-rate budgets are per process; not available with --workers")
+    if args.media_store and not args.download_dir:
+        p.error("--media-store needs --download-dir")
+    if args.phash and not args.media_store:
+        p.error("--phash needs --media-store")
+    if args.enrich_cache and not args.enrich:
+        p.error("--enrich-cache needs --enrich")
+    if args.pacing == "adaptive" and args.mode != "dom":
+        p.error("--pacing adaptive only applies to dom mode (network mode waits for feed responses)")
+    try:
+        args.metric_sinks = [sink_from_spec(spec) for spec in args.metrics]
+        args.settings = parse_settings(args.set)
+        profiles = load_profiles(args.profiles)
+        if args.url and args.profile:
+            profiles.resolve(REGISTRY.name_for_url(args.url), args.profile)
+    except (ValueError, OSError, RuntimeError) as e:
+        p.error(str(e))
+    return args
+
+def read_urls(path):
+    with open(path, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
 
 async def main():
     args = parse_args()
-    pins = await crawl_board(
-        url=args.url,
-        max_items=args.max_items,
-        headless=args.headless,
-        storage_state=args.storage_state
-    )
-
-    Path(args.out_json).parent.mkdir(parents=True, exist_ok=True)
-    with open(args.out_json, "w", encoding="utf-8") as f:
-        json.dump([p.__dict__ for p in pins], f, ensure_ascii=False, indent=2)
-
-    print(f"[OK] Extracted {len(pins)} pins → {args.out_json}")
-
-    if args.download_dir:
-        await download_pins(pins, out_dir=args.download_dir)
-        print(f"[OK] Downloaded to: {args.download_dir}")
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    metrics = Metrics(args.metric_sinks) if args.metric_sinks else None
+    sessions = SessionPool.from_dir(
+        args.sessions, strategy=args.session_strategy, cooldown_s=args.session_cooldown,
+        state_path=f"{args.sessions}/.health.json",
+    ) if args.sessions else None
+
+    # Streaming output: pins go to disk as they are accepted and are not kept in memory.
+    # A rerun starts the file over (its IDs restart at 0); only --resume continues it
+    sink = JsonlSink(args.out_json, append=args.resume) if is_jsonl_path(args.out_json) else None
+    collect_opts = {"keep_items": False} if sink else {}
+    if args.pacing is not None:
+        collect_opts["pacing"] = args.pacing
+    # Tuning: profile settings (scraper/profiles.toml + --profiles) under --set overrides
+    if args.profile:
+        collect_opts["profile"] = args.profile
+    if args.profiles:
+        collect_opts["profiles"] = args.profiles
+    collect_opts.update(args.settings)
+    # One budget per domain for every crawl and the downloader of this run
+    governor = None
+    if args.rates or args.default_rate:
+        governor = DomainGovernor(args.rates, default_rate=args.default_rate or 2.0, metrics=metrics)
+        collect_opts["governor"] = governor
+
+    enricher = Enricher(
+        cache_path=args.enrich_cache, concurrency=args.enrich_concurrency, tabs=args.enrich_tabs,
+        headless=args.headless, storage_state=args.storage_state, governor=governor, metrics=metrics,
+    ) if args.enrich else None
+    # Owned here, so the last keys are committed only after enrichment wrote their pins
+    dedupe_conn = connect_dedupe_db(args.dedupe_db) if args.dedupe_db else None
+
+    def flush_output():
+        # Runs before every dedupe/checkpoint commit: pins on disk before their keys
+        if enricher is not None and enricher.in_flight:
+            return False                        # Some pins are still being enriched; commit later
+        if sink:
+            sink.flush(fsync=True)
+
+    async def crawl(on_item=None):
+        if args.workers > 1:
+            # Pins of all processes are merged here with global dedupe and IDs
+            results = await crawl_sharded(
+                read_urls(args.urls_file),
+                workers=args.workers,
+                dedupe_conn=dedupe_conn,
+                on_item=on_item,
+                metrics=metrics,
+                flush_output=flush_output,
+                max_items=args.max_items,
+                headless=args.headless,
+                storage_state=args.storage_state,
+                mode=args.mode,
+                concurrency=args.concurrency,
+                per_domain=args.per_domain,
+                lean=args.lean,
+                daemon=args.daemon,
+                **collect_opts
+            )
+            merged = PinBatch()
+            for board_pins in results.values():
+                merged.extend(board_pins)
+            return merged
+        if args.urls_file:
+            # Each board numbers its pins from 0: renumber them into one sequence
+            # before the sink / downloads see them, and collect the merged output here
+            ids = itertools.count()
+            merged = PinBatch()
+
+            async def renumber(pin):
+                pin.id = next(ids)
+                if sink is None:
+                    merged.append(pin)
+                if on_item is not None:
+                    await on_item(pin)
+
+            await crawl_many(
+                read_urls(args.urls_file),
+                max_items=args.max_items,
+                headless=args.headless,
+                storage_state=args.storage_state,
+                dedupe_conn=dedupe_conn,
+                mode=args.mode,
+                concurrency=args.concurrency,
+                per_domain=args.per_domain,
+                on_item=renumber,
+                lean=args.lean,
+                metrics=metrics,
+                compact=True,
+                daemon=args.daemon,
+                sessions=sessions,
+                flush_output=flush_output,
+                **{**collect_opts, "keep_items": False}
+            )
+            return merged
+        return await crawl_board(
+            url=args.url,
+            max_items=args.max_items,
+            headless=args.headless,
+            storage_state=args.storage_state,
+            dedupe_conn=dedupe_conn,
+            mode=args.mode,
+            on_item=on_item,
+            lean=args.lean,
+            metrics=metrics,
+            compact=True,
+            daemon=args.daemon,
+            sessions=sessions,
+            checkpoint=args.checkpoint,
+            resume=args.resume,
+            flush_output=flush_output,
+            **collect_opts
+        )
+
+    if enricher is not None:
+        # Pins pass through detail enrichment before the sink / downloads see them
+        crawl = enriched(crawl, enricher, collect=sink is None)
+
+    store = MediaStore(args.media_store, link=args.link, phash=args.phash) if args.media_store else None
+    downloads = None
+    try:
+        if args.download_dir:
+            # Downloads start with the first pin instead of after the whole scroll
+            pins, downloads = await crawl_with_downloads(
+                crawl, out_dir=args.download_dir, on_item=sink, governor=governor, store=store
+            )
+        else:
+            pins = await crawl(on_item=sink)
+        if dedupe_conn is not None:
+            flush_output()                      # Everything is through enrichment by now
+            dedupe_conn.commit()
+    finally:
+        if sink:
+            sink.close()
+        if dedupe_conn is not None:
+            dedupe_conn.close()                 # After a failure: uncommitted keys roll back
+        if enricher is not None:
+            logging.info("[ENRICH] %s", ", ".join(f"{k}: {v}" for k, v in enricher.counts.items()))
+        if governor is not None:
+            for domain, g in governor.summary().items():
+                logging.info("[GOV ] %s: %d requests, %.1fs throttled, %d penalties, %.2f/%.2f req/s",
+                             domain, g["requests"], g["throttled_s"], g["penalties"], g["rate"], g["base_rate"])
+        if metrics is not None:
+            metrics.close()
+        if store is not None:
+            stats = store.stats()
+            store.close()
+
+    if sink:
+        print(f"[OK] Extracted {sink.written} pins → {args.out_json}")
+    else:
+        write_json_array(args.out_json, pins)
+
+        print(f"[OK] Extracted {len(pins)} pins → {args.out_json}")
+
+    if downloads is not None:
+        done = sum(r.status != "failed" for r in downloads)
+        print(f"[OK] Downloaded {done}/{len(downloads)} files to: {args.download_dir}")
+    if store is not None:
+        cached = sum(r.status == "cached" for r in downloads)
+        print(f"[OK] Media store: {stats['blobs']} blobs, {stats['bytes'] / 1e6:.1f} MB, "
+              f"{cached} served from the index, {stats['near_duplicates']} near-duplicate(s)")
 
 if __name__ == "__main__":
     asyncio.run(main())
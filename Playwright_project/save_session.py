@@ -1,10 +1,20 @@
+import argparse
 import asyncio
+from pathlib import Path
 from playwright.async_api import async_playwright
 
-async def save_pinterest_session():
+LOGIN_URLS = {
+    "pinterest": "https://www.pinterest.com/login/",
+    "instagram": "https://www.instagram.com/accounts/login/",
+    "artstation": "https://www.artstation.com/users/sign_in",
+}
+
+async def save_session(login_url: str, out: str):
     """
     Opens a browser for manual login and saves the authentication state.
-    Run this once to bypass the 'Login to see more' popup.
+    Run this once per account to bypass the 'Login to see more' popup;
+    save several accounts as sessions/<site>/<name>.json for a session pool
+    (runner.py --sessions sessions).
     """
     async with async_playwright() as p:
         # Launch browser in headed mode so you can interact with it
@@ -12,19 +22,25 @@ async def save_pinterest_session():
         context = await browser.new_context()
         page = await context.new_page()
 
-        print("Navigating to Pinterest...")
-        await page.goto("https://www.pinterest.com/login/")
-        
+        print(f"Navigating to {login_url} ...")
+        await page.goto(login_url)
+
         print("\n[ACTION REQUIRED]: Please log in manually in the browser window.")
         print("Once you are logged in and see your home feed, come back here.")
-        
+
         input("\nPress Enter here AFTER you have successfully logged in...")
-        
+
         # Save the storage state (cookies, localStorage, etc.)
-        await context.storage_state(path="auth.json")
-        print("\n[SUCCESS]: Session saved to 'auth.json'. You can now run the crawler.")
-        
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        await context.storage_state(path=out)
+        print(f"\n[SUCCESS]: Session saved to '{out}'. You can now run the crawler.")
+
         await browser.close()
 
 if __name__ == "__main__":
-    asyncio.run(save_pinterest_session())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Log in once by hand and save the storage_state")
+    parser.add_argument("--site", choices=sorted(LOGIN_URLS), default="pinterest")
+    parser.add_argument("--out", default="auth.json",
+                        help="Output file, e.g. sessions/pinterest/account1.json for a session pool")
+    args = parser.parse_args()
+    asyncio.run(save_session(LOGIN_URLS[args.site], args.out))
\ No newline at end of file
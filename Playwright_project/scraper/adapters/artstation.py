@@ -1,5 +1,7 @@
-from typing import List, Optional
-from scraper.adapters.base import Pin, SiteAdapter
+import re
+from typing import Any, List, Optional
+from scraper.adapters.base import Detail, Pin, SiteAdapter
+from scraper.profiles import STEPWISE_KEYS, apply_profile
 from scraper.utils.stream import streaming_scroll_and_collect_stepwise
 
 
@@ -10,26 +12,36 @@ class ArtStationAdapter(SiteAdapter):
     CARD = "a.project-image, figure.project-image-container"   # Grid'deki proje kutuları
     IMG  = "img"
 
+    CARD_SCHEMA = {                                            # Tek evaluate_all ile okunan kart alanları
+        "href":    (None, "href"),
+        "has_img": (IMG, None),
+        "src":     (IMG, "src"),
+        "srcset":  (IMG, "srcset"),
+        "alt":     (IMG, "alt"),
+    }
+
+    BLOCK_PATTERNS = [r"widget\.intercom\.io", r"js\.stripe\.com"]   # Lean profil: sohbet/ödeme widget'ları
+    ALLOW_PATTERNS = [r"/projects\.json", r"/api/v2/"]                 # Grid'i dolduran JSON çağrıları
+    SOFT_BLOCK_SELECTORS = ["div.sign-in-modal"]                       # Giriş isteyen modal
+
     async def pre_open(self, page):
         pass
 
     async def navigate_board(self, page, url):
         await page.goto(url, wait_until="domcontentloaded")
 
-    async def _build_pin(self, node) -> Optional[Pin]:
+    def _pin_from_card(self, card, board_url) -> Optional[Pin]:
         # Proje linkini al
-        a = node
-        href = await a.get_attribute("href") if a else None
+        href = card.get("href")
         page_url = href if href and href.startswith("http") else None
 
         # Thumbnail / full görsel
-        img = await node.query_selector(self.IMG)
-        if not img:
+        if not card.get("has_img"):
             return None
 
-        src = await img.get_attribute("src")
-        srcset = await img.get_attribute("srcset")
-        alt = await img.get_attribute("alt")
+        src = card.get("src")
+        srcset = card.get("srcset")
+        alt = card.get("alt")
 
         image_url = None
         thumb_url = None
@@ -46,9 +58,8 @@ class ArtStationAdapter(SiteAdapter):
         if not image_url:
             return None
 
-        board_url = await node.evaluate("() => window.location.href")
-
         return Pin(
+            id=0,
             source=self.name,
             board_url=board_url,
             page_url=page_url,
@@ -58,16 +69,39 @@ class ArtStationAdapter(SiteAdapter):
             alt_text=alt
         )
 
+    _ARTWORK_RE = re.compile(r"artstation\.com/artwork/([A-Za-z0-9]+)")
+
+    def detail_api_url(self, page_url: str) -> Optional[str]:
+        # Proje sayfasının JSON karşılığı: tüm asset'ler tam çözünürlükte
+        m = self._ARTWORK_RE.search(page_url or "")
+        return f"https://www.artstation.com/projects/{m.group(1)}.json" if m else None
+
+    def _detail_from_json(self, payload: Any) -> Optional[Detail]:
+        if not isinstance(payload, dict):
+            return None
+        images = [
+            a["image_url"] for a in payload.get("assets") or []
+            if a.get("asset_type") == "image" and a.get("has_image") and a.get("image_url")
+        ]
+        return Detail(
+            title=(payload.get("title") or "").strip() or None,
+            image_url=images[0] if images else payload.get("cover_url"),
+            carousel=images if len(images) > 1 else None,
+        )
+
     def _make_key(self, pin: Pin) -> Optional[str]:
         return pin.page_url or pin.image_url
 
-    async def stream_scroll_and_collect(self, page, max_items: int = 1000) -> List[Pin]:
+    async def stream_scroll_and_collect(self, page, max_items: int = 1000, **opts) -> List[Pin]:
+        # Adım/bekleme ayarları scraper/profiles.toml'dan ([artstation.<profil>])
+        opts = apply_profile(self.name, opts, STEPWISE_KEYS)
         return await streaming_scroll_and_collect_stepwise(
             page=page,
             item_selector=self.CARD,
             build_item=self._build_pin,
+            card_schema=self.CARD_SCHEMA,
+            build_from_card=self._pin_from_card,
             make_key=self._make_key,
             max_items=max_items,
-            step_ratio=0.75,
-            stagnant_tolerance=6
+            **opts
         )
@@ -1,7 +1,12 @@
-from dataclasses import dataclass                 # dataclass creates lightweight, readable data objects
-from typing import Optional, Dict, Any, List      # type hints for optional fields and generic lists
+import sys                                        # sys.intern: one shared copy of repeated strings
+from dataclasses import dataclass, fields         # dataclass creates lightweight, readable data objects
+from json.encoder import encode_basestring        # JSON string escaping without building dicts
+from typing import Optional, Dict, Any, List, Tuple  # type hints for optional fields and generic lists
+import re                                         # escapes feed fragments into allow patterns
+from scraper.utils.stream import Card, CardSchema, extract_card
+from scraper.utils.blocking import LeanProfile    # request filtering for lean scraping contexts
 
-@dataclass
+@dataclass(slots=True)                            # No per-instance __dict__: ~3x smaller per Pin
 class Pin:                                         # Represents one scraped media item (unified schema)
     id: int
     source: str                                   # Name of the website (e.g., "pinterest", "instagram")
@@ -9,21 +14,106 @@ class Pin:                                         # Represents one scraped medi
     page_url: Optional[str]                       # Link to the pin's detail page (may be None)
     image_url: str                                # Direct image URL (required for downloading)
     title: Optional[str]                          # Title or caption (optional)
-    alt_text: Optional[str]  
+    alt_text: Optional[str]                       # ALT text from <img> (optional)
     media_type: str = "image"       # 'image', 'video' vb. olabilir
-    video_url: Optional[str] = None # Eğer video ise doğrudan linki                     # ALT text from <img> (optional)
+    video_url: Optional[str] = None # Eğer video ise doğrudan linki
     thumb_url: Optional[str] = None
+    carousel: Optional[List[str]] = None          # All media URLs of a multi-image post (detail enrichment)
+
+    def __post_init__(self):
+        # Every pin of a board repeats these: keep one shared string object
+        self.source = sys.intern(self.source)
+        self.board_url = sys.intern(self.board_url)
+        self.media_type = sys.intern(self.media_type)
+
+    def to_row(self) -> Tuple:                    # Field values in PIN_FIELDS order
+        return tuple(getattr(self, name) for name in PIN_FIELDS)
+
+    @classmethod
+    def from_row(cls, row) -> "Pin":              # Inverse of to_row (also accepts lists)
+        return cls(*row)
+
+    def to_dict(self) -> Dict[str, Any]:          # Only for callers that really need a dict
+        return {name: getattr(self, name) for name in PIN_FIELDS}
+
+    def to_json(self) -> str:                     # One JSON object, written straight from the slots
+        return pin_json(self.to_row())
+
+
+PIN_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(Pin))
+_JSON_KEYS = tuple(encode_basestring(name) + ":" for name in PIN_FIELDS)
+
+
+def _json_value(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return encode_basestring(value)           # Same escaping as json.dumps(ensure_ascii=False)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_json_value(v) for v in value) + "]"
+    return str(value)
+
+
+def pin_json(row) -> str:
+    """JSON object text for one pin row (PIN_FIELDS order) without an intermediate dict."""
+    return "{" + ",".join(key + _json_value(v) for key, v in zip(_JSON_KEYS, row)) + "}"
+
+@dataclass
+class Detail:                                      # What a detail page adds to a grid-level Pin
+    title: Optional[str] = None
+    image_url: Optional[str] = None               # Full-resolution image (or video cover)
+    video_url: Optional[str] = None
+    carousel: Optional[List[str]] = None          # Every image of a multi-image post, in order
+    from_api: bool = False                        # From the site's JSON; page meta images are downscaled
+
 
 class SiteAdapter:                                # Abstract base class for all site-specific adapters
     name: str = "base"                            # Human-readable adapter name (override per site)
     domains: List[str] = []                       # Domain patterns handled by this adapter
+    CARD_SCHEMA: CardSchema = {}                  # Fields serialized per grid card (batched extraction)
+    FEED_RESOURCES: List[str] = []                # Feed endpoint URL fragments (network harvesting mode)
+    BLOCK_PATTERNS: List[str] = []                # Site-specific tracking/telemetry URL regexes (lean profile)
+    ALLOW_PATTERNS: List[str] = []                # URL regexes that must never be blocked (feed/API calls)
+    SOFT_BLOCK_SELECTORS: List[str] = []          # Login wall / signup modal markers (session pool health)
+
+    def lean_profile(self, base: Optional[LeanProfile] = None) -> LeanProfile:
+        """Lean profile for this site: generic rules + own block list; feed requests always pass."""
+        allow = [re.escape(r) for r in self.FEED_RESOURCES] + self.ALLOW_PATTERNS
+        return (base or LeanProfile()).with_rules(block=self.BLOCK_PATTERNS, allow=allow)
 
     async def pre_open(self, page): ...           # Runs before navigation (setup, remove modals, etc.)
 
     async def navigate_board(self, page, url): ...# Loads the page and handles site-specific popups
 
+    def _pin_from_card(self, card: Card, board_url: str) -> Optional[Pin]:
+        """Builds a Pin from one card dict produced by CARD_SCHEMA."""
+        raise NotImplementedError
+
+    async def _build_pin(self, node, page) -> Optional[Pin]:
+        # Per-node fallback: one evaluate per card instead of one call per attribute
+        card = await extract_card(node, self.CARD_SCHEMA)
+        return self._pin_from_card(card, page.url)
+
+    def detail_api_url(self, page_url: str) -> Optional[str]:
+        """JSON endpoint describing one pin (detail enrichment); None → read the page in a browser tab."""
+        return None
+
+    def _detail_from_json(self, payload: Any) -> Optional[Detail]:
+        """Detail from the detail_api_url response."""
+        return None
+
     async def stream_scroll_and_collect(          # Main streaming function: scroll + capture items
-        self, page, max_items: int = 1000         # Limit the number of items to collect
+        self, page, max_items: int = 1000,        # Limit the number of items to collect
+        **opts                                    # Extra collector options (stats, incremental, ...)
     ) -> List[Pin]:
         """Implement in concrete adapters: scroll + snapshot + dedupe + stop."""
         raise NotImplementedError                 # Must be overridden in each adapter implementation
+
+    async def network_scroll_and_collect(         # Network mode: build items from intercepted feed JSON
+        self, page, capture, max_items: int = 1000,
+        **opts
+    ) -> List[Pin]:
+        """Implement in adapters that declare FEED_RESOURCES."""
+        raise NotImplementedError(f"{self.name} adapter has no network harvesting mode")
@@ -1,5 +1,6 @@
 from typing import List, Optional
 from scraper.adapters.base import Pin, SiteAdapter
+from scraper.profiles import STEPWISE_KEYS, apply_profile
 from scraper.utils.stream import streaming_scroll_and_collect_stepwise
 
 
@@ -10,6 +11,21 @@ class InstagramAdapter(SiteAdapter):
     GRID_LINK = "a[href*='/p/'], a[href*='/reel/']"         # Post + Reel grid tile selector
     IMG = "img"                                             # Instagram grid görselleri <img> içinde gelir
 
+    CARD_SCHEMA = {                                         # Tek evaluate_all ile okunan kart alanları
+        "href":    (None, "href"),                          # Tile'ın kendisi <a>
+        "has_img": (IMG, None),
+        "src":     (IMG, "src"),
+        "srcset":  (IMG, "srcset"),
+        "alt":     (IMG, "alt"),
+    }
+
+    BLOCK_PATTERNS = [r"/logging/", r"/ajax/bz", r"/ajax/qm/"]          # Lean profil: telemetri istekleri
+    ALLOW_PATTERNS = [r"/api/v1/", r"/graphql/query", r"/api/graphql"]  # Grid'i dolduran API çağrıları
+    SOFT_BLOCK_SELECTORS = [                                # Giriş duvarı: login formu veya modal
+        "div[role='dialog'] input[name='username']",
+        "form#loginForm",
+    ]
+
     async def pre_open(self, page):
         pass                                                # Login/cookie için storage_state kullanılabiliyor
 
@@ -27,9 +43,9 @@ class InstagramAdapter(SiteAdapter):
             except:
                 pass
 
-    async def _build_pin(self, node) -> Optional[Pin]:
+    def _pin_from_card(self, card, board_url) -> Optional[Pin]:
         # 1) Post/Reel linki
-        href = await node.get_attribute("href")
+        href = card.get("href")
         if not href:
             return None
 
@@ -41,13 +57,12 @@ class InstagramAdapter(SiteAdapter):
             page_url = None
 
         # 2) Fotoğraf/thumbnail
-        img = await node.query_selector(self.IMG)
-        if not img:
+        if not card.get("has_img"):
             return None
 
-        src = await img.get_attribute("src")
-        srcset = await img.get_attribute("srcset")
-        alt = await img.get_attribute("alt")
+        src = card.get("src")
+        srcset = card.get("srcset")
+        alt = card.get("alt")
 
         image_url = None
         thumb_url = None
@@ -65,9 +80,8 @@ class InstagramAdapter(SiteAdapter):
         if not image_url:
             return None
 
-        board_url = await node.evaluate("() => window.location.href")
-
         return Pin(
+            id=0,
             source=self.name,
             board_url=board_url,
             page_url=page_url,
@@ -81,13 +95,16 @@ class InstagramAdapter(SiteAdapter):
         # En stabil key → sayfa URL'si
         return pin.page_url or pin.image_url
 
-    async def stream_scroll_and_collect(self, page, max_items: int = 1000) -> List[Pin]:
+    async def stream_scroll_and_collect(self, page, max_items: int = 1000, **opts) -> List[Pin]:
+        # Adım/bekleme ayarları scraper/profiles.toml'dan ([instagram.<profil>])
+        opts = apply_profile(self.name, opts, STEPWISE_KEYS)
         return await streaming_scroll_and_collect_stepwise(
             page=page,
             item_selector=self.GRID_LINK,
             build_item=self._build_pin,
+            card_schema=self.CARD_SCHEMA,
+            build_from_card=self._pin_from_card,
             make_key=self._make_key,
             max_items=max_items,
-            step_ratio=0.75,
-            stagnant_tolerance=6
+            **opts
         )
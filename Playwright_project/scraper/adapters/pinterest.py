@@ -1,17 +1,64 @@
+import json
 import re
-from typing import List, Optional
-from scraper.adapters.base import Pin, SiteAdapter
+from typing import Any, Iterator, List, Optional
+from urllib.parse import quote
+from scraper.adapters.base import Detail, Pin, SiteAdapter
+from scraper.profiles import NETWORK_KEYS, STEPWISE_KEYS, VIRTUAL_KEYS, apply_profile
+from scraper.utils.netcapture import network_scroll_and_collect
 from scraper.utils.stream import streaming_scroll_and_collect_stepwise
+from scraper.utils.virtual import virtual_scroll_and_collect
 
 class PinterestAdapter(SiteAdapter):
     name = "pinterest"
-    domains = ["pinterest.com"]
+    # Ülke domain'leri + kısa link; eşleşme suffix ile (bkz. adapters/registry.py)
+    domains = ["pinterest.com", "pinterest.co.uk", "pinterest.ca", "pinterest.com.au",
+               "pinterest.de", "pinterest.fr", "pinterest.es", "pinterest.it", "pin.it"]
 
     PIN  = "div[data-test-id='pinWrapper'], div[data-test-id='pin']"
     LINK = "a[href^='/pin/']"
     IMG  = "img"
     VIDEO = "video"  # <--- YENİ: Video elementi seçicisi
 
+    # Tek evaluate_all çağrısıyla her karttan okunan alanlar
+    CARD_SCHEMA = {
+        "href":        ("a", "href"),
+        "has_img":     (IMG, None),
+        "srcset":      (IMG, "srcset"),
+        "data_srcset": (IMG, "data-srcset"),
+        "src":         (IMG, "src"),
+        "data_src":    (IMG, "data-src"),
+        "alt":         (IMG, "alt"),
+        "has_video":   (VIDEO, None),
+        "video_src":   (VIDEO, "src"),
+    }
+
+    # Grid'i dolduran JSON feed endpoint'leri (network modu)
+    FEED_RESOURCES = [
+        "/resource/BoardFeedResource/get",
+        "/resource/BoardSectionPinsResource/get",
+        "/resource/BaseSearchResource/get",
+        "/resource/UserPinsResource/get",
+        "/resource/UserHomefeedResource/get",
+    ]
+    # Lean profilde engellenen izleme/telemetri istekleri
+    BLOCK_PATTERNS = [
+        r"ct\.pinterest\.com",
+        r"trk\.pinterest\.com",
+        r"/_/_/v3/callback/event/",
+        r"/_/_/logClientError/",
+    ]
+    # "Login to see more" duvarı / kayıt modalı görünüyorsa oturum yumuşak engellenmiş demektir
+    SOFT_BLOCK_SELECTORS = [
+        "div[data-test-id='fullPageSignupModal']",
+        "div[data-test-id='signup-modal']",
+        "div[data-test-id='login-modal-default']",
+    ]
+    # İlk sayfanın pin'leri HTML içine gömülü geliyor
+    INITIAL_DATA_SCRIPTS = "script#__PWS_INITIAL_PROPS__, script#__PWS_DATA__"
+    # Tercih sırasına göre video kaliteleri
+    VIDEO_QUALITIES = ["V_720P", "V_EXP7", "V_EXP6", "V_EXP5", "V_EXP4", "V_HLSV4", "V_HLSV3_MOBILE"]
+
+    _PIN_ID_RE          = re.compile(r"/pin/(\d+)")
     _PINIMG_SIZE_DIR_RE = re.compile(r"/(\d+)x/")
     _PINIMG_HOST_RE     = re.compile(r"^https?://i\.pinimg\.com/")
 
@@ -65,11 +112,10 @@ class PinterestAdapter(SiteAdapter):
 
     # scraper/adapters/pinterest.py içindeki ilgili fonksiyonlar
 
-    async def _build_pin(self, node, page) -> Optional[Pin]:
+    def _pin_from_card(self, card, board_url) -> Optional[Pin]:
         # 1) Detay linkini al
-        a = await node.query_selector("a")
-        href = await a.get_attribute("href") if a else None
-        
+        href = card.get("href")
+
         page_url = None
         if href:
             page_url = f"https://www.pinterest.com{href}" if href.startswith("/") else href
@@ -77,35 +123,32 @@ class PinterestAdapter(SiteAdapter):
         # --- VİDEO VE MEDYA TİPİ KONTROLÜ ---
         media_type = "image"
         video_url = None
-        
-        # Grid içindeki video elementini ara
-        video_el = await node.query_selector(self.VIDEO)
-        if video_el:
+
+        # Grid içinde video elementi varsa
+        if card.get("has_video"):
             media_type = "video"
-            # Video kaynağını al (genellikle 'src' özniteliğindedir)
-            video_url = await video_el.get_attribute("src")
+            # Video kaynağı (genellikle 'src' özniteliğindedir)
+            video_url = card.get("video_src")
 
         # --- GÖRSEL ÇEKME (Video olsa bile poster/kapak resmi için img gereklidir) ---
-        img = await node.query_selector(self.IMG)
-        
         # Eğer ne resim ne video bulunamadıysa atla
-        if not img and not video_url:
+        if not card.get("has_img") and not video_url:
             return None
 
         image_url = None
         thumb_url = None
         alt = "Pinterest Media"
 
-        if img:
-            srcset = await img.get_attribute("srcset") or await img.get_attribute("data-srcset")
-            src = await img.get_attribute("src") or await img.get_attribute("data-src")
-            alt = await img.get_attribute("alt") or alt
+        if card.get("has_img"):
+            srcset = card.get("srcset") or card.get("data_srcset")
+            src = card.get("src") or card.get("data_src")
+            alt = card.get("alt") or alt
 
             # En yüksek kalite resmi al
             image_url = self._largest_from_srcset(srcset) if srcset else src
             image_url = self._try_upscale_pinimg(image_url)
             thumb_url = src
-        
+
         # Eğer resim URL'si bulunamadıysa ve video URL'si de yoksa geçersizdir
         if not image_url and not video_url:
             return None
@@ -113,7 +156,7 @@ class PinterestAdapter(SiteAdapter):
         return Pin(
             id=0,
             source=self.name,
-            board_url=page.url,
+            board_url=board_url,
             page_url=page_url or image_url, # Benzersiz key için
             image_url=image_url,           # Video durumunda bu 'kapak resmi' olur
             thumb_url=thumb_url,
@@ -130,17 +173,149 @@ class PinterestAdapter(SiteAdapter):
             #print("[!] Warning: Could not generate a unique key for this Pin.")
         return key
 
-    async def stream_scroll_and_collect(self, page, max_items: int = 1000) -> List[Pin]:
-        # Mevcut çağrınız aynı kalıyor
+    async def stream_scroll_and_collect(self, page, max_items: int = 1000, **opts) -> List[Pin]:
+        # Pinterest grid'i sanallaştırılmış (pinWrapper node'ları geri dönüştürülüyor):
+        # varsayılan olarak kare başına atomik snapshot alan collector, tur sınırı yok.
+        # Bekleme/tolerans ayarları scraper/profiles.toml'dan ([pinterest.<profil>])
+        opts = apply_profile(self.name, opts, STEPWISE_KEYS | VIRTUAL_KEYS)
+        if opts.pop("virtual", True):
+            for key in STEPWISE_KEYS - VIRTUAL_KEYS:
+                opts.pop(key, None)
+            return await virtual_scroll_and_collect(
+                page=page,
+                item_selector=self.PIN,
+                card_schema=self.CARD_SCHEMA,
+                build_from_card=self._pin_from_card,
+                make_key=self._make_key,
+                max_items=max_items,
+                **opts
+            )
+        # virtual=False: eski adım adım collector
+        for key in VIRTUAL_KEYS - STEPWISE_KEYS:
+            opts.pop(key, None)
         return await streaming_scroll_and_collect_stepwise(
             page=page,
             item_selector=self.PIN,
             build_item=self._build_pin,
+            card_schema=self.CARD_SCHEMA,
+            build_from_card=self._pin_from_card,
             make_key=self._make_key,
             max_items=max_items,
-            step_ratio=0.6,
-            stagnant_tolerance=8,
-            wait_min_ms=1000,
-            wait_jitter_ms=800,
-            max_rounds=50
-        )
\ No newline at end of file
+            **opts
+        )
+
+    # --- NETWORK MODU: feed JSON'undan doğrudan Pin üretimi ---
+
+    def _iter_pin_dicts(self, obj: Any) -> Iterator[dict]:
+        # Payload içinde pin objelerini bul (board feed, search, initial props aynı şekli kullanıyor)
+        stack = [obj]
+        while stack:
+            cur = stack.pop()
+            if isinstance(cur, dict):
+                if cur.get("type") == "pin" and isinstance(cur.get("images"), dict):
+                    yield cur
+                    continue
+                stack.extend(cur.values())
+            elif isinstance(cur, list):
+                stack.extend(reversed(cur))
+
+    def _video_from_resource(self, d: dict) -> Optional[str]:
+        video_list = ((d.get("videos") or {}).get("video_list")) or {}
+        for quality in self.VIDEO_QUALITIES:
+            url = (video_list.get(quality) or {}).get("url")
+            if url:
+                return url
+        return next((v.get("url") for v in video_list.values() if isinstance(v, dict) and v.get("url")), None)
+
+    def _pin_from_resource(self, d: dict, board_url: str) -> Optional[Pin]:
+        pin_id = d.get("id")
+        images = d.get("images") or {}
+        orig = (images.get("orig") or {}).get("url")
+        thumb = (images.get("236x") or {}).get("url")
+        video_url = self._video_from_resource(d)
+
+        image_url = orig or self._try_upscale_pinimg(thumb)
+        if not pin_id or (not image_url and not video_url):
+            return None
+
+        return Pin(
+            id=0,
+            source=self.name,
+            board_url=board_url,
+            page_url=f"https://www.pinterest.com/pin/{pin_id}/",  # DOM modundaki key ile aynı
+            image_url=image_url,
+            thumb_url=thumb,
+            title=(d.get("title") or d.get("grid_title") or "").strip() or None,
+            alt_text=d.get("auto_alt_text") or d.get("description") or "Pinterest Media",
+            media_type="video" if video_url else "image",
+            video_url=video_url
+        )
+
+    def _pins_from_payload(self, payload: Any, board_url: str) -> Iterator[Pin]:
+        for d in self._iter_pin_dicts(payload):
+            pin = self._pin_from_resource(d, board_url)
+            if pin:
+                yield pin
+
+    # --- DETAY ZENGİNLEŞTİRME: tek pin için PinResource JSON'u ---
+
+    def detail_api_url(self, page_url: str) -> Optional[str]:
+        m = self._PIN_ID_RE.search(page_url or "")
+        if not m:
+            return None
+        data = json.dumps({"options": {"id": m.group(1), "field_set_key": "detailed"}, "context": {}})
+        return f"https://www.pinterest.com/resource/PinResource/get/?data={quote(data)}"
+
+    def _detail_from_json(self, payload: Any) -> Optional[Detail]:
+        d = ((payload or {}).get("resource_response") or {}).get("data")
+        if not isinstance(d, dict):
+            return None
+        images = d.get("images") or {}
+        carousel = []
+        # Çoklu görsel: klasik carousel slotları veya story/idea pin sayfaları
+        for slot in ((d.get("carousel_data") or {}).get("carousel_slots")) or []:
+            slot_images = slot.get("images") or {}
+            url = (slot_images.get("orig") or slot_images.get("736x") or {}).get("url")
+            if url:
+                carousel.append(self._try_upscale_pinimg(url))
+        for page in ((d.get("story_pin_data") or {}).get("pages")) or []:
+            for block in page.get("blocks") or []:
+                url = ((((block.get("image") or {}).get("images") or {}).get("originals")) or {}).get("url")
+                if url:
+                    carousel.append(url)
+        return Detail(
+            title=(d.get("title") or d.get("grid_title") or "").strip() or None,
+            image_url=(images.get("orig") or {}).get("url") or (carousel[0] if carousel else None),
+            video_url=self._video_from_resource(d),
+            carousel=carousel if len(carousel) > 1 else None,
+        )
+
+    def _feed_ended(self, payload: Any) -> bool:
+        # Son sayfada bookmark "-end-" oluyor
+        if not isinstance(payload, dict):
+            return False
+        bookmark = (payload.get("resource_response") or {}).get("bookmark")
+        return bookmark == "-end-"
+
+    async def _initial_payloads(self, page) -> List[Any]:
+        texts = await page.locator(self.INITIAL_DATA_SCRIPTS).all_text_contents()
+        payloads = []
+        for text in texts:
+            try:
+                payloads.append(json.loads(text))
+            except ValueError:
+                pass
+        return payloads
+
+    async def network_scroll_and_collect(self, page, capture, max_items: int = 1000, **opts) -> List[Pin]:
+        opts = apply_profile(self.name, opts, NETWORK_KEYS, mode="network")
+        return await network_scroll_and_collect(
+            page=page,
+            capture=capture,
+            parse_payload=self._pins_from_payload,
+            make_key=self._make_key,
+            feed_ended=self._feed_ended,
+            initial_payloads=await self._initial_payloads(page),
+            max_items=max_items,
+            **opts
+        )
@@ -0,0 +1,181 @@
+import importlib
+import logging
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from scraper.adapters.base import SiteAdapter
+
+log = logging.getLogger(__name__)
+
+# Third-party packages add adapters under this entry point group, e.g. in pyproject.toml:
+#   [project.entry-points."media_scraper.adapters"]
+#   behance = "my_pkg.behance_spec:SPEC"        # AdapterSpec: module stays unimported until used
+#   behance = "my_pkg.behance:BehanceAdapter"   # or the class itself (imported at discovery)
+ENTRY_POINT_GROUP = "media_scraper.adapters"
+
+
+@dataclass
+class AdapterSpec:
+    """
+    An adapter known by name and domains before its module is imported.
+    `target` is "package.module:ClassName"; load() imports it once.
+    """
+    name: str
+    domains: Tuple[str, ...]
+    target: str
+    _instance: Optional[SiteAdapter] = field(default=None, repr=False)
+
+    def load(self) -> SiteAdapter:
+        if self._instance is None:
+            module, _, attr = self.target.partition(":")
+            cls = getattr(importlib.import_module(module), attr)
+            self._instance = cls()
+            declared = {d.lower() for d in self._instance.domains}
+            if declared != set(self.domains):
+                log.warning("[REGISTRY] %s declares domains %s, registered as %s",
+                            self.name, sorted(declared), sorted(self.domains))
+        return self._instance
+
+    @classmethod
+    def of(cls, adapter: Union[SiteAdapter, type]) -> "AdapterSpec":
+        """Spec for an already imported adapter class or instance."""
+        instance = adapter() if isinstance(adapter, type) else adapter
+        return cls(instance.name, tuple(d.lower() for d in instance.domains),
+                   f"{type(instance).__module__}:{type(instance).__name__}", instance)
+
+
+BUILTIN = [
+    AdapterSpec("pinterest", ("pinterest.com", "pinterest.co.uk", "pinterest.ca", "pinterest.com.au",
+                              "pinterest.de", "pinterest.fr", "pinterest.es", "pinterest.it", "pin.it"),
+                "scraper.adapters.pinterest:PinterestAdapter"),
+    AdapterSpec("instagram", ("instagram.com",), "scraper.adapters.instagram:InstagramAdapter"),
+    AdapterSpec("artstation", ("artstation.com",), "scraper.adapters.artstation:ArtStationAdapter"),
+]
+
+
+def normalize_host(host: str) -> str:
+    # "WWW.Pinterest.com:443." → "www.pinterest.com"
+    return host.lower().rsplit("@", 1)[-1].split(":", 1)[0].rstrip(".")
+
+
+class AdapterRegistry:
+    """
+    Routes URLs to adapters by domain suffix.
+
+    A host matches a registered domain if it equals it or ends with
+    "." + domain (www.pinterest.com → pinterest.com; notpinterest.com and
+    pinterest.com.evil do not). The index is a dict keyed by domain, so a
+    lookup costs one probe per host label, and results are cached per host
+    for URL batches. Adapter modules are imported on first use of an
+    adapter (see AdapterSpec); entry point plugins (ENTRY_POINT_GROUP) are
+    discovered on the first lookup.
+    """
+
+    def __init__(self, specs: Iterable[AdapterSpec] = (), discover: bool = True):
+        self._specs: Dict[str, AdapterSpec] = {}
+        self._by_domain: Dict[str, AdapterSpec] = {}
+        self._host_cache: Dict[str, Optional[AdapterSpec]] = {}
+        self._discover_pending = discover
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: Union[AdapterSpec, SiteAdapter, type], replace: bool = False) -> AdapterSpec:
+        """
+        Adds an adapter (spec, class or instance). `replace` lets it take over
+        a name or domains; every adapter it displaces is unregistered as a
+        whole (name and all its domains), not left half-routed.
+        """
+        if not isinstance(spec, AdapterSpec):
+            spec = AdapterSpec.of(spec)
+        if spec.name in self._specs and not replace:
+            raise ValueError(f"Adapter {spec.name!r} is already registered")
+        displaced = {}
+        for domain in spec.domains:
+            owner = self._by_domain.get(normalize_host(domain))
+            if owner is not None and owner.name != spec.name:
+                if not replace:
+                    raise ValueError(f"Domain {domain} is already handled by {owner.name!r}")
+                displaced[owner.name] = owner
+        for owner in displaced.values():
+            log.warning("[REGISTRY] %s takes over domains of %s; unregistering %s",
+                        spec.name, owner.name, owner.name)
+            self.unregister(owner.name)
+        if spec.name in self._specs:
+            self.unregister(spec.name)
+        self._specs[spec.name] = spec
+        for domain in spec.domains:
+            self._by_domain[normalize_host(domain)] = spec
+        self._host_cache.clear()
+        return spec
+
+    def unregister(self, name: str) -> AdapterSpec:
+        """Removes an adapter with all of its domains."""
+        try:
+            spec = self._specs.pop(name)
+        except KeyError:
+            raise ValueError(f"Unknown adapter: {name}") from None
+        self._by_domain = {d: s for d, s in self._by_domain.items() if s is not spec}
+        self._host_cache.clear()
+        return spec
+
+    def _discover(self) -> None:
+        if not self._discover_pending:
+            return
+        self._discover_pending = False
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                self.register(ep.load())
+            except Exception as e:
+                log.warning("[REGISTRY] Skipping adapter plugin %s (%s): %s", ep.name, ep.value, e)
+
+    def _spec_for_host(self, host: str) -> Optional[AdapterSpec]:
+        host = normalize_host(host)
+        if host in self._host_cache:
+            return self._host_cache[host]
+        self._discover()
+        spec = None
+        labels = host.split(".")
+        for i in range(len(labels)):            # Longest suffix first: a.b.example.com, b.example.com, ...
+            spec = self._by_domain.get(".".join(labels[i:]))
+            if spec is not None:
+                break
+        self._host_cache[host] = spec
+        return spec
+
+    def for_host(self, host: str) -> SiteAdapter:
+        spec = self._spec_for_host(host)
+        if spec is None:
+            raise ValueError(f"No adapter registered for host: {normalize_host(host)}")
+        return spec.load()
+
+    def for_url(self, url: str) -> SiteAdapter:
+        return self.for_host(urlparse(url).netloc)
+
+    def name_for_url(self, url: str) -> str:
+        """Adapter name for a URL without importing the adapter (grouping, validation)."""
+        host = urlparse(url).netloc
+        spec = self._spec_for_host(host)
+        if spec is None:
+            raise ValueError(f"No adapter registered for host: {normalize_host(host)}")
+        return spec.name
+
+    def get(self, name: str) -> SiteAdapter:
+        self._discover()
+        try:
+            return self._specs[name].load()
+        except KeyError:
+            raise ValueError(f"Unknown adapter: {name} (known: {', '.join(self.names())})") from None
+
+    def names(self) -> List[str]:
+        self._discover()
+        return list(self._specs)
+
+    def all(self) -> List[SiteAdapter]:
+        """Every adapter, imported."""
+        return [self.get(name) for name in self.names()]
+
+
+# Process-wide registry used by the dispatcher
+REGISTRY = AdapterRegistry(BUILTIN)
@@ -2,6 +2,10 @@ from playwright.async_api import async_playwright
 # Import the asynchronous Playwright API.
 # This allows us to launch and control the browser using async/await.
 
+from scraper.utils.blocking import LEAN_CHROME_ARGS, LeanProfile, ResourceBlocker
+# Lean scraping profile: extra launch flags, request routing rules and
+# the route handler that applies them to a context.
+
 
 CHROME_ARGS = [
     "--disable-blink-features=AutomationControlled",
@@ -28,29 +32,62 @@ UA = (
 # A real Chrome Windows UA reduces suspicion and improves scraping success.
 
 
-async def open_page(headless: bool = True, storage_state: str | None = None):
+async def launch_browser(headless: bool = True, lean: bool = False):
     """
-    Launches Playwright, opens a Chromium browser, creates a browser context,
-    and finally opens a new page. Returns all four objects for later cleanup.
+    Starts the Playwright engine and launches one Chromium process.
+    A single browser can host many isolated contexts (see new_context_page),
+    so multi-URL crawls pay the cold start only once.
+
+    lean=True adds LEAN_CHROME_ARGS (no extensions, background networking,
+    GPU, audio...), cutting per-process overhead on crowded scraping boxes.
 
     Returns:
         pw: Playwright instance
         browser: Chromium browser object
-        context: Browser context (cookies, localStorage, session)
-        page: Actual browser tab for navigation and scraping
     """
 
     pw = await async_playwright().start()
     # Start the Playwright engine.
     # Without this, no browser instances can be launched.
 
-    browser = await pw.chromium.launch(headless=headless, args=CHROME_ARGS)
+    browser = await pw.chromium.launch(headless=headless, args=CHROME_ARGS + (LEAN_CHROME_ARGS if lean else []))
     # Launch a Chromium browser instance.
     # headless=True  → browser runs without a visible UI (faster).
     # headless=False → full visible UI (useful for debugging).
     # CHROME_ARGS adds anti-bot and stability flags.
 
+    return pw, browser
+
+
+async def new_context_page(
+    browser,
+    storage_state: str | None = None,
+    on_response=None,
+    lean: LeanProfile | None = None,
+):
+    """
+    Creates an isolated browser context (own cookies/session) on an already
+    running browser and opens one page in it.
+
+    on_response: optional (async) callback registered on the context's
+    "response" event before any navigation (used by network harvesting).
+
+    lean: optional LeanProfile (see SiteAdapter.lean_profile). Fonts, video
+    streams and trackers are aborted and image bytes are replaced by a 1x1
+    GIF via context.route, while feed/API requests pass untouched.
+
+    Returns:
+        context: Browser context (cookies, localStorage, session)
+        page: Actual browser tab for navigation and scraping
+        blocker: the lean profile's ResourceBlocker (for its counters), or None
+    """
+
+    extra = dict(lean.context_options) if lean else {}
+    # Lean contexts: block service workers (they would bypass routing), reduce motion.
+
     context = await browser.new_context(
+        **extra,
+
         storage_state=storage_state if storage_state else None,
         # Optional: Load saved cookies / localStorage from a JSON file.
         # This is required for login-required sites (Instagram, Pinterest, etc.).
@@ -59,29 +96,127 @@ async def open_page(headless: bool = True, storage_state: str | None = None):
         user_agent=UA,
         # Override default User-Agent to appear as a real Chrome desktop browser.
 
-        viewport={"width": 1366, "height": 900}
-        # Set a desktop viewport.
+        viewport=(lean.viewport if lean and lean.viewport else {"width": 1366, "height": 900})
+        # Set a desktop viewport (a lean profile may use a smaller one).
         # Many websites switch to mobile DOM below ~800px width, which breaks selectors.
     )
 
+    blocker = None
+    if lean is not None:
+        blocker = ResourceBlocker(lean)
+        await blocker.install(context)
+        # Routed on the context before the page exists, so the very first
+        # navigation is already filtered.
+
+    if on_response is not None:
+        context.on("response", on_response)
+        # Hooked on the context (not the page) so every tab's responses are seen,
+        # and before navigation so the first feed request isn't missed.
+
     page = await context.new_page()
     # Open a new tab/page inside the created browser context.
     # All navigation, scrolling, and scraping actions will happen here.
 
+    return context, page, blocker
+
+
+async def connect_browser(endpoint: str):
+    """
+    Attaches to an already running Chromium over CDP (see scraper/daemon.py)
+    instead of launching one. Only the Playwright driver starts here; the
+    browser process, its profile and logged-in cookies are already warm.
+
+    Returns:
+        pw: Playwright instance
+        browser: the remote browser
+        context: its default (persistent, logged-in) context
+    """
+
+    pw = await async_playwright().start()
+    try:
+        browser = await pw.chromium.connect_over_cdp(endpoint)
+        # Attach over the Chrome DevTools Protocol, e.g. "http://127.0.0.1:9301".
+    except Exception:
+        await pw.stop()
+        raise
+
+    context = browser.contexts[0]
+    # A persistent-profile browser exposes its profile as the default context.
+
+    return pw, browser, context
+
+
+async def new_shared_page(
+    context,
+    on_response=None,
+    lean: LeanProfile | None = None,
+):
+    """
+    Opens one page in a shared, long-lived context (daemon profile).
+    Same hooks as new_context_page, but scoped to the page so other crawls
+    in that context are not affected.
+
+    Returns:
+        page, page, blocker: the page owns its resources (closing it is the
+        cleanup), mirroring the (context, page, blocker) of new_context_page
+    """
+
+    page = await context.new_page()
+    # New tab in the warm context: cookies and cache are already there.
+
+    blocker = None
+    if lean is not None:
+        blocker = ResourceBlocker(lean)
+        await blocker.install(page)
+        # Page-level routing: lean rules apply to this crawl only.
+
+    if on_response is not None:
+        page.on("response", on_response)
+        # Registered before navigation so the first feed request isn't missed.
+
+    return page, page, blocker
+
+
+async def disconnect_browser(pw):
+    """
+    Drops a connect_browser connection. Stopping the driver closes the CDP
+    socket; the daemon's Chromium and its contexts keep running.
+    """
+
+    await pw.stop()
+
+
+async def open_page(
+    headless: bool = True,
+    storage_state: str | None = None,
+    on_response=None,
+    lean: LeanProfile | None = None,
+):
+    """
+    Launches Playwright, opens a Chromium browser, creates a browser context,
+    and finally opens a new page. Returns all four objects for later cleanup.
+
+    Returns:
+        pw: Playwright instance
+        browser: Chromium browser object
+        context: Browser context (cookies, localStorage, session)
+        page: Actual browser tab for navigation and scraping
+    """
+
+    pw, browser = await launch_browser(headless=headless, lean=lean is not None)
+    context, page, _ = await new_context_page(
+        browser, storage_state=storage_state, on_response=on_response, lean=lean
+    )
+
     return pw, browser, context, page
     # Return everything so the caller can properly close all resources later.
 
 
-async def close_page(pw, browser, context):
+async def close_browser(pw, browser):
     """
-    Properly closes Playwright resources.
-    This prevents memory leaks, zombie browser processes, and resource locks.
+    Closes the Chromium process and stops the Playwright engine.
     """
 
-    await context.close()
-    # Closes all pages/tabs under this context.
-    # Finalizes cookie/localStorage writes.
-
     await browser.close()
     # Completely closes the Chromium process.
     # If not closed, you may end up with background zombie processes consuming RAM/CPU.
@@ -89,3 +224,16 @@ async def close_page(pw, browser, context):
     await pw.stop()
     # Shuts down the Playwright engine itself.
     # Required to stop internal Node.js processes that Playwright spawns.
+
+
+async def close_page(pw, browser, context):
+    """
+    Properly closes Playwright resources.
+    This prevents memory leaks, zombie browser processes, and resource locks.
+    """
+
+    await context.close()
+    # Closes all pages/tabs under this context.
+    # Finalizes cookie/localStorage writes.
+
+    await close_browser(pw, browser)
@@ -0,0 +1,216 @@
+"""
+Warm browser service: keeps one Chromium per site running with a persistent
+(logged-in) profile and exposes it over CDP, so crawls connect instead of
+launching and loading storage_state every time.
+
+    python -m scraper.daemon --profiles-dir profiles --site pinterest --site instagram \\
+        --storage-state instagram=auth.json --headless
+    python runner.py --url https://www.pinterest.com/... --daemon .browserd.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from scraper.adapters.registry import REGISTRY
+from scraper.browser import CHROME_ARGS, UA
+from scraper.utils.blocking import LEAN_CHROME_ARGS, LeanProfile
+
+log = logging.getLogger(__name__)
+
+# Where a running daemon publishes its endpoints (pass this path as `daemon=`)
+DEFAULT_STATE = ".browserd.json"
+
+# Seeds localStorage from a storage_state "origins" entry on the first visit
+_LOCAL_STORAGE_JS = """
+(origins => {
+    const entry = origins.find(o => o.origin === location.origin);
+    if (!entry) return;
+    for (const { name, value } of entry.localStorage) {
+        if (localStorage.getItem(name) === null) localStorage.setItem(name, value);
+    }
+})(%s);
+"""
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True                             # Someone else's process, but it exists
+    return True
+
+
+def resolve_endpoint(daemon: str, site: str) -> str:
+    """
+    CDP endpoint for `site`. `daemon` is either an endpoint URL
+    (http://host:port, ws://...) or the state file of a running daemon.
+    """
+    if daemon.startswith(("http://", "https://", "ws://", "wss://")):
+        return daemon
+    try:
+        with open(daemon, encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"No browser daemon state at {daemon} (start python -m scraper.daemon)") from None
+    if not _pid_alive(state["pid"]):
+        raise ValueError(f"Browser daemon from {daemon} (pid {state['pid']}) is not running")
+    endpoint = state["sites"].get(site)
+    if endpoint is None:
+        raise ValueError(f"Browser daemon has no profile for {site} (has: {', '.join(state['sites'])})")
+    return endpoint
+
+
+class BrowserDaemon:
+    """
+    One persistent-profile Chromium per site, each with its own CDP port.
+
+    Profiles live in <profiles_dir>/<site>, so a login survives daemon
+    restarts; storage_states (site → storage_state JSON) seed a profile when
+    it is created (cookies, plus localStorage on the first page load). An
+    existing profile keeps its own, newer session unless `reimport` is set.
+    Clients open pages in the profile's context (scraper.browser
+    .connect_browser / new_shared_page) and close only those pages.
+    """
+
+    def __init__(
+        self,
+        profiles_dir: str,
+        sites: List[str],
+        storage_states: Optional[Dict[str, str]] = None,
+        headless: bool = True,
+        lean: bool = False,
+        host: str = "127.0.0.1",
+        base_port: int = 9301,
+        state_path: str = DEFAULT_STATE,
+        reimport: bool = False,
+    ):
+        self.profiles_dir = Path(profiles_dir)
+        self.sites = list(dict.fromkeys(sites))
+        self.storage_states = storage_states or {}
+        self.headless = headless
+        self.lean = lean
+        self.host = host
+        self.base_port = base_port
+        self.state_path = Path(state_path)
+        self.reimport = reimport
+        self.endpoints: Dict[str, str] = {}
+        self._pw = None
+        self._contexts = {}
+        self._stop = asyncio.Event()
+
+    async def _import_storage_state(self, context, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("cookies"):
+            await context.add_cookies(state["cookies"])
+        if state.get("origins"):
+            await context.add_init_script(_LOCAL_STORAGE_JS % json.dumps(state["origins"]))
+
+    async def _launch_site(self, site: str, port: int):
+        lean = LeanProfile() if self.lean else None
+        profile = self.profiles_dir / site
+        new_profile = not profile.exists()
+        context = await self._pw.chromium.launch_persistent_context(
+            str(profile),
+            headless=self.headless,
+            args=CHROME_ARGS + (LEAN_CHROME_ARGS if self.lean else []) + [
+                f"--remote-debugging-port={port}",
+                f"--remote-debugging-address={self.host}",
+            ],
+            user_agent=UA,
+            viewport={"width": 1366, "height": 900},
+            **(dict(lean.context_options) if lean else {}),
+        )
+        if site in self.storage_states and (new_profile or self.reimport):
+            # Re-importing every start would roll rotated cookies back to the old file
+            log.info("[WARM] %s: importing %s", site, self.storage_states[site])
+            await self._import_storage_state(context, self.storage_states[site])
+        return context
+
+    async def start(self) -> Dict[str, str]:
+        """Launches every site profile and publishes the endpoints; returns them."""
+        self._pw = await async_playwright().start()
+        try:
+            for i, site in enumerate(self.sites):
+                port = self.base_port + i
+                self._contexts[site] = await self._launch_site(site, port)
+                self.endpoints[site] = f"http://{self.host}:{port}"
+                log.info("[WARM] %s → %s", site, self.endpoints[site])
+        except BaseException:
+            await self.stop()
+            raise
+
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "sites": self.endpoints}, f)
+        os.replace(tmp, self.state_path)
+        return self.endpoints
+
+    async def serve_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stop.set)
+        await self._stop.wait()
+
+    async def stop(self) -> None:
+        if self.state_path.exists():
+            self.state_path.unlink()
+        for context in self._contexts.values():
+            await context.close()               # Flushes the profile to disk
+        self._contexts.clear()
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+
+
+def parse_args():
+    p = argparse.ArgumentParser(prog="python -m scraper.daemon", description="Warm browser service")
+    p.add_argument("--profiles-dir", default="profiles", help="One persistent Chromium profile per site in here")
+    p.add_argument("--site", action="append", required=True, choices=REGISTRY.names(),
+                   help="Site (adapter name) to keep warm, repeatable")
+    p.add_argument("--storage-state", action="append", default=[], metavar="SITE=PATH",
+                   help="Seed a new site profile with a storage_state JSON (repeatable)")
+    p.add_argument("--reimport-state", action="store_true",
+                   help="Import --storage-state files into existing profiles too")
+    p.add_argument("--headless", action="store_true")
+    p.add_argument("--lean", action="store_true", help="Lean Chromium flags (routing is set per crawl)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--base-port", type=int, default=9301, help="CDP port of the first site; +1 per site")
+    p.add_argument("--state", default=DEFAULT_STATE, help="Endpoint file read by crawl_board(daemon=...)")
+    args = p.parse_args()
+    args.storage_states = {}
+    for item in args.storage_state:
+        site, sep, path = item.partition("=")
+        if not sep or site not in args.site:
+            p.error(f"--storage-state expects SITE=PATH for a --site, got {item!r}")
+        args.storage_states[site] = path
+    return args
+
+
+async def main():
+    args = parse_args()
+    logging.basicConfig(level="INFO", format="%(message)s")
+    daemon = BrowserDaemon(
+        args.profiles_dir, args.site, storage_states=args.storage_states, headless=args.headless,
+        lean=args.lean, host=args.host, base_port=args.base_port, state_path=args.state,
+        reimport=args.reimport_state,
+    )
+    await daemon.start()
+    print(f"[OK] Browser daemon ready → {args.state} (Ctrl-C to stop)")
+    try:
+        await daemon.serve_forever()
+    finally:
+        await daemon.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
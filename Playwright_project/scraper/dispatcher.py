@@ -1,15 +1,20 @@
-from urllib.parse import urlparse
-# Used to extract the domain (hostname) from a URL.
-# Example: urlparse("https://www.pinterest.com/x").netloc → "www.pinterest.com"
+import asyncio
+# Used by crawl_many to run several adapters concurrently on one event loop.
 
-from typing import List
-# Provides type hints like List[Pin] for clarity and IDE support.
+import logging
+# Progress and failures are reported through the "scraper.dispatcher" logger.
+
+from collections import defaultdict
+# Lazily creates one concurrency limit per site in crawl_many.
 
+from dataclasses import replace
+# Copies CollectStats, so a board's own counters can be told apart.
 
-from scraper.browser import open_page, close_page
-# Helper functions:
-# open_page → launches Playwright + browser + context + page
-# close_page → properly closes all resources
+import sqlite3
+# Type of a dedupe database connection shared by concurrent crawls.
+
+from typing import Callable, Dict, List
+# Provides type hints like List[Pin] for clarity and IDE support.
 
 
 from scraper.adapters.base import Pin, SiteAdapter
@@ -17,46 +22,220 @@ from scraper.adapters.base import Pin, SiteAdapter
 # SiteAdapter → base class for all site-specific adapters
 
 
-from scraper.adapters.pinterest import PinterestAdapter
-from scraper.adapters.instagram import InstagramAdapter
-from scraper.adapters.artstation import ArtStationAdapter
-# Import concrete adapter implementations for each supported website.
+from scraper.utils.dedupe import SqliteDedupeIndex, connect_dedupe_db
+# Persistent key → id index, lets a re-crawl skip pins harvested by earlier runs
+
+
+from scraper.utils.checkpoint import Checkpointer
+# Periodic collector state snapshots for --resume
+
+
+from scraper.utils.netcapture import FeedCapture
+# Collects feed JSON responses for the network harvesting mode
+
+
+from scraper.utils.metrics import Metrics
+# Counters/histograms with pluggable sinks; crawl phases are timed into it
 
 
-# List of all registered adapters.
-# Each adapter declares which domains it supports, so we can match URLs dynamically.
-ADAPTERS: list[SiteAdapter] = [
-    PinterestAdapter(),
-    InstagramAdapter(),
-    ArtStationAdapter(),
-]
+from scraper.utils.pinbatch import PinBatch
+# Columnar pin container for large crawls (compact=True)
+
+
+from scraper.utils.stream import CollectStats
+# Per-board collector counters; the session pool judges soft blocks from them
+
+
+from scraper.sessions import SessionPool
+# Rotating storage_state files with soft-block detection and cooldowns
+
+
+from scraper.adapters.registry import REGISTRY
+# Adapter registry: suffix-matched domain index, cached per host; adapter
+# modules (and plugins from the "media_scraper.adapters" entry point group)
+# are imported on first use.
+#
+# The Playwright driver and browser code (scraper.browser, scraper.daemon) is
+# imported inside the crawl functions, so routing URLs or enqueueing jobs
+# never starts it. The package itself must be installed: scraper.utils.stream
+# (imported above) loads its error classes.
+
+log = logging.getLogger(__name__)
 
 
 def pick_adapter(url: str) -> SiteAdapter:
     """
     Selects the appropriate adapter for the given URL based on its domain.
     Example:
-        URL containing "pinterest.com" → PinterestAdapter
+        www.pinterest.com, de.pinterest.com → PinterestAdapter
+        notpinterest.com, pinterest.com.evil → ValueError
+    """
+    return REGISTRY.for_url(url)
+    # The host (lowercased, port stripped) or one of its parent domains must
+    # be registered; repeated hosts are answered from the registry's cache.
+
+
+async def _crawl_in_context(
+    browser,
+    url: str,
+    adapter: SiteAdapter,
+    max_items: int,
+    storage_state: str | None,
+    index,
+    mode: str,
+    on_item=None,
+    lean: bool = False,
+    metrics: Metrics | None = None,
+    compact: bool = False,
+    shared_context=None,
+    sessions: SessionPool | None = None,
+    **collect_opts
+) -> List[Pin]:
+    """
+    Runs one adapter crawl inside a fresh context on an already running browser.
+    The context (cookies, tabs) is closed afterwards; the browser stays up.
+
+    shared_context: a long-lived context (browser daemon profile) to open the
+    page in instead; then only the page is closed afterwards.
+
+    sessions: the context logs in with a storage_state leased from this pool
+    (falls back to `storage_state` if the pool has none for the site). Before
+    the context closes the crawl is checked for soft blocks and the session
+    is returned with the verdict, which may put it on cooldown.
+
+    Phases (context, navigate, collect, close) are timed into
+    crawl_phase_seconds, labelled with the adapter name.
     """
-    host = urlparse(url).netloc.lower()
-    # Extract the hostname from the URL and normalize to lowercase.
-    # Example: "https://www.Pinterest.com" → "www.pinterest.com"
+    from scraper.browser import new_context_page, new_shared_page
+    # Deferred Playwright import (see the registry note at the top)
+
+    metrics = (metrics if metrics is not None else Metrics()).child(adapter=adapter.name)
+    # Everything recorded for this board carries adapter=<name>.
+
+    if compact:
+        collect_opts["container"] = PinBatch()
+        # Pins are stored column-wise instead of one object per pin.
+
+    session = None
+    if sessions is not None:
+        session = await sessions.acquire(adapter.name)
+        if session is not None:
+            storage_state = session.path
+            metrics.inc("session_uses_total")
+        # Counters of this board only, even if the caller shares one CollectStats
+        stats = collect_opts.setdefault("stats", CollectStats())
+        stats_before = replace(stats)
+        stats.stop_reason = ""
+
+    # Network mode: capture feed responses from the very first request.
+    capture = None
+    if mode == "network":
+        if not adapter.FEED_RESOURCES:
+            raise ValueError(f"{adapter.name} adapter has no network harvesting mode")
+        capture = FeedCapture(adapter.FEED_RESOURCES)
+
+    try:
+        with metrics.timer("crawl_phase_seconds", phase="context"):
+            if shared_context is not None:
+                context, page, blocker = await new_shared_page(
+                    shared_context,
+                    on_response=capture.on_response if capture else None,
+                    lean=adapter.lean_profile() if lean else None
+                )
+                # `context` is the page itself here: closing it leaves the warm profile open.
+            else:
+                context, page, blocker = await new_context_page(
+                    browser,
+                    storage_state=storage_state,
+                    on_response=capture.on_response if capture else None,
+                    lean=adapter.lean_profile() if lean else None
+                    # Lean: the adapter's routing rules drop fonts, video, trackers and image bytes.
+                )
+    except BaseException:
+        if session is not None:
+            sessions.release(session)       # No verdict: the site was never reached
+        raise
+
+    governor = collect_opts.get("governor")
+    if governor is not None:
+        page.on("response", governor.on_response)
+        # 429/503 answers seen by the browser slow the whole domain down (shared governor).
+
+    finished = False                    # Navigated and collected without raising
+    try:
+        with metrics.timer("crawl_phase_seconds", phase="navigate"):
+            # Allow the adapter to run any pre-navigation setup (e.g., closing modals).
+            await adapter.pre_open(page)
+
+            # Navigate to the target URL and handle cookies/popups.
+            await adapter.navigate_board(page, url)
+
+        with metrics.timer("crawl_phase_seconds", phase="collect"):
+            if capture is not None:
+                # Pins come from feed payloads; scrolling only requests the next page
+                pins = await adapter.network_scroll_and_collect(
+                    page, capture, max_items=max_items, index=index, on_item=on_item,
+                    metrics=metrics, **collect_opts
+                )
+            else:
+                pins = await adapter.stream_scroll_and_collect(
+                    page, max_items=max_items, index=index, on_item=on_item,
+                    metrics=metrics, **collect_opts
+                )#Scroll to down and gather pins simultaneously
+        finished = True
+        return pins
+
+    finally:
+        if session is not None:
+            reason = None                       # A crawl that raised says nothing about the session
+            if finished:
+                board_stats = CollectStats(
+                    nodes_read=stats.nodes_read - stats_before.nodes_read,
+                    nodes_skipped=stats.nodes_skipped - stats_before.nodes_skipped,
+                    new=stats.new - stats_before.new,
+                    known=stats.known - stats_before.known,
+                    stop_reason=stats.stop_reason,
+                )
+                reason = await sessions.check(page, adapter, board_stats)
+            sessions.release(session, reason)
+            if reason is not None:
+                metrics.inc("session_soft_blocks_total", reason=reason)
+        if blocker is not None:
+            log.info("[LEAN] %s: %s", url, blocker.counts)
+            for action, n in blocker.counts.items():
+                metrics.inc("lean_requests_total", n, action=action)
+        with metrics.timer("crawl_phase_seconds", phase="close"):
+            await context.close()
 
-    for a in ADAPTERS:
-        # Each adapter has a `domains` list, such as ["pinterest.com"].
-        # We check if any declared domain fragment appears inside the hostname.
-        if any(d in host for d in a.domains):
-            return a
 
-    # If no adapter matches, raise a clear error.
-    raise ValueError(f"No adapter registered for host: {host}")
+def _check_mode(mode: str) -> None:
+    if mode not in ("dom", "network"):
+        raise ValueError(f"Unknown crawl mode: {mode}")
+
+
+def _check_sessions(daemon: str | None, sessions: SessionPool | None) -> None:
+    if daemon and sessions is not None:
+        raise ValueError("a session pool cannot be used with a browser daemon (its profiles are the sessions)")
 
 
 async def crawl_board(
     url: str,
     max_items: int = 1000,
     headless: bool = True,
-    storage_state: str | None = None
+    storage_state: str | None = None,
+    dedupe_db: str | None = None,
+    mode: str = "dom",
+    on_item=None,
+    checkpoint: str | None = None,
+    resume: bool = False,
+    lean: bool = False,
+    metrics: Metrics | None = None,
+    compact: bool = False,
+    daemon: str | None = None,
+    sessions: SessionPool | None = None,
+    flush_output: Callable[[], None] | None = None,
+    dedupe_conn: sqlite3.Connection | None = None,
+    **collect_opts
 ) -> List[Pin]:
     """
     High-level crawl function.
@@ -70,28 +249,223 @@ async def crawl_board(
             - extract all pins
         4. Close the browser (always, even on error).
         5. Return a unified list of Pin objects.
+
+    If `dedupe_db` is given, seen keys are persisted in that SQLite file
+    (scoped by URL) and only pins not harvested by earlier runs are returned.
+    Concurrent crawls on one database pass a shared `dedupe_conn` (see
+    connect_dedupe_db) instead; separate connections would lock each other.
+
+    mode:
+        "dom"     → read cards from the rendered grid (all adapters)
+        "network" → build pins from intercepted feed JSON; scrolling only
+                    triggers pagination (adapters declaring FEED_RESOURCES)
+
+    on_item: optional async callback awaited for every new pin while the
+    crawl is still scrolling (see scraper/pipeline.py).
+
+    collect_opts are passed to the adapter's collector (e.g. keep_items=False
+    when pins are streamed to a sink and need not stay in memory).
+
+    checkpoint: path of a state file saved every few rounds and on failure.
+    resume=True continues from it (seen keys restored, fast scroll to the
+    saved depth); otherwise an old checkpoint there is discarded. DOM mode only.
+    flush_output makes the pins handed to on_item so far durable (e.g. a
+    JsonlSink flush with fsync); it runs before every commit of seen keys
+    (dedupe_db, checkpoint), so a crash can't make a later run skip pins
+    that never reached the output.
+    Resuming a checkpoint of a crawl that finished returns no pins at once.
+
+    lean=True launches with lean Chromium flags and routes every request
+    through the adapter's LeanProfile (see scraper/utils/blocking.py).
+
+    metrics: optional Metrics (scraper/utils/metrics.py). Phase timings
+    (launch, context, navigate, collect, close, shutdown) and per-round
+    collector counters are recorded into it; the caller owns its sinks
+    and flushes/closes it.
+
+    compact=True returns a PinBatch (columnar, iterable like the list)
+    instead of a list of Pin objects; use it for very large crawls.
+
+    daemon: state file of a running browser daemon (scraper/daemon.py) or a
+    CDP endpoint URL. The crawl then opens a page in the site's warm,
+    logged-in profile instead of launching Chromium (storage_state and
+    headless are the daemon's); the "launch" phase becomes a connect.
+
+    sessions: a SessionPool (scraper/sessions.py) to log in with one of many
+    storage_state files instead of `storage_state`; soft blocks cool the
+    used session down. Not combinable with `daemon` (one profile per site).
     """
 
+    from scraper.browser import launch_browser, close_browser, connect_browser, disconnect_browser
+    from scraper.daemon import resolve_endpoint
+    # Deferred Playwright import; resolve_endpoint finds a site profile in a running browser daemon
+
     # Choose the correct adapter: PinterestAdapter, InstagramAdapter, etc.
     adapter = pick_adapter(url)
+    _check_mode(mode)
+    _check_sessions(daemon, sessions)
 
-    # Launch Playwright and open a browser context + page.
-    pw, browser, context, page = await open_page(
-        headless=headless,
-        storage_state=storage_state
-    )
+    ckpt = resume_from = None
+    if checkpoint:
+        if mode != "dom":
+            raise ValueError("checkpoint/resume is only supported in dom mode")
+        ckpt = Checkpointer(checkpoint, url, flush_output=flush_output)
+        resume_from = ckpt.load_for_resume() if resume else None
+        if resume_from is None:
+            ckpt.reset()
+        elif resume_from.finished:
+            log.info("[RESUME] %s already finished (%d items); nothing to do", url, resume_from.collected)
+            return PinBatch() if compact else []
 
-    try:
-        # Allow the adapter to run any pre-navigation setup (e.g., closing modals).
-        await adapter.pre_open(page)
+    # Persistent dedupe index (None → collector uses an in-memory one)
+    index = SqliteDedupeIndex(
+        dedupe_db, namespace=url, db=dedupe_conn, before_commit=flush_output
+    ) if dedupe_db or dedupe_conn is not None else None
 
-        # Navigate to the target URL and handle cookies/popups.
-        await adapter.navigate_board(page, url)
+    if ckpt is not None:
+        if index is None:
+            index = ckpt.open_index()       # Seen keys survive the crash next to the checkpoint
+        else:
+            ckpt.attach_index(index)        # Commit the dedupe DB on checkpoints only
+        collect_opts.update(checkpoint=ckpt, resume_from=resume_from)
 
-        pins = await adapter.stream_scroll_and_collect(page, max_items=max_items)#Scroll to down and gather pins simultaneously
-        return pins
+    metrics = metrics if metrics is not None else Metrics()
+
+    shared_context = None
+    try:
+        with metrics.timer("crawl_phase_seconds", phase="launch"):
+            if daemon:
+                # Warm daemon: only the driver starts, Chromium and the login are already up.
+                pw, browser, shared_context = await connect_browser(resolve_endpoint(daemon, adapter.name))
+            else:
+                # Launch Playwright and Chromium.
+                pw, browser = await launch_browser(headless=headless, lean=lean)
+    except BaseException:
+        if index is not None:
+            index.close()
+        raise
+
+    try:
+        return await _crawl_in_context(
+            browser, url, adapter, max_items, storage_state, index, mode, on_item, lean, metrics,
+            compact, shared_context=shared_context, sessions=sessions, **collect_opts
+        )
 
     finally:
         # Ensure resources are always released,
         # even if an exception occurred above.
-        await close_page(pw, browser, context)
+        with metrics.timer("crawl_phase_seconds", phase="shutdown"):
+            if daemon:
+                await disconnect_browser(pw)
+            else:
+                await close_browser(pw, browser)
+        if index is not None:
+            index.close()
+
+
+async def crawl_many(
+    urls: List[str],
+    max_items: int = 1000,
+    headless: bool = True,
+    storage_state: str | None = None,
+    dedupe_db: str | None = None,
+    mode: str = "dom",
+    concurrency: int = 4,
+    per_domain: int = 2,
+    on_item=None,
+    lean: bool = False,
+    metrics: Metrics | None = None,
+    compact: bool = False,
+    daemon: str | None = None,
+    sessions: SessionPool | None = None,
+    flush_output: Callable[[], None] | None = None,
+    dedupe_conn: sqlite3.Connection | None = None,
+    **collect_opts
+) -> Dict[str, List[Pin]]:
+    """
+    Crawls many URLs concurrently on ONE shared browser.
+
+    Each URL gets its own context (isolated cookies/tabs) from a bounded pool:
+        concurrency → max contexts open at the same time
+        per_domain  → max contexts per site (adapter), to stay polite
+
+    on_item, lean, metrics, compact and collect_opts are shared by all boards (see crawl_board).
+
+    daemon: pages open in the warm daemon profile of each site instead
+    (one CDP connection per site, see crawl_board).
+
+    sessions: every context leases its own session from the pool, so
+    concurrent boards of one site spread over different logins.
+
+    flush_output: makes the pins handed to on_item durable; runs before
+    every commit of the shared dedupe DB (see crawl_board). dedupe_conn: an
+    open dedupe DB to use instead of `dedupe_db`, left open for the caller.
+
+    Returns {url: pins}. A failing URL is reported and maps to an empty list,
+    it never aborts the other crawls.
+    """
+
+    from scraper.browser import launch_browser, close_browser, connect_browser, disconnect_browser
+    from scraper.daemon import resolve_endpoint
+    # Deferred Playwright import
+
+    _check_mode(mode)
+    _check_sessions(daemon, sessions)
+    # Resolve adapters up front so a bad URL fails before the browser starts.
+    jobs = [(url, pick_adapter(url)) for url in dict.fromkeys(urls)]
+
+    pool = asyncio.Semaphore(concurrency)
+    site_limits: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_domain))
+    results: Dict[str, List[Pin]] = {}
+
+    metrics = metrics if metrics is not None else Metrics()
+    # Daemon endpoints are resolved up front too (missing profile → fail early).
+    endpoints = {adapter.name: resolve_endpoint(daemon, adapter.name) for _, adapter in jobs} if daemon else {}
+    connections: Dict[str, tuple] = {}
+    with metrics.timer("crawl_phase_seconds", phase="launch"):
+        if daemon:
+            try:
+                for site, endpoint in endpoints.items():
+                    connections[site] = await connect_browser(endpoint)
+            except BaseException:
+                for pw, _, _ in connections.values():
+                    await disconnect_browser(pw)
+                raise
+            pw = browser = None
+        else:
+            pw, browser = await launch_browser(headless=headless, lean=lean)
+    # One connection for all boards; every board keeps its own namespace.
+    db = dedupe_conn if dedupe_conn is not None else connect_dedupe_db(dedupe_db) if dedupe_db else None
+
+    async def run(url: str, adapter: SiteAdapter) -> None:
+        # Site limit first, so a busy site doesn't hold global slots while waiting.
+        async with site_limits[adapter.name], pool:
+            index = SqliteDedupeIndex(None, namespace=url, db=db, before_commit=flush_output) if db else None
+            try:
+                results[url] = await _crawl_in_context(
+                    browser, url, adapter, max_items, storage_state, index, mode, on_item, lean, metrics,
+                    compact, shared_context=connections[adapter.name][2] if daemon else None,
+                    sessions=sessions, **collect_opts
+                )
+                log.info("[OK] %s: %d pins", url, len(results[url]))
+            except Exception as e:
+                results[url] = []
+                metrics.inc("crawl_failures_total", adapter=adapter.name)
+                log.error("[FAIL] %s: %r", url, e)
+            finally:
+                if index is not None:
+                    index.close()
+
+    try:
+        await asyncio.gather(*(run(url, adapter) for url, adapter in jobs))
+        return results
+
+    finally:
+        with metrics.timer("crawl_phase_seconds", phase="shutdown"):
+            if daemon:
+                for site_pw, _, _ in connections.values():
+                    await disconnect_browser(site_pw)
+            else:
+                await close_browser(pw, browser)
+        if db is not None and dedupe_conn is None:
+            db.close()
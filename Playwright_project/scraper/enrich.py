@@ -0,0 +1,321 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from scraper.adapters.base import Detail, Pin
+from scraper.adapters.registry import REGISTRY
+from scraper.browser import UA
+from scraper.utils.governor import DomainGovernor
+from scraper.utils.metrics import Metrics
+from scraper.utils.pinbatch import PinBatch
+
+log = logging.getLogger(__name__)
+
+# A crawl coroutine taking an on_item callback (see scraper/pipeline.py)
+CrawlFn = Callable[[Optional[Callable[[Pin], Awaitable[Any]]]], Awaitable[Any]]
+
+# Browser fallback: Open Graph / Twitter card tags every detail page carries
+_READ_META_JS = """
+() => {
+    const metas = (prop) => Array.from(document.querySelectorAll(
+        `meta[property="${prop}"], meta[name="${prop}"]`)).map((m) => m.content).filter(Boolean);
+    return {
+        title: (metas("og:title")[0] || metas("twitter:title")[0] || document.title || "").trim(),
+        images: metas("og:image").concat(metas("og:image:secure_url"), metas("twitter:image")),
+        video: metas("og:video:secure_url")[0] || metas("og:video")[0] || null,
+    };
+}
+"""
+
+_DONE = object()
+
+
+def _same_page(landed: str, requested: str) -> bool:
+    # Path only: sites may move a pin to a country domain (pinterest.com → pinterest.de)
+    return urlparse(landed).path.rstrip("/") == urlparse(requested).path.rstrip("/")
+
+
+class DetailCache:
+    """
+    page_url → Detail, in SQLite. Entries older than `ttl_s` (None: never)
+    are fetched again. Failed fetches are not cached.
+    """
+
+    def __init__(self, path: str, ttl_s: Optional[float] = None):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_s = ttl_s
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS details ("
+            " page_url TEXT PRIMARY KEY, detail TEXT NOT NULL, fetched_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    def get(self, page_url: str) -> Optional[Detail]:
+        row = self._db.execute("SELECT detail, fetched_at FROM details WHERE page_url = ?", (page_url,)).fetchone()
+        if row is None or (self.ttl_s is not None and time.time() - row[1] > self.ttl_s):
+            return None
+        return Detail(**json.loads(row[0]))
+
+    def put(self, page_url: str, detail: Detail) -> None:
+        self._db.execute("INSERT OR REPLACE INTO details (page_url, detail, fetched_at) VALUES (?, ?, ?)",
+                         (page_url, json.dumps(asdict(detail), ensure_ascii=False), time.time()))
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def apply_detail(pin: Pin, detail: Detail) -> Pin:
+    """
+    Fills the pin from its detail page; grid-level values stay where the
+    detail has none. Only an API detail replaces the grid image URL: a page's
+    og:image is a downscaled preview, no better than what the grid had.
+    """
+    if detail.title and not pin.title:
+        pin.title = detail.title
+    if detail.image_url and (detail.from_api or not pin.image_url):
+        if pin.image_url != detail.image_url and not pin.thumb_url:
+            pin.thumb_url = pin.image_url
+        pin.image_url = detail.image_url
+    if detail.video_url:
+        pin.video_url = detail.video_url
+        pin.media_type = "video"
+    if detail.carousel:
+        pin.carousel = list(detail.carousel)
+    return pin
+
+
+class Enricher:
+    """
+    Opens Pin.page_url for each pin and fills title, full-resolution
+    image/video URLs and carousel items (see apply_detail).
+
+    Per pin, cheapest source first:
+        cache   → DetailCache hit (`cache_path`), no request at all
+        http    → the adapter's JSON endpoint (SiteAdapter.detail_api_url,
+                  e.g. ArtStation projects/<hash>.json, Pinterest PinResource)
+                  over one pooled aiohttp session, `concurrency` at once
+        browser → Open Graph tags read in one of `tabs` pooled tabs of a
+                  lean Chromium, launched only when first needed
+                  (`storage_state` for sites that need a login)
+
+    HTTP requests go through `governor` when given. Outcomes are counted in
+    `counts` and as enrich_total{result}.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, concurrency: int = 8, tabs: int = 2,
+                 headless: bool = True, storage_state: Optional[str] = None, browser: bool = True,
+                 timeout_s: float = 20.0, ttl_s: Optional[float] = None,
+                 governor: Optional[DomainGovernor] = None, metrics: Optional[Metrics] = None):
+        self.cache = DetailCache(cache_path, ttl_s) if cache_path else None
+        self.concurrency = concurrency
+        self.tabs = tabs
+        self.headless = headless
+        self.storage_state = storage_state
+        self.use_browser = browser
+        self.timeout_s = timeout_s
+        self.governor = governor
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.counts = {"cached": 0, "http": 0, "browser": 0, "failed": 0, "skipped": 0}
+        self.in_flight = 0                      # Pins inside enriched(), not yet passed to its on_item
+        self._http_slots = asyncio.Semaphore(concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pages: Optional[asyncio.Queue] = None
+        self._browser_lock = asyncio.Lock()
+        self._pw = self._browser = self._context = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout_s),
+            headers={"User-Agent": UA, "Accept": "application/json", "X-Requested-With": "XMLHttpRequest"},
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        if self._browser is not None:
+            from scraper.browser import close_page
+            await close_page(self._pw, self._browser, self._context)
+        if self.cache is not None:
+            self.cache.close()
+
+    def _count(self, result: str) -> None:
+        self.counts[result] += 1
+        self.metrics.inc("enrich_total", result=result)
+
+    async def enrich(self, pin: Pin) -> Pin:
+        """Returns the same pin, filled in where a detail page was found."""
+        if not pin.page_url or not pin.page_url.startswith("http"):
+            self._count("skipped")
+            return pin
+        if self.cache is not None:
+            detail = self.cache.get(pin.page_url)
+            if detail is not None:
+                self._count("cached")
+                return apply_detail(pin, detail)
+
+        adapter = REGISTRY.get(pin.source)
+        detail, result = None, "failed"
+        api_url = adapter.detail_api_url(pin.page_url)
+        if api_url:
+            detail = await self._fetch_http(adapter, api_url)
+            result = "http"
+        if detail is None and self.use_browser:
+            detail = await self._fetch_browser(pin.page_url)
+            result = "browser"
+        if detail is None:
+            self._count("failed")
+            return pin
+        self._count(result)
+        if self.cache is not None:
+            self.cache.put(pin.page_url, detail)
+        return apply_detail(pin, detail)
+
+    async def _fetch_http(self, adapter, api_url: str) -> Optional[Detail]:
+        try:
+            async with self._http_slots:
+                if self.governor is not None:
+                    async with self.governor.slot(api_url):
+                        payload = await self._get_json(api_url)
+                else:
+                    payload = await self._get_json(api_url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            log.debug("[ENRICH] %s: %s", api_url, e)
+            return None
+        detail = adapter._detail_from_json(payload)
+        if detail is not None:
+            detail.from_api = True
+        return detail
+
+    async def _get_json(self, url: str) -> Any:
+        async with self._session.get(url) as resp:
+            if resp.status in (429, 503) and self.governor is not None:
+                self.governor.penalize(url, str(resp.status))
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def _open_pages(self) -> asyncio.Queue:
+        # Deferred: crawls that never fall back to a tab don't launch Chromium
+        async with self._browser_lock:
+            if self._pages is None:
+                from scraper.browser import launch_browser, new_context_page
+                from scraper.utils.blocking import LeanProfile
+                self._pw, self._browser = await launch_browser(headless=self.headless, lean=True)
+                self._context, first, _ = await new_context_page(
+                    self._browser, storage_state=self.storage_state, lean=LeanProfile()
+                )
+                pages: asyncio.Queue = asyncio.Queue()
+                pages.put_nowait(first)
+                for _ in range(self.tabs - 1):
+                    pages.put_nowait(await self._context.new_page())
+                self._pages = pages
+        return self._pages
+
+    async def _fetch_browser(self, page_url: str) -> Optional[Detail]:
+        pages = await self._open_pages()
+        page = await pages.get()
+        try:
+            await page.goto(page_url, wait_until="domcontentloaded", timeout=self.timeout_s * 1000)
+            if not _same_page(page.url, page_url):
+                # Redirected (login wall, removed pin): its tags describe the site, not the pin
+                log.debug("[ENRICH] %s: redirected to %s", page_url, page.url)
+                return None
+            meta = await page.evaluate(_READ_META_JS)
+        except Exception as e:
+            log.debug("[ENRICH] %s: %s", page_url, e)
+            return None
+        finally:
+            pages.put_nowait(page)
+        images = list(dict.fromkeys(meta["images"]))
+        if not (meta["title"] or images or meta["video"]):
+            return None
+        return Detail(
+            title=meta["title"] or None,
+            image_url=images[0] if images else None,
+            video_url=meta["video"],
+            carousel=images if len(images) > 1 else None,
+        )
+
+
+def enriched(crawl: CrawlFn, enricher: Enricher, workers: Optional[int] = None,
+             collect: bool = False) -> CrawlFn:
+    """
+    Wraps a crawl so every pin passes through `enricher` (by `workers`
+    concurrent tasks, default enricher.concurrency) before reaching the
+    on_item callback; the crawl keeps scrolling meanwhile, a bounded queue
+    slows it down if enrichment lags. Pins reach on_item in completion order.
+
+    collect=True makes the wrapped crawl return the enriched pins (a
+    PinBatch in ID order) instead of the inner result, whose containers may
+    hold copies taken before enrichment (e.g. PinBatch rows).
+
+    The first on_item error cancels the crawl and is raised; pins still in
+    the queue are dropped. enricher.in_flight counts pins handed over and
+    not yet passed on (a dedupe index must not commit their keys, see
+    SqliteDedupeIndex.before_commit); dropped pins stay counted.
+
+    The enricher (HTTP session, cache, browser tabs) is opened and closed
+    around each run.
+    """
+    workers = workers or enricher.concurrency
+
+    async def run(on_item=None):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 4)
+        done: List[Pin] = []
+        errors: List[BaseException] = []
+        enricher.in_flight = 0
+
+        async def hand_over(pin: Pin) -> None:
+            enricher.in_flight += 1
+            await queue.put(pin)
+
+        async def worker():
+            while (pin := await queue.get()) is not _DONE:
+                if errors:
+                    continue                    # Crawl is being cancelled: drain without output
+                try:
+                    pin = await enricher.enrich(pin)
+                except Exception as e:
+                    log.warning("[ENRICH] %s failed: %s", pin.page_url, e)
+                if collect:
+                    done.append(pin)
+                if on_item is not None:
+                    try:
+                        await on_item(pin)
+                    except Exception as e:
+                        errors.append(e)
+                        crawl_task.cancel()     # Stop scrolling: nothing more can reach the output
+                        continue
+                enricher.in_flight -= 1
+
+        async with enricher:
+            tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+            crawl_task = asyncio.create_task(crawl(hand_over))
+            try:
+                result = await crawl_task
+            except asyncio.CancelledError:
+                if not errors:
+                    raise
+            finally:
+                # Pins already handed over are still enriched, also when the crawl failed
+                crawl_task.cancel()
+                for _ in tasks:
+                    await queue.put(_DONE)
+                await asyncio.gather(*tasks)
+        if errors:
+            raise errors[0]
+        if collect:
+            return PinBatch(sorted(done, key=lambda p: p.id))
+        return result
+
+    return run
@@ -0,0 +1,153 @@
+"""
+Crawl job queue (SQLite broker; every node points at the same --db).
+
+    python -m scraper.jobs enqueue --db jobs.db --urls-file boards.txt --max-items 2000 --opt step_ratio=0.9
+    python -m scraper.jobs work --db jobs.db --out-dir harvest/ --headless --concurrency 2
+    python -m scraper.jobs status --db jobs.db
+    python -m scraper.jobs export --db jobs.db --out-dir harvest/ --out pins.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from scraper.adapters.registry import REGISTRY
+from scraper.jobs.broker import STATUSES, SqliteBroker
+from scraper.jobs.worker import JobWorker, iter_job_pins
+from scraper.sessions import SessionPool
+from scraper.utils.metrics import Metrics, sink_from_spec
+from scraper.utils.sink import JsonlSink
+
+
+def _opt_value(text: str):
+    # --opt values are JSON when they parse (numbers, booleans), plain strings otherwise
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_args():
+    p = argparse.ArgumentParser(prog="python -m scraper.jobs", description="Distributed crawl job queue")
+    p.add_argument("--db", required=True, help="Broker database shared by producers and workers")
+    p.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    enq = sub.add_parser("enqueue", help="Add board URLs as jobs")
+    src = enq.add_mutually_exclusive_group(required=True)
+    src.add_argument("--url", action="append", help="Board URL (repeatable)")
+    src.add_argument("--urls-file", type=str, help="One URL per line (# comments allowed)")
+    enq.add_argument("--max-items", type=int, default=None)
+    enq.add_argument("--storage-state", type=str, default=None)
+    enq.add_argument("--mode", choices=["dom", "network"], default=None)
+    enq.add_argument("--opt", action="append", default=[], metavar="KEY=VALUE",
+                     help="Any other crawl option, e.g. step_ratio=0.9, pacing=adaptive (repeatable)")
+    enq.add_argument("--max-attempts", type=int, default=3)
+    enq.add_argument("--priority", type=int, default=0, help="Higher runs first")
+
+    work = sub.add_parser("work", help="Lease and crawl jobs until stopped")
+    work.add_argument("--out-dir", required=True, help="Per-attempt JSONL outputs and checkpoints")
+    work.add_argument("--worker-id", type=str, default=None)
+    work.add_argument("--concurrency", type=int, default=1, help="Jobs crawled at once (one browser each)")
+    work.add_argument("--lease-s", type=float, default=120.0)
+    work.add_argument("--heartbeat-s", type=float, default=20.0)
+    work.add_argument("--retry-delay-s", type=float, default=30.0, help="Backoff per failed attempt")
+    work.add_argument("--dedupe-db", type=str, default=None,
+                      help="Seen-key DB shared by all jobs (default: one per job in --out-dir)")
+    work.add_argument("--max-jobs", type=int, default=None)
+    work.add_argument("--exit-when-idle", action="store_true", help="Stop once nothing is queued or leased")
+    work.add_argument("--headless", action="store_true")
+    work.add_argument("--lean", action="store_true")
+    work.add_argument("--daemon", type=str, default=None, metavar="STATE|URL",
+                      help="Crawl in a warm browser daemon instead of launching Chromium per job")
+    work.add_argument("--sessions", type=str, default=None, metavar="DIR",
+                      help="Rotate storage_state files DIR/<site>/*.json over jobs (see runner.py --sessions)")
+    work.add_argument("--metrics", action="append", default=[], metavar="SINK")
+
+    sub.add_parser("status", help="Job counts, failed jobs")
+
+    exp = sub.add_parser("export", help="Merge the outputs of finished jobs into one JSONL file")
+    exp.add_argument("--out-dir", required=True)
+    exp.add_argument("--out", required=True)
+    args = p.parse_args()
+
+    if args.cmd == "enqueue":
+        options = {}
+        for item in args.opt:
+            key, sep, value = item.partition("=")
+            if not sep:
+                p.error(f"--opt expects KEY=VALUE, got {item!r}")
+            options[key.replace("-", "_")] = _opt_value(value)
+        for key in ("max_items", "storage_state", "mode"):
+            if getattr(args, key) is not None:
+                options[key] = getattr(args, key)
+        args.options = options
+    if args.cmd == "work":
+        if args.sessions and args.daemon:
+            p.error("--sessions cannot be combined with --daemon")
+        try:
+            args.metric_sinks = [sink_from_spec(spec) for spec in args.metrics]
+        except ValueError as e:
+            p.error(str(e))
+    return args
+
+
+def _read_urls(args):
+    if args.url:
+        return args.url
+    with open(args.urls_file, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    broker = SqliteBroker(args.db)
+    try:
+        if args.cmd == "enqueue":
+            urls = _read_urls(args)
+            for url in urls:
+                REGISTRY.name_for_url(url)      # Unsupported hosts fail here, not on a worker
+            ids = broker.enqueue_many(urls, args.options, args.max_attempts, args.priority)
+            print(f"[OK] Enqueued {len(ids)} job(s) → {args.db}")
+
+        elif args.cmd == "work":
+            metrics = Metrics(args.metric_sinks) if args.metric_sinks else None
+            sessions = SessionPool.from_dir(
+                args.sessions, state_path=f"{args.sessions}/.health.json"
+            ) if args.sessions else None
+            worker = JobWorker(
+                broker, args.out_dir, worker_id=args.worker_id, concurrency=args.concurrency,
+                lease_s=args.lease_s, heartbeat_s=args.heartbeat_s, retry_delay_s=args.retry_delay_s,
+                dedupe_db=args.dedupe_db, metrics=metrics, headless=args.headless, lean=args.lean,
+                daemon=args.daemon, sessions=sessions,
+            )
+            try:
+                n = asyncio.run(worker.run(max_jobs=args.max_jobs, exit_when_idle=args.exit_when_idle))
+            finally:
+                if metrics is not None:
+                    metrics.close()
+            print(f"[OK] Processed {n} job(s)")
+
+        elif args.cmd == "status":
+            print("  ".join(f"{status}: {n}" for status, n in broker.stats().items()))
+            for job in broker.jobs("failed"):
+                print(f"  failed #{job.id} {job.url} after {job.attempts} attempt(s): {job.error}")
+
+        elif args.cmd == "export":
+            written = 0
+            with JsonlSink(args.out, append=False) as sink:
+                for job in broker.jobs("done"):
+                    for pin in iter_job_pins(args.out_dir, job.id):
+                        sink.write(pin)
+                written = sink.written
+            print(f"[OK] Exported {written} pins → {args.out}")
+    finally:
+        broker.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
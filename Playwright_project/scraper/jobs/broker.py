@@ -0,0 +1,300 @@
+import json
+import functools
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Job life cycle: queued → leased → done | failed (a lost lease goes back to queued)
+STATUSES = ("queued", "leased", "done", "failed")
+
+# crawl_board arguments the worker owns; a job cannot set them
+RESERVED_OPTIONS = ("url", "on_item", "metrics", "dedupe_db", "dedupe_conn", "flush_output", "checkpoint", "resume",
+                    "keep_items", "compact")
+
+
+@dataclass
+class Job:
+    id: int
+    url: str
+    options: Dict[str, Any] = field(default_factory=dict)   # crawl_board kwargs (max_items, mode, step_ratio, ...)
+    status: str = "queued"
+    attempts: int = 0               # Leases handed out so far; the running attempt while leased
+    max_attempts: int = 3
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def check_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Rejects worker-owned keys and anything a broker could not store as JSON."""
+    bad = [k for k in options if k in RESERVED_OPTIONS]
+    if bad:
+        raise ValueError(f"Job options set by the worker: {', '.join(bad)}")
+    json.dumps(options)
+    return options
+
+
+class Broker:
+    """
+    Job queue shared by producers and crawl workers.
+
+    Workers lease a job for `lease_s` seconds and extend the lease with
+    heartbeats while the crawl runs. A lease that is not extended in time
+    (dead or partitioned worker) is handed out again, so every job is
+    crawled at least once; the worker's key-based dedupe keeps a retried
+    attempt from writing pins an earlier attempt already wrote.
+    """
+
+    def enqueue(self, url: str, options: Optional[Dict[str, Any]] = None, max_attempts: int = 3,
+                priority: int = 0) -> int:
+        raise NotImplementedError
+
+    def enqueue_many(self, urls: Iterable[str], options: Optional[Dict[str, Any]] = None,
+                     max_attempts: int = 3, priority: int = 0) -> List[int]:
+        return [self.enqueue(url, options, max_attempts, priority) for url in urls]
+
+    def lease(self, worker_id: str, lease_s: float) -> Optional[Job]:
+        """Next ready job, leased to `worker_id`; None when nothing is ready."""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_s: float) -> bool:
+        """Extends the lease. False once the worker no longer holds it (stop the crawl)."""
+        raise NotImplementedError
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry_delay_s: float = 30.0) -> bool:
+        """Requeues the job after a delay, or marks it failed once attempts are used up."""
+        raise NotImplementedError
+
+    def release(self, job_id: int, worker_id: str) -> bool:
+        """Gives a lease back unfinished (worker shutting down); the attempt is not counted."""
+        raise NotImplementedError
+
+    def requeue_expired(self) -> int:
+        """Requeues jobs whose lease ran out; returns how many were touched."""
+        raise NotImplementedError
+
+    def get(self, job_id: int) -> Optional[Job]:
+        raise NotImplementedError
+
+    def jobs(self, status: Optional[str] = None) -> List[Job]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """Job count per status (all STATUSES present)."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority, available_at);
+"""
+
+_COLUMNS = "id, url, options, status, attempts, max_attempts, lease_owner, lease_expires, result, error"
+
+
+def _locked(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _row_to_job(row) -> Job:
+    (job_id, url, options, status, attempts, max_attempts,
+     lease_owner, lease_expires, result, error) = row
+    return Job(
+        id=job_id, url=url, options=json.loads(options), status=status, attempts=attempts,
+        max_attempts=max_attempts, lease_owner=lease_owner, lease_expires=lease_expires,
+        result=json.loads(result) if result else None, error=error,
+    )
+
+
+class SqliteBroker(Broker):
+    """
+    Single-file broker: every producer and worker on the machine opens the
+    same database. Leasing runs in a write transaction (BEGIN IMMEDIATE), so
+    two workers never get the same job. Stand-in for a networked broker
+    when testing on one box. Calls are synchronous but thread-safe, so an
+    async worker can run them off its event loop (asyncio.to_thread) while
+    another process holds the write lock.
+    """
+
+    def __init__(self, path: str, timeout_s: float = 30.0):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; multi-statement changes open their own transaction
+        self._db = sqlite3.connect(path, timeout=timeout_s, isolation_level=None, check_same_thread=False)
+        self._lock = threading.RLock()          # One statement or transaction on the connection at a time
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def _write(self, sql: str, params: tuple) -> int:
+        return self._db.execute(sql, params).rowcount
+
+    @_locked
+    def enqueue(self, url: str, options: Optional[Dict[str, Any]] = None, max_attempts: int = 3,
+                priority: int = 0) -> int:
+        options = check_options(dict(options or {}))
+        now = time.time()
+        cur = self._db.execute(
+            "INSERT INTO jobs (url, options, priority, max_attempts, available_at, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, json.dumps(options), priority, max_attempts, now, now, now),
+        )
+        return cur.lastrowid
+
+    @_locked
+    def enqueue_many(self, urls: Iterable[str], options: Optional[Dict[str, Any]] = None,
+                     max_attempts: int = 3, priority: int = 0) -> List[int]:
+        self._db.execute("BEGIN IMMEDIATE")     # One transaction for the whole batch
+        try:
+            ids = [self.enqueue(url, options, max_attempts, priority) for url in urls]
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+        return ids
+
+    def _requeue_expired(self, now: float) -> int:
+        exhausted = self._write(
+            "UPDATE jobs SET status = 'failed', lease_owner = NULL, lease_expires = NULL,"
+            " error = 'lease expired', updated_at = ?"
+            " WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+            (now, now),
+        )
+        requeued = self._write(
+            "UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL,"
+            " available_at = ?, error = 'lease expired', updated_at = ?"
+            " WHERE status = 'leased' AND lease_expires < ?",
+            (now, now, now),
+        )
+        return exhausted + requeued
+
+    @_locked
+    def requeue_expired(self) -> int:
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            n = self._requeue_expired(time.time())
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+        return n
+
+    @_locked
+    def lease(self, worker_id: str, lease_s: float) -> Optional[Job]:
+        now = time.time()
+        # Write lock up front: the SELECT and UPDATE below are one atomic step
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._requeue_expired(now)
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ?"
+                " ORDER BY priority DESC, available_at, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                self._db.execute("COMMIT")
+                return None
+            self._write(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?,"
+                " lease_expires = ?, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_s, now, row[0]),
+            )
+            job = _row_to_job(self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", row).fetchone())
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+        return job
+
+    @_locked
+    def heartbeat(self, job_id: int, worker_id: str, lease_s: float) -> bool:
+        now = time.time()
+        return self._write(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ?"
+            " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (now + lease_s, now, job_id, worker_id),
+        ) == 1
+
+    @_locked
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        # Also accepted after the lease expired, as long as nobody requeued or re-leased it
+        return self._write(
+            "UPDATE jobs SET status = 'done', lease_owner = NULL, lease_expires = NULL,"
+            " result = ?, error = NULL, updated_at = ?"
+            " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (json.dumps(result), time.time(), job_id, worker_id),
+        ) == 1
+
+    @_locked
+    def fail(self, job_id: int, worker_id: str, error: str, retry_delay_s: float = 30.0) -> bool:
+        now = time.time()
+        return self._write(
+            "UPDATE jobs SET"
+            " status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,"
+            " available_at = ? + ? * attempts,"            # Linear backoff per attempt
+            " lease_owner = NULL, lease_expires = NULL, error = ?, updated_at = ?"
+            " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (now, retry_delay_s, error, now, job_id, worker_id),
+        ) == 1
+
+    @_locked
+    def release(self, job_id: int, worker_id: str) -> bool:
+        now = time.time()
+        return self._write(
+            "UPDATE jobs SET status = 'queued', attempts = attempts - 1, available_at = ?,"
+            " lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+            " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (now, now, job_id, worker_id),
+        ) == 1
+
+    @_locked
+    def get(self, job_id: int) -> Optional[Job]:
+        row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    @_locked
+    def jobs(self, status: Optional[str] = None) -> List[Job]:
+        if status is None:
+            rows = self._db.execute(f"SELECT {_COLUMNS} FROM jobs ORDER BY id")
+        else:
+            rows = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE status = ? ORDER BY id", (status,))
+        return [_row_to_job(r) for r in rows]
+
+    @_locked
+    def stats(self) -> Dict[str, int]:
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, n in self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = n
+        return counts
+
+    @_locked
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import os
+import re
+import socket
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+from scraper.adapters.base import Pin
+from scraper.adapters.registry import REGISTRY
+from scraper.dispatcher import crawl_board, pick_adapter
+from scraper.jobs.broker import Broker, Job
+from scraper.utils.dedupe import SqliteDedupeIndex, connect_dedupe_db
+from scraper.utils.metrics import Metrics
+from scraper.utils.sink import JsonlSink, read_pins
+
+log = logging.getLogger(__name__)
+
+_ATTEMPT_FILE = re.compile(r"job-(\d+)\.attempt-(\d+)\.jsonl$")
+
+
+def attempt_path(out_dir: str, job_id: int, attempt: int) -> Path:
+    """Output of one attempt; every attempt appends to its own file."""
+    return Path(out_dir) / f"job-{job_id}.attempt-{attempt}.jsonl"
+
+
+def _attempt_files(out_dir: str, job_id: int, upto: Optional[int] = None):
+    found = []
+    for p in Path(out_dir).glob(f"job-{job_id}.attempt-*.jsonl"):
+        m = _ATTEMPT_FILE.search(p.name)
+        if m and (upto is None or int(m.group(2)) <= upto):
+            found.append((int(m.group(2)), p))
+    return [p for _, p in sorted(found)]
+
+
+def iter_job_pins(out_dir: str, job_id: int, upto: Optional[int] = None) -> Iterator[Pin]:
+    """
+    A job's pins across all its attempt files, each dedupe key once.
+    Only overlapping attempts (a worker that kept crawling after losing its
+    lease) can repeat a pin on disk; readers go through here.
+    """
+    seen = set()
+    for path in _attempt_files(out_dir, job_id, upto):
+        for pin in read_pins(str(path)):
+            key = REGISTRY.get(pin.source)._make_key(pin)
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            yield pin
+
+
+class _LeaseLost(Exception):
+    pass
+
+
+class JobWorker:
+    """
+    Pulls jobs from a Broker and crawls them with crawl_board, one browser
+    per running job.
+
+    Pins of attempt N go to <out_dir>/job-<id>.attempt-<N>.jsonl. Before a
+    retried attempt starts, the keys of the earlier attempts' pins are
+    loaded into the job's dedupe index, so the retry only writes pins that
+    are not on disk yet (at-least-once crawling, no duplicate output). In
+    dom mode the attempt also resumes from the job's checkpoint and
+    fast-scrolls past the depth already harvested.
+
+    While a crawl runs the lease is extended every `heartbeat_s`; if the
+    broker reports it lost, the crawl is cancelled and the job left to
+    whoever holds it now.
+
+    crawl_opts are defaults for every job (headless, lean, ...); a job's
+    own options win.
+
+    A shared `dedupe_db` is opened once and its connection used by every
+    running job (separate connections would lock each other). A commit on
+    it commits all jobs' keys, so every running job's output is flushed
+    first.
+    """
+
+    def __init__(
+        self,
+        broker: Broker,
+        out_dir: str,
+        worker_id: Optional[str] = None,
+        concurrency: int = 1,
+        lease_s: float = 120.0,
+        heartbeat_s: float = 20.0,
+        poll_s: float = 2.0,
+        retry_delay_s: float = 30.0,
+        dedupe_db: Optional[str] = None,
+        metrics: Optional[Metrics] = None,
+        **crawl_opts
+    ):
+        if heartbeat_s >= lease_s:
+            raise ValueError("heartbeat_s must be shorter than lease_s")
+        self.broker = broker
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.concurrency = concurrency
+        self.lease_s = lease_s
+        self.heartbeat_s = heartbeat_s
+        self.poll_s = poll_s
+        self.retry_delay_s = retry_delay_s
+        self.dedupe_db = dedupe_db          # Shared across jobs (incremental harvests); else one per job
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.crawl_opts = crawl_opts
+        self.processed = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._sinks: Set[JsonlSink] = set()
+
+    def _shared_db(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = connect_dedupe_db(self.dedupe_db)
+        return self._db
+
+    def _flush_sinks(self) -> None:
+        # Keys on the shared connection may belong to any running job
+        for sink in list(self._sinks):
+            sink.flush(fsync=True)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _open_index(self, job: Job) -> SqliteDedupeIndex:
+        if self.dedupe_db:
+            return SqliteDedupeIndex(None, namespace=job.url, db=self._shared_db(), before_commit=self._flush_sinks)
+        return SqliteDedupeIndex(str(self.out_dir / f"job-{job.id}.seen.db"), namespace=job.url)
+
+    def _seed_index(self, job: Job) -> int:
+        """Marks pins written by earlier attempts as seen; returns how many were added."""
+        adapter = pick_adapter(job.url)
+        index = self._open_index(job)
+        added = 0
+        try:
+            for pin in iter_job_pins(str(self.out_dir), job.id, upto=job.attempts - 1):
+                key = adapter._make_key(pin)
+                if key and key not in index:
+                    index.add(key, pin.id)
+                    added += 1
+        finally:
+            index.close()
+        return added
+
+    async def _heartbeat(self, job: Job, crawl: asyncio.Task, sink: JsonlSink) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_s)
+            sink.flush(fsync=True)              # What the broker counts as progress is on disk
+            if not await asyncio.to_thread(self.broker.heartbeat, job.id, self.worker_id, self.lease_s):
+                log.warning("[LEASE] job %d: lease lost, stopping crawl", job.id)
+                crawl.cancel("lease lost")
+                return
+
+    async def run_job(self, job: Job) -> Dict[str, Any]:
+        """Crawls one leased job to its attempt file; returns the result stored in the broker."""
+        started = time.monotonic()
+        seeded = self._seed_index(job) if job.attempts > 1 else 0
+        if seeded:
+            log.info("[RETRY] job %d attempt %d: %d pins already on disk", job.id, job.attempts, seeded)
+
+        opts = {**self.crawl_opts, **job.options}
+        if opts.get("mode", "dom") == "dom":
+            opts.update(checkpoint=str(self.out_dir / f"job-{job.id}.ckpt"), resume=job.attempts > 1)
+
+        out = attempt_path(str(self.out_dir), job.id, job.attempts)
+        sink = JsonlSink(str(out))
+        if self.dedupe_db:
+            dedupe = dict(dedupe_conn=self._shared_db(), flush_output=self._flush_sinks)
+        else:
+            dedupe = dict(dedupe_db=str(self.out_dir / f"job-{job.id}.seen.db"),
+                          flush_output=lambda: sink.flush(fsync=True))
+        self._sinks.add(sink)
+        crawl = asyncio.create_task(crawl_board(
+            job.url, on_item=sink, keep_items=False, metrics=self.metrics, **dedupe, **opts
+        ))
+        beat = asyncio.create_task(self._heartbeat(job, crawl, sink))
+        try:
+            await crawl
+        except asyncio.CancelledError:
+            if beat.done() and not beat.cancelled():
+                raise _LeaseLost() from None    # Cancelled by the heartbeat, not by our caller
+            raise
+        finally:
+            beat.cancel()
+            self._sinks.discard(sink)
+            sink.close()
+
+        return {
+            "pins": sink.written,
+            "output": str(out),
+            "attempt": job.attempts,
+            "worker": self.worker_id,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+    async def _process(self, job: Job) -> None:
+        log.info("[JOB ] %d %s (attempt %d/%d)", job.id, job.url, job.attempts, job.max_attempts)
+        try:
+            with self.metrics.timer("job_seconds"):
+                result = await self.run_job(job)
+        except _LeaseLost:
+            self.metrics.inc("jobs_total", status="lost")
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.broker.release, job.id, self.worker_id)   # Shutting down: hand it back at once
+            self.metrics.inc("jobs_total", status="released")
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self.broker.fail, job.id, self.worker_id, repr(e), self.retry_delay_s)
+            self.metrics.inc("jobs_total", status="failed")
+            log.error("[FAIL] job %d %s: %r", job.id, job.url, e)
+        else:
+            if await asyncio.to_thread(self.broker.complete, job.id, self.worker_id, result):
+                self.metrics.inc("jobs_total", status="done")
+                log.info("[DONE] job %d: %d pins → %s", job.id, result["pins"], result["output"])
+            else:
+                self.metrics.inc("jobs_total", status="lost")
+                log.warning("[LEASE] job %d finished after its lease moved on", job.id)
+        finally:
+            self.processed += 1
+
+    async def _loop(self, max_jobs: Optional[int], exit_when_idle: bool) -> None:
+        while max_jobs is None or self.processed < max_jobs:
+            job = await asyncio.to_thread(self.broker.lease, self.worker_id, self.lease_s)
+            if job is not None:
+                await self._process(job)
+                continue
+            if exit_when_idle:
+                stats = await asyncio.to_thread(self.broker.stats)
+                if not stats["queued"] and not stats["leased"]:
+                    return
+            await asyncio.sleep(self.poll_s)
+
+    async def run(self, max_jobs: Optional[int] = None, exit_when_idle: bool = False) -> int:
+        """
+        Works jobs with `concurrency` crawls at a time until `max_jobs` were
+        processed, or (exit_when_idle) nothing is queued or leased anymore.
+        Returns the number of jobs processed.
+        """
+        log.info("[WORK] %s: %d slot(s), lease %.0fs", self.worker_id, self.concurrency, self.lease_s)
+        try:
+            await asyncio.gather(*(self._loop(max_jobs, exit_when_idle) for _ in range(self.concurrency)))
+        finally:
+            self.close()
+        return self.processed
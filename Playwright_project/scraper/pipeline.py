@@ -0,0 +1,111 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from scraper.adapters.base import Pin
+from scraper.dispatcher import crawl_board
+from scraper.utils.download import Downloader, DownloadResult, media_url
+
+# A crawl coroutine that pushes every new pin into the given callback,
+# e.g. lambda on_item: crawl_board(url, on_item=on_item)
+CrawlFn = Callable[[Callable[[Pin], Awaitable[Any]]], Awaitable[Any]]
+
+_DONE = object()
+
+
+async def _put_unless_gone(queue: asyncio.Queue, item: Any, consumers: List[asyncio.Task]) -> bool:
+    """
+    queue.put that gives up once every consumer task has ended (nobody would
+    ever make room). Returns whether the item was queued.
+    """
+    put = asyncio.ensure_future(queue.put(item))
+    try:
+        while not put.done():
+            alive = [c for c in consumers if not c.done()]
+            if not alive:
+                return False
+            await asyncio.wait([put, *alive], return_when=asyncio.FIRST_COMPLETED)
+        return True
+    finally:
+        if not put.done():
+            put.cancel()
+
+
+async def iter_pins(url: str, queue_size: int = 256, **crawl_opts) -> AsyncIterator[Pin]:
+    """
+    Async generator over crawl_board: yields each pin as soon as the collector
+    accepts it. The bounded queue gives backpressure: a slow consumer pauses
+    the scroll loop instead of piling pins up in memory.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def produce():
+        cancelled = False
+        try:
+            await crawl_board(url, on_item=queue.put, **crawl_opts)
+        except asyncio.CancelledError:
+            cancelled = True            # Consumer stopped early: nobody reads the sentinel
+            raise
+        finally:
+            if not cancelled:
+                await queue.put(_DONE)
+
+    task = asyncio.create_task(produce())
+    try:
+        while (pin := await queue.get()) is not _DONE:
+            yield pin
+        await task                      # Re-raise crawl errors
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.wait([task])  # Let the crawl close its browser before we return
+            if not task.cancelled():
+                task.exception()        # Failed while stopping; the consumer left already
+
+
+async def crawl_with_downloads(
+    crawl: CrawlFn,
+    out_dir: str,
+    queue_size: int = 256,
+    on_item: Optional[Callable[[Pin], Awaitable[Any]]] = None,
+    **download_opts
+) -> Tuple[Any, List[DownloadResult]]:
+    """
+    Runs a crawl and downloads its media at the same time.
+
+    Pins flow crawl → (optional on_item writer stage) → bounded queue →
+    download workers. Total time approaches max(crawl, download) instead of
+    crawl + download. Returns (crawl result, download results).
+
+    A download that raises becomes a "failed" result; if the workers die
+    anyway, the crawl stops with an error instead of blocking on the queue.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    results: List[DownloadResult] = []
+
+    workers: List[asyncio.Task] = []
+
+    async def accept(pin: Pin) -> None:
+        if on_item is not None:
+            await on_item(pin)
+        # Blocks the scroll loop while downloads lag behind
+        if not await _put_unless_gone(queue, pin, workers):
+            raise RuntimeError("download workers stopped")
+
+    async with Downloader(out_dir, **download_opts) as dl:
+        async def worker():
+            while (pin := await queue.get()) is not _DONE:
+                try:
+                    results.append(await dl.download(pin))
+                except Exception as e:
+                    results.append(DownloadResult(pin.id, media_url(pin), None, "failed", error=repr(e)))
+
+        workers.extend(asyncio.create_task(worker()) for _ in range(dl.concurrency))
+        try:
+            crawl_result = await crawl(accept)
+        finally:
+            # Let workers finish what was already queued, even if the crawl failed
+            for _ in workers:
+                await _put_unless_gone(queue, _DONE, workers)
+            await asyncio.gather(*workers, return_exceptions=True)   # A dead worker already failed the crawl
+
+    return crawl_result, results
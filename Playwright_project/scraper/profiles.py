@@ -0,0 +1,329 @@
+"""
+Named crawl tuning profiles per adapter (see scraper/profiles.toml).
+
+    python -m scraper.profiles show --adapter pinterest --profile fast
+    python -m scraper.profiles tune --url https://www.pinterest.com/<user>/<board>/ --out my.toml \\
+        --grid wait_min_ms=300,800,1500 --grid stagnant_tolerance=6,12 --max-items 400 --headless
+    python runner.py --url ... --profiles my.toml --profile tuned
+"""
+import argparse
+import asyncio
+import copy
+import functools
+import itertools
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    import tomllib                      # Python 3.11+
+except ImportError:
+    tomllib = None
+
+try:
+    import yaml                         # Optional: only needed for .yaml/.yml profile files
+except ImportError:
+    yaml = None
+
+log = logging.getLogger(__name__)
+
+BUILTIN_PATH = Path(__file__).with_name("profiles.toml")
+ALL_ADAPTERS = "*"
+
+STEPWISE_KEYS = frozenset({"step_ratio", "stagnant_tolerance", "wait_min_ms", "wait_jitter_ms",
+                           "max_rounds", "pacing", "incremental"})
+VIRTUAL_KEYS = frozenset({"virtual", "stagnant_tolerance", "wait_min_ms", "wait_jitter_ms",
+                          "max_rounds", "pacing", "end_confirm", "overlap_ratio", "settle_ms"})
+NETWORK_KEYS = frozenset({"stagnant_tolerance", "wait_jitter_ms", "max_rounds", "response_timeout_ms"})
+TUNING_KEYS = STEPWISE_KEYS | VIRTUAL_KEYS | NETWORK_KEYS
+MODES = ("dom", "network")                  # Sub-tables, e.g. [pinterest.default.network], win in that mode
+
+# Tried by `tune` when no --grid is given
+DEFAULT_GRID = {"wait_min_ms": [300, 800, 1500], "wait_jitter_ms": [300, 1000]}
+
+ProfileData = Dict[str, Dict[str, Dict[str, Any]]]      # adapter → profile → settings (+ mode sub-tables)
+
+
+def _require_yaml() -> None:
+    if yaml is None:
+        raise RuntimeError("YAML profile files need the 'PyYAML' package (pip install pyyaml)")
+
+
+def _read(path: Union[str, Path]) -> ProfileData:
+    path = Path(path)
+    if path.suffix in (".yaml", ".yml"):
+        _require_yaml()
+        with open(path, encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    if tomllib is None:
+        raise RuntimeError("TOML profile files need Python 3.11+ (tomllib); use a .yaml file instead")
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def _validate(data: ProfileData, source: str) -> ProfileData:
+    for adapter, profiles in data.items():
+        if not isinstance(profiles, dict):
+            raise ValueError(f"{source}: [{adapter}] must hold profile tables")
+        for profile, settings in profiles.items():
+            if not isinstance(settings, dict):
+                raise ValueError(f"{source}: [{adapter}.{profile}] must be a table of settings")
+            tables = [(f"{adapter}.{profile}", {k: v for k, v in settings.items() if k not in MODES})]
+            for mode in MODES:
+                if mode in settings:
+                    if not isinstance(settings[mode], dict):
+                        raise ValueError(f"{source}: [{adapter}.{profile}.{mode}] must be a table of settings")
+                    tables.append((f"{adapter}.{profile}.{mode}", settings[mode]))
+            for table, values in tables:
+                unknown = sorted(set(values) - TUNING_KEYS)
+                if unknown:
+                    raise ValueError(f"{source}: [{table}] unknown setting(s): {', '.join(unknown)}")
+    return data
+
+
+def _toml_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+class Profiles:
+    """Profile tables (adapter → profile → settings) with layered lookup."""
+
+    def __init__(self, data: Optional[ProfileData] = None, source: str = "<memory>"):
+        self.data: ProfileData = _validate(copy.deepcopy(data or {}), source)
+        self.source = source
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Profiles":
+        return cls(_read(path), str(path))
+
+    def overlay(self, other: "Profiles") -> "Profiles":
+        """These profiles with `other`'s settings on top (per adapter, per profile, per key)."""
+        merged = copy.deepcopy(self.data)
+        for adapter, profiles in other.data.items():
+            for profile, settings in profiles.items():
+                target = merged.setdefault(adapter, {}).setdefault(profile, {})
+                for key, value in settings.items():
+                    if key in MODES:
+                        target.setdefault(key, {}).update(value)
+                    else:
+                        target[key] = value
+        return Profiles(merged, f"{self.source} + {other.source}")
+
+    def names(self, adapter: str) -> List[str]:
+        names = set(self.data.get(ALL_ADAPTERS, {})) | set(self.data.get(adapter, {}))
+        return sorted(names | {"default"})
+
+    def resolve(self, adapter: str, profile: str = "default", keys: Optional[Iterable[str]] = None,
+                mode: str = "dom") -> Dict[str, Any]:
+        """
+        Settings of `profile` for `adapter` in `mode`, restricted to `keys`
+        (those the collector reads). Layers, later wins: "*".default,
+        <adapter>.default, "*".<profile>, <adapter>.<profile>; within each,
+        the `mode` sub-table over the plain settings.
+        """
+        if profile not in self.names(adapter):
+            raise ValueError(f"Unknown profile {profile!r} for {adapter} (have: {', '.join(self.names(adapter))})")
+        settings: Dict[str, Any] = {}
+        for name in dict.fromkeys(("default", profile)):
+            for section in (ALL_ADAPTERS, adapter):
+                table = self.data.get(section, {}).get(name, {})
+                settings.update((k, v) for k, v in table.items() if k not in MODES)
+                settings.update(table.get(mode, {}))
+        if keys is not None:
+            keys = set(keys)
+            settings = {k: v for k, v in settings.items() if k in keys}
+        return settings
+
+    def set(self, adapter: str, profile: str, settings: Dict[str, Any]) -> None:
+        _validate({adapter: {profile: settings}}, self.source)
+        self.data.setdefault(adapter, {})[profile] = dict(settings)
+
+    def dump(self, path: Union[str, Path]) -> None:
+        """Writes the tables back as TOML or YAML (by suffix); comments are not kept."""
+        path = Path(path)
+        if path.suffix in (".yaml", ".yml"):
+            _require_yaml()
+            text = yaml.safe_dump(self.data, sort_keys=False)
+        else:
+            lines = []
+            for adapter, profiles in self.data.items():
+                section = json.dumps(adapter) if adapter == ALL_ADAPTERS else adapter
+                for profile, settings in profiles.items():
+                    lines.append(f"[{section}.{profile}]")
+                    lines.extend(f"{k} = {_toml_value(v)}" for k, v in settings.items() if k not in MODES)
+                    lines.append("")
+                    for mode in MODES:
+                        if mode in settings:
+                            lines.append(f"[{section}.{profile}.{mode}]")
+                            lines.extend(f"{k} = {_toml_value(v)}" for k, v in settings[mode].items())
+                            lines.append("")
+            text = "\n".join(lines)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def load_profiles(path: Optional[str] = None) -> Profiles:
+    """Built-in profiles, with the file at `path` (TOML or YAML) on top. Cached per path; don't mutate."""
+    profiles = Profiles.load(BUILTIN_PATH)
+    return profiles.overlay(Profiles.load(path)) if path else profiles
+
+
+def apply_profile(adapter: str, opts: Dict[str, Any], keys: Iterable[str], mode: str = "dom") -> Dict[str, Any]:
+    """
+    Collector options for an adapter: the profile's settings for `mode`
+    (limited to `keys`) under the explicit `opts`. Reads and removes opts["profile"]
+    (name, default "default") and opts["profiles"] (file path or Profiles).
+    Explicit tuning settings outside `keys` (--set, job --opt, tune --grid)
+    are dropped with a warning instead of reaching a collector that has no
+    such parameter.
+    """
+    opts = dict(opts)
+    name = opts.pop("profile", None) or "default"
+    source = opts.pop("profiles", None)
+    profiles = source if isinstance(source, Profiles) else load_profiles(source)
+    keys = frozenset(keys)
+    unused = sorted(k for k in opts if k in TUNING_KEYS and k not in keys)
+    if unused:
+        # e.g. --set end_confirm=5 on a stepwise collector: not a parameter of it
+        log.warning("[PROFILE] %s (%s mode) doesn't read %s; ignored", adapter, mode, ", ".join(unused))
+        for key in unused:
+            del opts[key]
+    return {**profiles.resolve(adapter, name, keys, mode), **opts}
+
+
+def parse_settings(items: Iterable[str]) -> Dict[str, Any]:
+    """KEY=VALUE strings → settings; values are JSON when they parse (numbers, booleans)."""
+    settings = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        key = key.strip().replace("-", "_")
+        if not sep:
+            raise ValueError(f"Expected KEY=VALUE, got {item!r}")
+        if key not in TUNING_KEYS:
+            raise ValueError(f"Unknown setting {key!r} (one of: {', '.join(sorted(TUNING_KEYS))})")
+        try:
+            settings[key] = json.loads(value)
+        except ValueError:
+            settings[key] = value
+    return settings
+
+
+def parse_grid(items: Iterable[str]) -> Dict[str, List[Any]]:
+    """KEY=V1,V2,... strings → {key: [values]} (values parsed as in parse_settings)."""
+    grid: Dict[str, List[Any]] = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        for value in values.split(","):
+            for k, v in parse_settings([f"{key}={value}"]).items():
+                grid.setdefault(k, []).append(v)
+    return grid
+
+
+async def tune(url: str, grid: Dict[str, List[Any]], base: str = "default", profiles: Optional[str] = None,
+               max_items: int = 300, mode: str = "dom", **crawl_opts) -> List[Dict[str, Any]]:
+    """
+    Crawls `url` once per combination of `grid` values (on top of profile
+    `base`) and returns one record per trial, best first: items/minute
+    among trials that ended on target or end of feed, then the rest
+    (trials that went stagnant or failed).
+    """
+    from scraper.dispatcher import crawl_board                 # Deferred: adapters import this module
+    from scraper.utils.stream import CollectStats
+
+    keys = list(grid)
+    trials = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        settings = dict(zip(keys, values))
+        stats = CollectStats()
+        t0 = time.perf_counter()
+        error = None
+        try:
+            await crawl_board(url, max_items=max_items, mode=mode, profile=base, profiles=profiles,
+                              stats=stats, keep_items=False, **crawl_opts, **settings)
+        except Exception as e:
+            error = str(e)
+        minutes = (time.perf_counter() - t0) / 60
+        trial = {
+            "settings": settings, "items": stats.new, "rounds": stats.rounds,
+            "items_per_min": round(stats.new / minutes, 1) if minutes else 0.0,
+            "stop_reason": stats.stop_reason, "error": error,
+        }
+        trial["ok"] = error is None and stats.stop_reason in ("target", "feed_end")
+        log.info("[TUNE] %s → %d items, %.1f/min, %s", settings, trial["items"], trial["items_per_min"],
+                 error or stats.stop_reason)
+        trials.append(trial)
+    return sorted(trials, key=lambda t: (not t["ok"], -t["items_per_min"]))
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(prog="python -m scraper.profiles", description="Crawl tuning profiles")
+    p.add_argument("--profiles", default=None, help="Profile file (TOML/YAML) on top of the built-in one")
+    p.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    show = sub.add_parser("show", help="Resolved settings of a profile")
+    show.add_argument("--adapter", required=True)
+    show.add_argument("--profile", default="default")
+    show.add_argument("--mode", choices=MODES, default="dom")
+
+    tn = sub.add_parser("tune", help="Measure settings on a board and save the fastest one as a profile")
+    tn.add_argument("--url", required=True)
+    tn.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2,...",
+                    help="Values to try (repeatable); default: wait_min_ms=300,800,1500 wait_jitter_ms=300,1000")
+    tn.add_argument("--base", default="default", help="Profile the trials start from")
+    tn.add_argument("--save-as", default="tuned", help="Profile name to store the winner under")
+    tn.add_argument("--out", default=None, help="Profile file to write (default: --profiles)")
+    tn.add_argument("--max-items", type=int, default=300)
+    tn.add_argument("--mode", choices=MODES, default="dom")
+    tn.add_argument("--headless", action="store_true")
+    tn.add_argument("--storage-state", type=str, default=None)
+    args = p.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+
+    if args.cmd == "show":
+        from scraper.adapters.registry import REGISTRY
+        REGISTRY.get(args.adapter)                              # Unknown adapter names fail here
+        for key, value in load_profiles(args.profiles).resolve(args.adapter, args.profile, mode=args.mode).items():
+            print(f"{key} = {_toml_value(value)}")
+        return 0
+
+    out = args.out or args.profiles
+    if not out:
+        p.error("tune needs --out or --profiles (the file the tuned profile is written to)")
+    try:
+        grid = parse_grid(args.grid) or DEFAULT_GRID
+    except ValueError as e:
+        p.error(str(e))
+
+    from scraper.adapters.registry import REGISTRY
+    adapter = REGISTRY.name_for_url(args.url)
+    trials = asyncio.run(tune(args.url, grid, base=args.base, profiles=args.profiles,
+                              max_items=args.max_items, mode=args.mode,
+                              headless=args.headless, storage_state=args.storage_state))
+    for t in trials:
+        print(f"{'ok ' if t['ok'] else '-- '} {t['items_per_min']:>8.1f}/min  {t['items']:>5} items  "
+              f"{t['rounds']:>4} rounds  {t['error'] or t['stop_reason']:<10} {t['settings']}")
+    best = trials[0] if trials and trials[0]["ok"] else None
+    if best is None:
+        print("[FAIL] Every trial went stagnant or failed; try longer waits or a higher stagnant_tolerance")
+        return 1
+
+    target = Profiles.load(out) if Path(out).exists() else Profiles(source=out)
+    # Stored as a mode sub-table: settings measured in dom mode say nothing about network mode
+    settings = {**load_profiles(args.profiles).resolve(adapter, args.base, mode=args.mode), **best["settings"]}
+    target.set(adapter, args.save_as, {args.mode: settings})
+    target.dump(out)
+    print(f"[OK] [{adapter}.{args.save_as}] → {out}: {settings}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from scraper.adapters.base import SiteAdapter
+from scraper.utils.stream import CollectStats
+
+log = logging.getLogger(__name__)
+
+STRATEGIES = ("round_robin", "least_throttled")
+
+# Any of these visible → the site shows a login wall / signup modal
+_WALL_VISIBLE_JS = """
+(selectors) => selectors.some(sel => {
+    const el = document.querySelector(sel);
+    if (!el) return false;
+    const r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== "hidden";
+})
+"""
+
+
+@dataclass
+class Session:
+    """One storage_state file and its health."""
+    path: str
+    site: str
+    uses: int = 0
+    blocks: int = 0                 # Soft blocks seen in total
+    strikes: int = 0                # Consecutive soft blocks (drives the cooldown length)
+    cooldown_until: float = 0.0     # Wall clock; not handed out before this
+    last_blocked_at: float = 0.0
+    last_reason: str = ""
+    in_use: int = 0                 # Contexts currently using it
+
+    def available(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+
+async def detect_soft_block(page, adapter: SiteAdapter, stats: CollectStats,
+                            stall_below: int = 0) -> Optional[str]:
+    """
+    Why a finished crawl looks soft-blocked, or None:
+        login_wall → one of adapter.SOFT_BLOCK_SELECTORS is visible
+        empty_feed → the card selector never matched (nothing read or
+                     skipped) although the page stayed open
+        stalled    → stopped as stagnant with fewer than `stall_below` pins
+                     (0 disables; small boards end like this legitimately)
+    """
+    if adapter.SOFT_BLOCK_SELECTORS:
+        try:
+            if await page.evaluate(_WALL_VISIBLE_JS, adapter.SOFT_BLOCK_SELECTORS):
+                return "login_wall"
+        except Exception:
+            pass                                # Page already gone: judge by the counters
+    if stats.nodes_read + stats.nodes_skipped == 0 and stats.stop_reason != "closed":
+        return "empty_feed"
+    if stall_below and stats.stop_reason == "stagnant" and stats.new + stats.known < stall_below:
+        return "stalled"
+    return None
+
+
+class SessionPool:
+    """
+    Many storage_state files per site, handed to crawl contexts one at a time.
+
+        round_robin     → cycle through the site's healthy sessions
+        least_throttled → the healthy session blocked longest ago (never
+                          blocked first), fewest contexts in use on ties
+
+    A crawl reports back with release(session, reason); one that raised
+    is released without a verdict (reason None). A soft block
+    (see detect_soft_block) puts the session on cooldown: `cooldown_s`,
+    doubled per consecutive block up to `max_cooldown_s`; a clean crawl
+    resets the streak. When every session of a site is cooling down,
+    acquire() waits for the first one to come back.
+
+    With `state_path` the health counters are saved after every release
+    and loaded at start, so cooldowns outlive the process.
+    """
+
+    def __init__(self, sessions: List[Session], strategy: str = "least_throttled",
+                 cooldown_s: float = 600.0, max_cooldown_s: float = 3600.0,
+                 stall_below: int = 0, state_path: Optional[str] = None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown session strategy: {strategy} (use one of {', '.join(STRATEGIES)})")
+        self.strategy = strategy
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.stall_below = stall_below
+        self.state_path = Path(state_path) if state_path else None
+        self._by_site: Dict[str, List[Session]] = {}
+        for s in sessions:
+            self._by_site.setdefault(s.site, []).append(s)
+        self._cursor = {site: itertools.count() for site in self._by_site}
+        self._load_state()
+
+    @classmethod
+    def from_dir(cls, root: str, **kwargs) -> "SessionPool":
+        """
+        Sessions laid out as <root>/<site>/*.json (site = adapter name),
+        e.g. sessions/pinterest/acc1.json (see save_session.py --out).
+        """
+        sessions = [
+            Session(path=str(p), site=p.parent.name)
+            for p in sorted(Path(root).glob("*/*.json"))
+            if not p.name.startswith(".")
+        ]
+        if not sessions:
+            raise ValueError(f"No storage_state files under {root}/<site>/*.json")
+        return cls(sessions, **kwargs)
+
+    def sites(self) -> List[str]:
+        return list(self._by_site)
+
+    def sessions(self, site: str) -> List[Session]:
+        return list(self._by_site.get(site, []))
+
+    def _pick(self, candidates: List[Session]) -> Session:
+        if self.strategy == "round_robin":
+            return candidates[next(self._cursor[candidates[0].site]) % len(candidates)]
+        return min(candidates, key=lambda s: (s.last_blocked_at, s.in_use, s.uses))
+
+    async def acquire(self, site: str) -> Optional[Session]:
+        """A healthy session for `site`; None if the pool has none for it (crawl anonymously)."""
+        pool = self._by_site.get(site)
+        if not pool:
+            return None
+        while True:
+            now = time.time()
+            ready = [s for s in pool if s.available(now)]
+            if ready:
+                session = self._pick(ready)
+                session.uses += 1
+                session.in_use += 1
+                return session
+            wake = min(s.cooldown_until for s in pool)
+            log.warning("[SESSION] All %d %s sessions cooling down, next in %.0fs", len(pool), site, wake - now)
+            await asyncio.sleep(max(0.5, wake - now))
+
+    def release(self, session: Session, reason: Optional[str] = None) -> None:
+        """Returns a session; `reason` (a soft-block signal) starts its cooldown."""
+        session.in_use = max(0, session.in_use - 1)
+        if reason is None:
+            session.strikes = 0
+        else:
+            now = time.time()
+            session.blocks += 1
+            session.strikes += 1
+            session.last_blocked_at = now
+            session.last_reason = reason
+            cooldown = min(self.max_cooldown_s, self.cooldown_s * 2 ** (session.strikes - 1))
+            session.cooldown_until = now + cooldown
+            log.warning("[SESSION] %s soft-blocked (%s), cooling down %.0fs", session.path, reason, cooldown)
+        self._save_state()
+
+    async def check(self, page, adapter: SiteAdapter, stats: CollectStats) -> Optional[str]:
+        return await detect_soft_block(page, adapter, stats, self.stall_below)
+
+    def _load_state(self) -> None:
+        if self.state_path is None or not self.state_path.exists():
+            return
+        with open(self.state_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        for pool in self._by_site.values():
+            for s in pool:
+                for field in ("uses", "blocks", "strikes", "cooldown_until", "last_blocked_at", "last_reason"):
+                    if field in saved.get(s.path, {}):
+                        setattr(s, field, saved[s.path][field])
+
+    def _save_state(self) -> None:
+        if self.state_path is None:
+            return
+        state = {
+            s.path: {k: v for k, v in asdict(s).items() if k not in ("path", "site", "in_use")}
+            for pool in self._by_site.values() for s in pool
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, self.state_path)
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import queue as queue_mod
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from scraper.adapters.base import Pin
+from scraper.adapters.registry import REGISTRY
+from scraper.dispatcher import crawl_many
+from scraper.utils.dedupe import DedupeIndex, MemoryDedupeIndex, SqliteDedupeIndex
+from scraper.utils.metrics import Metrics
+from scraper.utils.pinbatch import PinBatch
+
+log = logging.getLogger(__name__)
+
+# Namespace of the merged (cross-board) index in a --dedupe-db file
+GLOBAL_NAMESPACE = "__sharded__"
+
+
+def plan_shards(urls: List[str], workers: int) -> List[List[str]]:
+    """
+    Deals URLs round-robin per site, so every shard gets a similar mix of
+    sites (and per-site politeness limits apply to fewer boards per shard).
+    """
+    by_site: Dict[str, List[str]] = defaultdict(list)
+    for url in dict.fromkeys(urls):
+        by_site[REGISTRY.name_for_url(url)].append(url)
+
+    shards: List[List[str]] = [[] for _ in range(max(1, workers))]
+    slot = 0
+    for site_urls in by_site.values():
+        for url in site_urls:
+            shards[slot % len(shards)].append(url)
+            slot += 1
+    return [s for s in shards if s]
+
+
+def _shard_main(shard_id: int, urls: List[str], crawl_opts: Dict[str, Any], out: "mp.Queue",
+                batch_size: int, flush_s: float, log_level: int) -> None:
+    """Worker process entry point: own event loop, Playwright engine and browser."""
+    logging.basicConfig(level=log_level, format=f"[shard {shard_id}] %(message)s")
+    try:
+        asyncio.run(_run_shard(shard_id, urls, crawl_opts, out, batch_size, flush_s))
+    except BaseException as e:                  # Report instead of dying silently
+        out.put(("error", shard_id, repr(e)))
+        raise SystemExit(1)
+
+
+async def _run_shard(shard_id: int, urls: List[str], crawl_opts: Dict[str, Any], out: "mp.Queue",
+                     batch_size: int, flush_s: float) -> None:
+    metrics = Metrics()
+    rows: List[tuple] = []
+    last_flush = time.monotonic()
+
+    async def flush() -> None:
+        nonlocal last_flush
+        if rows:
+            batch = rows[:]
+            rows.clear()
+            # Bounded queue: blocks (off the loop) while the parent falls behind
+            await asyncio.to_thread(out.put, ("pins", shard_id, batch))
+        last_flush = time.monotonic()
+
+    async def send(pin: Pin) -> None:
+        rows.append(pin.to_row())
+        if len(rows) >= batch_size or time.monotonic() - last_flush >= flush_s:
+            await flush()
+
+    await crawl_many(urls, on_item=send, metrics=metrics, keep_items=False, **crawl_opts)
+    await flush()
+    await asyncio.to_thread(out.put, ("done", shard_id, metrics))
+
+
+async def crawl_sharded(
+    urls: List[str],
+    workers: int = os.cpu_count() or 2,
+    dedupe_db: Optional[str] = None,
+    on_item: Optional[Callable[[Pin], Awaitable[Any]]] = None,
+    metrics: Optional[Metrics] = None,
+    keep_items: bool = True,
+    flush_output: Optional[Callable[[], None]] = None,
+    dedupe_conn: Optional[sqlite3.Connection] = None,
+    batch_size: int = 256,
+    flush_s: float = 0.5,
+    queue_size: int = 64,
+    **crawl_opts
+) -> Dict[str, PinBatch]:
+    """
+    Spreads `urls` over `workers` processes; each runs crawl_many on its own
+    Playwright engine + browser, so pin building and driver protocol work use
+    several cores instead of one event loop.
+
+    Workers stream pin rows back in batches. This process merges them with a
+    global dedupe index (a pin found on two boards is kept once) and assigns
+    global sequential IDs; `dedupe_db` persists that index across runs.
+    Accepted pins are awaited into `on_item` (sinks, download pipeline) and,
+    with keep_items, returned as {board_url: PinBatch}. A key is recorded
+    only after its pin went out, and `flush_output` makes the output durable
+    before every commit of the persisted index (`dedupe_conn`: an open
+    dedupe DB instead of the `dedupe_db` path, left open).
+
+    Worker metrics are merged into `metrics` when each shard finishes.
+    crawl_opts are crawl_many options (max_items, headless, mode, concurrency,
+    per_domain, lean, pacing, ...) and must be picklable.
+    """
+    if "checkpoint" in crawl_opts:
+        raise ValueError("checkpoint/resume is not supported in sharded mode")
+    metrics = metrics if metrics is not None else Metrics()
+    shards = plan_shards(urls, workers)
+    index: DedupeIndex = (
+        SqliteDedupeIndex(dedupe_db, namespace=GLOBAL_NAMESPACE, db=dedupe_conn, before_commit=flush_output)
+        if dedupe_db or dedupe_conn is not None else MemoryDedupeIndex()
+    )
+    results: Dict[str, PinBatch] = {}
+
+    ctx = mp.get_context("spawn")               # Fork + a running loop/driver threads is unsafe
+    out = ctx.Queue(maxsize=queue_size)
+    procs = [
+        ctx.Process(
+            target=_shard_main,
+            args=(i, shard, crawl_opts, out, batch_size, flush_s, logging.getLogger().getEffectiveLevel()),
+            name=f"crawl-shard-{i}",
+            daemon=True,
+        )
+        for i, shard in enumerate(shards)
+    ]
+    for p in procs:
+        p.start()
+    log.info("[SHARD] %d URLs over %d worker processes", len(dict.fromkeys(urls)), len(procs))
+
+    async def accept(row: tuple) -> None:
+        pin = Pin.from_row(row)
+        key = REGISTRY.get(pin.source)._make_key(pin)
+        if not key:
+            return
+        if key in index:
+            metrics.inc("shard_merge_dupes_total")
+            return
+        pin.id = index.next_id()                # Global numbering across all shards
+        # Pin out first, key after: a failing sink must not leave the key marked seen
+        if on_item is not None:
+            await on_item(pin)
+        index.add(key, pin.id)
+        metrics.inc("shard_merge_pins_total")
+        if keep_items:
+            results.setdefault(pin.board_url, PinBatch()).append(pin)
+
+    pending = set(range(len(procs)))
+    try:
+        while pending:
+            try:
+                kind, shard_id, payload = await asyncio.to_thread(out.get, True, 0.5)
+            except queue_mod.Empty:
+                # A worker that died hard (OOM kill, segfault) never says "done"
+                for i in list(pending):
+                    if not procs[i].is_alive() and procs[i].exitcode not in (None, 0):
+                        log.error("[FAIL] shard %d exited with code %s", i, procs[i].exitcode)
+                        metrics.inc("shard_failures_total")
+                        pending.discard(i)
+                    elif not procs[i].is_alive() and out.empty():
+                        pending.discard(i)      # Exited cleanly but its "done" was lost
+                continue
+
+            if kind == "pins":
+                for row in payload:
+                    await accept(row)
+            elif kind == "done":
+                metrics.merge(payload)
+                pending.discard(shard_id)
+                log.info("[SHARD] %d finished", shard_id)
+            elif kind == "error":
+                log.error("[FAIL] shard %d: %s", shard_id, payload)
+                metrics.inc("shard_failures_total")
+                pending.discard(shard_id)
+    finally:
+        for p in procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        index.close()
+
+    return results
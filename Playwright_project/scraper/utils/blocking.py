@@ -0,0 +1,120 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+# Smallest valid transparent GIF: served instead of real image bytes so
+# <img> onload handlers (lazy grids, masonry layout) still fire.
+PIXEL_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff"
+    b"!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+
+# Resource types never needed to read attribute strings from the DOM
+BLOCK_TYPES = frozenset({"font", "media", "texttrack", "manifest"})
+
+# Third-party analytics / ads / error reporting seen on the supported sites
+TRACKER_PATTERNS = (
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"googlesyndication\.com",
+    r"connect\.facebook\.net",
+    r"sentry\.io",
+    r"hotjar\.com",
+    r"segment\.(io|com)",
+    r"branch\.io",
+)
+
+# Video streams fetched through XHR/fetch by HLS/DASH players. MPEG-TS only
+# as numbered segments (seg-12.ts, 240w00001.ts): a bare .ts may be a script
+STREAM_PATTERNS = (r"\.m3u8(\?|$)", r"\d\.ts(\?|$)", r"\.m4s(\?|$)", r"\.mpd(\?|$)")
+
+# Lean launch flags: drop background work a scraping browser never needs
+LEAN_CHROME_ARGS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-gpu",
+]
+
+
+def _compile(patterns: Iterable[str]) -> Optional["re.Pattern[str]"]:
+    patterns = list(patterns)
+    return re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+
+
+@dataclass
+class LeanProfile:
+    """
+    Request filtering + context settings for scraping-only pages.
+
+    Per request (context.route):
+        - allow_patterns always pass (feed/API requests that drive the grid)
+        - block_types and block_patterns are aborted
+        - images are answered with a 1x1 GIF (stub_images) so no image bytes
+          are downloaded or decoded, while src/srcset attributes stay intact
+
+    viewport / context_options are handed to browser.new_context.
+    """
+    block_types: FrozenSet[str] = BLOCK_TYPES
+    block_patterns: Tuple[str, ...] = TRACKER_PATTERNS + STREAM_PATTERNS
+    allow_patterns: Tuple[str, ...] = ()
+    stub_images: bool = True
+    viewport: Optional[Dict[str, int]] = None
+    context_options: Dict[str, object] = field(default_factory=lambda: {
+        "service_workers": "block",      # SW caches would bypass routing
+        "reduced_motion": "reduce",      # Fewer CSS animations / smooth scrolls to paint
+    })
+
+    def with_rules(self, block: Iterable[str] = (), allow: Iterable[str] = ()) -> "LeanProfile":
+        """Copy with extra (adapter-specific) block/allow patterns."""
+        return LeanProfile(
+            block_types=self.block_types,
+            block_patterns=self.block_patterns + tuple(block),
+            allow_patterns=self.allow_patterns + tuple(allow),
+            stub_images=self.stub_images,
+            viewport=self.viewport,
+            context_options=dict(self.context_options),
+        )
+
+
+class ResourceBlocker:
+    """Route handler applying a LeanProfile; counts what it did per action."""
+
+    def __init__(self, profile: LeanProfile):
+        self.profile = profile
+        self._allow = _compile(profile.allow_patterns)
+        self._block = _compile(profile.block_patterns)
+        self.counts = {"allowed": 0, "aborted": 0, "stubbed": 0}
+
+    def decide(self, url: str, resource_type: str) -> str:
+        """'allowed', 'aborted' or 'stubbed' for one request."""
+        if self._allow is not None and self._allow.search(url):
+            return "allowed"
+        if resource_type in self.profile.block_types:
+            return "aborted"
+        if self._block is not None and self._block.search(url):
+            return "aborted"
+        if resource_type == "image" and self.profile.stub_images:
+            return "stubbed"
+        return "allowed"
+
+    async def handle(self, route) -> None:
+        request = route.request
+        action = self.decide(request.url, request.resource_type)
+        self.counts[action] += 1
+        if action == "aborted":
+            await route.abort("blockedbyclient")
+        elif action == "stubbed":
+            await route.fulfill(status=200, content_type="image/gif", body=PIXEL_GIF)
+        else:
+            await route.continue_()
+
+    async def install(self, target) -> None:
+        """Routes every request of a context, or of one page in a shared context."""
+        await target.route("**/*", self.handle)
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from scraper.utils.dedupe import SqliteDedupeIndex
+
+
+@dataclass
+class CrawlCheckpoint:
+    url: str
+    round_idx: int = 0          # Rounds completed so far (across resumes)
+    scroll_y: int = 0           # Last known scroll offset
+    collected: int = 0          # Items accepted so far (across resumes)
+    finished: bool = False      # True once the crawl ended normally
+    saved_at: float = 0.0
+
+
+class Checkpointer:
+    """
+    Periodically persists collector state so a dead crawl can resume.
+
+    The small state (round, scroll offset, counters) lives in `path` as JSON,
+    written atomically. Seen keys live next to it in `<path>.keys.db`
+    (a SqliteDedupeIndex), so a resumed crawl skips everything harvested
+    before the failure.
+
+    Keys are committed only by save() (and when the index closes), after
+    `flush_output` has made the pins written so far durable (e.g. a
+    JsonlSink flush with fsync). A hard crash therefore loses keys, never
+    pins: items accepted after the last checkpoint are collected once more
+    after a resume.
+    """
+
+    def __init__(self, path: str, url: str, every_rounds: int = 5,
+                 flush_output: Optional[Callable[[], None]] = None):
+        self.path = Path(path)
+        self.url = url
+        self.keys_path = self.path.with_name(self.path.name + ".keys.db")
+        self.every_rounds = every_rounds
+        self.flush_output = flush_output
+        self.index: Optional[SqliteDedupeIndex] = None
+
+    def load(self) -> Optional[CrawlCheckpoint]:
+        if not self.path.exists():
+            return None
+        with open(self.path, encoding="utf-8") as f:
+            return CrawlCheckpoint(**json.load(f))
+
+    def reset(self) -> None:
+        """Drops state from an earlier crawl (fresh, non-resumed start)."""
+        for p in (self.path, self.keys_path,
+                  self.keys_path.with_name(self.keys_path.name + "-wal"),
+                  self.keys_path.with_name(self.keys_path.name + "-shm")):
+            if p.exists():
+                p.unlink()
+
+    def load_for_resume(self) -> Optional[CrawlCheckpoint]:
+        """Checkpoint to resume from, or None (fresh start). Refuses another board's state."""
+        cp = self.load()
+        if cp is not None and cp.url != self.url:
+            raise ValueError(f"Checkpoint {self.path} belongs to {cp.url}, not {self.url}")
+        return cp
+
+    def open_index(self) -> SqliteDedupeIndex:
+        """Seen-key index kept next to the checkpoint."""
+        return self.attach_index(SqliteDedupeIndex(str(self.keys_path), namespace=self.url))
+
+    def attach_index(self, index: SqliteDedupeIndex) -> SqliteDedupeIndex:
+        """Commits the index's keys only on save(), after flush_output, from now on."""
+        index.flush()
+        index.commit_every = 0
+        if self.flush_output is not None:
+            index.before_commit = self.flush_output
+        self.index = index
+        return index
+
+    def due(self, round_idx: int) -> bool:
+        return round_idx % self.every_rounds == 0
+
+    def save(self, cp: CrawlCheckpoint) -> None:
+        # Pins, then keys (index.before_commit is flush_output), then state: none ahead of the other
+        if self.index is not None:
+            if not self.index.flush():
+                return                          # Pins still on their way: keep the older state
+        elif self.flush_output is not None:
+            self.flush_output()
+        cp.saved_at = time.time()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(cp), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def close(self) -> None:
+        if self.index is not None:
+            self.index.close()
+            self.index = None
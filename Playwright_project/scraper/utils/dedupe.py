@@ -0,0 +1,139 @@
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+class DedupeIndex:
+    """
+    Maps a dedupe key (see adapter `_make_key`) to the ID assigned to the item.
+    Lookups and inserts are O(1) so duplicate reporting never scans collected items.
+    """
+
+    def get(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def add(self, key: str, item_id: int) -> None:
+        raise NotImplementedError
+
+    def discard(self, key: str) -> None:
+        """Forgets a key added in this run (its item never reached the output)."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def next_id(self) -> int:
+        # IDs are sequential per index, so a persisted index keeps numbering across runs
+        return len(self)
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryDedupeIndex(DedupeIndex):
+    """Plain dict backend; lives as long as the crawl."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[int]:
+        return self._ids.get(key)
+
+    def add(self, key: str, item_id: int) -> None:
+        self._ids[key] = item_id
+
+    def discard(self, key: str) -> None:
+        self._ids.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def connect_dedupe_db(path: str) -> sqlite3.Connection:
+    """Opens (and initializes) a dedupe database file."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS dedupe ("
+        " namespace TEXT NOT NULL,"
+        " key TEXT NOT NULL,"
+        " item_id INTEGER NOT NULL,"
+        " PRIMARY KEY (namespace, key)"
+        ") WITHOUT ROWID"
+    )
+    return db
+
+
+class SqliteDedupeIndex(DedupeIndex):
+    """
+    On-disk backend. Keys are scoped by `namespace` (usually the board URL),
+    so one database file can hold the harvest of many boards and a second
+    crawl of the same board skips everything already collected.
+
+    Concurrent crawls in one process should share a connection (`db=`):
+    separate connections would block each other on the write lock.
+
+    Adds are committed every `commit_every` keys; 0 commits only on
+    flush()/close(). The due commit runs before the next key is inserted, so
+    it covers only keys whose items the collector already passed on.
+    `before_commit` runs before every commit, e.g. to make the output holding
+    the pins behind the keys durable first; returning False postpones the
+    commit (pins still on their way), the next add() tries again. Keys never
+    committed are rolled back when an owned connection closes.
+    """
+
+    def __init__(self, path: str | None, namespace: str = "", commit_every: int = 200,
+                 db: sqlite3.Connection | None = None,
+                 before_commit: Callable[[], Optional[bool]] | None = None):
+        self.namespace = namespace
+        self.commit_every = commit_every
+        self.before_commit = before_commit
+        self._pending = 0
+        self._owns_db = db is None
+        self._db = db if db is not None else connect_dedupe_db(path)
+        # Cached so next_id() doesn't run COUNT(*) for every new item
+        (self._count,) = self._db.execute(
+            "SELECT COUNT(*) FROM dedupe WHERE namespace = ?", (namespace,)
+        ).fetchone()
+
+    def get(self, key: str) -> Optional[int]:
+        row = self._db.execute(
+            "SELECT item_id FROM dedupe WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, key: str, item_id: int) -> None:
+        if self.commit_every and self._pending >= self.commit_every:
+            self.flush()
+        cur = self._db.execute(
+            "INSERT OR IGNORE INTO dedupe (namespace, key, item_id) VALUES (?, ?, ?)",
+            (self.namespace, key, item_id),
+        )
+        self._count += cur.rowcount
+        self._pending += 1
+
+    def discard(self, key: str) -> None:
+        cur = self._db.execute("DELETE FROM dedupe WHERE namespace = ? AND key = ?", (self.namespace, key))
+        self._count -= cur.rowcount
+
+    def __len__(self) -> int:
+        return self._count
+
+    def flush(self) -> bool:
+        """Commits the pending keys; False if before_commit postponed it."""
+        if self.before_commit is not None and self.before_commit() is False:
+            return False
+        self._db.commit()
+        self._pending = 0
+        return True
+
+    def close(self) -> None:
+        self.flush()
+        if self._owns_db:
+            self._db.close()
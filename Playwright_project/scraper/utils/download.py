@@ -1,4 +1,278 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
 
+import aiohttp
 
-def download_pins():
-    return
\ No newline at end of file
+from scraper.adapters.base import Pin
+from scraper.browser import UA
+from scraper.utils.governor import DomainGovernor
+from scraper.utils.mediastore import Blob, MediaStore, board_slug
+
+CHUNK_SIZE = 64 * 1024                            # Bytes written per chunk (no whole-file buffering)
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}   # Worth another try after backoff
+
+log = logging.getLogger(__name__)
+
+
+def _range_total(content_range: str) -> Optional[int]:
+    # "bytes */1234" (416) or "bytes 100-1233/1234" (206) → 1234; "*" or malformed → None
+    total = content_range.rpartition("/")[2].strip()
+    return int(total) if total.isdigit() else None
+
+
+def _range_start(content_range: str) -> Optional[int]:
+    # "bytes 100-1233/1234" → 100
+    start = content_range.partition(" ")[2].partition("-")[0]
+    return int(start) if start.isdigit() else None
+
+
+@dataclass
+class DownloadResult:
+    pin_id: int
+    url: Optional[str]
+    path: Optional[str]
+    status: str                  # "ok", "skipped" (already on disk), "cached" (URL in the media store), "failed"
+    bytes: int = 0
+    error: Optional[str] = None
+    sha256: Optional[str] = None  # Content hash, with a media store
+
+
+def media_url(pin: Pin) -> Optional[str]:
+    """Video pins download the video itself; blob:/missing video URLs fall back to the image."""
+    if pin.media_type == "video" and pin.video_url and pin.video_url.startswith("http"):
+        return pin.video_url
+    return pin.image_url if pin.image_url and pin.image_url.startswith("http") else None
+
+
+def media_ext(pin: Pin, url: str) -> str:
+    ext = Path(urlparse(url).path).suffix.lower()
+    if not ext or len(ext) > 5:
+        ext = ".mp4" if url == pin.video_url else ".jpg"
+    return ext
+
+
+def target_path(out_dir: Path, pin: Pin, url: str) -> Path:
+    """Stable file name: same pin + URL always maps to the same file, so reruns skip it."""
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+    return out_dir / f"{pin.source}_{pin.id:06d}_{digest}{media_ext(pin, url)}"
+
+
+class Downloader:
+    """
+    Async media downloader.
+
+    - one pooled keep-alive HTTP session for all files
+    - bounded total and per-host concurrency (connector limits)
+    - streaming writes to `<file>.part`, renamed when complete
+    - resumes a leftover `.part` with an HTTP Range request
+    - retries network errors / 429 / 5xx with exponential backoff (+ Retry-After)
+    - optional DomainGovernor: every request waits for its domain's shared
+      budget, 429/503 slow the domain down for all users of the governor
+    - optional MediaStore: bytes are kept once per content hash and
+      `out_dir/<board>/` holds links into it; URLs the store has seen
+      are linked without a request, and concurrent pins sharing a URL
+      share one transfer
+    """
+
+    def __init__(
+        self,
+        out_dir: str,
+        concurrency: int = 16,
+        per_host: int = 6,
+        retries: int = 4,
+        backoff_s: float = 0.5,
+        chunk_size: int = CHUNK_SIZE,
+        read_timeout_s: float = 60,
+        governor: Optional[DomainGovernor] = None,
+        store: Optional[MediaStore] = None,
+    ):
+        self.out_dir = Path(out_dir)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.chunk_size = chunk_size
+        self.read_timeout_s = read_timeout_s
+        self.governor = governor
+        self.store = store
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.per_host,
+            keepalive_timeout=30,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=15, sock_read=self.read_timeout_s),
+            headers={"User-Agent": UA},
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        if self.store is not None:
+            await self.store.drain()
+
+    async def download(self, pin: Pin) -> DownloadResult:
+        url = media_url(pin)
+        if not url:
+            return DownloadResult(pin.id, None, None, "failed", error="no downloadable URL")
+        if self.store is not None:
+            return await self._download_via_store(pin, url)
+
+        path = target_path(self.out_dir, pin, url)
+        if path.exists():
+            return DownloadResult(pin.id, url, str(path), "skipped", path.stat().st_size)
+
+        size, error = await self._fetch_with_retries(url, path)
+        if error is not None:
+            return DownloadResult(pin.id, url, None, "failed", error=error)
+        return DownloadResult(pin.id, url, str(path), "ok", size)
+
+    async def _download_via_store(self, pin: Pin, url: str) -> DownloadResult:
+        view = target_path(self.out_dir / board_slug(pin.board_url), pin, url)
+        if view.exists():
+            return DownloadResult(pin.id, url, str(view), "skipped", view.stat().st_size)
+
+        status = "cached"
+        try:
+            blob = self.store.lookup(url)
+        except sqlite3.Error as e:
+            return DownloadResult(pin.id, url, None, "failed", error=f"media store: {e}")
+        if blob is None:
+            status = "ok"
+            task = self._inflight.get(url)
+            if task is None:
+                task = self._inflight[url] = asyncio.create_task(self._fetch_blob(url, media_ext(pin, url)))
+                task.add_done_callback(lambda _: self._inflight.pop(url, None))
+            blob, error = await asyncio.shield(task)
+            if blob is None:
+                return DownloadResult(pin.id, url, None, "failed", error=error)
+        try:
+            self.store.link(blob, view)
+        except OSError as e:                    # Disk full, permissions, ...
+            return DownloadResult(pin.id, url, None, "failed", error=str(e), sha256=blob.sha256)
+        return DownloadResult(pin.id, url, str(view), status, blob.size, sha256=blob.sha256)
+
+    async def _fetch_blob(self, url: str, ext: str) -> Tuple[Optional[Blob], Optional[str]]:
+        tmp = self.store.tmp_path(url)
+        _, error = await self._fetch_with_retries(url, tmp)
+        if error is not None:
+            return None, error
+        try:
+            return await self.store.ingest(tmp, url, ext), None
+        except (OSError, sqlite3.Error) as e:
+            return None, str(e)
+
+    async def _fetch_with_retries(self, url: str, path: Path) -> Tuple[Optional[int], Optional[str]]:
+        """Downloads `url` to `path`: (size, None) or (None, error)."""
+        last_error = None
+        for attempt in range(self.retries + 1):
+            try:
+                if self.governor is not None:
+                    async with self.governor.slot(url):
+                        size = await self._fetch(url, path)
+                    self.governor.reward(url)
+                else:
+                    size = await self._fetch(url, path)
+                return size, None
+            except _RetryAfter as e:
+                last_error = str(e)
+                delay = e.delay_s
+                if self.governor is not None and e.status in (429, 503):
+                    self.governor.penalize(url, str(e.status), e.delay_s)
+                    delay = 0.0                 # The governor holds the domain back now
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = repr(e)
+                delay = None
+            except (_Fatal, OSError) as e:
+                return None, str(e)
+
+            if attempt < self.retries:
+                if delay is None:
+                    delay = self.backoff_s * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, self.backoff_s))
+
+        return None, last_error
+
+    async def _fetch(self, url: str, path: Path) -> int:
+        part = path.with_name(path.name + ".part")
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        async with self.session.get(url, headers=headers) as resp:
+            content_range = resp.headers.get("Content-Range", "")
+            if resp.status == 416 and offset and _range_total(content_range) == offset:
+                # Range past the end: the .part already holds the whole file
+                os.replace(part, path)
+                return offset
+            # Stale/over-long .part, or a range we didn't ask for: appending would corrupt the file
+            restart = bool(offset) and (
+                resp.status == 416 or resp.status == 206 and _range_start(content_range) != offset
+            )
+            if restart:
+                log.debug("[DL  ] %s: .part of %d bytes doesn't match the server, refetching", url, offset)
+            elif resp.status in RETRY_STATUSES:
+                retry_after = resp.headers.get("Retry-After", "")
+                raise _RetryAfter(resp.status, float(retry_after) if retry_after.isdigit() else None)
+            elif resp.status >= 400:
+                raise _Fatal(f"HTTP {resp.status}")
+            else:
+                # 206 → server honoured the range, append; 200 → full body, start over
+                mode = "ab" if resp.status == 206 else "wb"
+                written = offset if mode == "ab" else 0
+                with open(part, mode) as f:
+                    async for chunk in resp.content.iter_chunked(self.chunk_size):
+                        f.write(chunk)
+                        written += len(chunk)
+
+        if restart:
+            part.unlink()
+            return await self._fetch(url, path)     # No .part now: a plain GET, no second restart
+        os.replace(part, path)
+        return written
+
+
+class _RetryAfter(Exception):
+    def __init__(self, status: int, delay_s: Optional[float]):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.delay_s = delay_s
+
+
+class _Fatal(Exception):
+    pass
+
+
+async def download_pins(pins: Iterable[Pin], out_dir: str, **opts) -> List[DownloadResult]:
+    """
+    Downloads media of all pins into `out_dir`. `opts` go to Downloader
+    (concurrency, per_host, retries, ...). Returns one result per pin.
+    """
+    pins = iter(pins)
+    results: List[DownloadResult] = []
+
+    async with Downloader(out_dir, **opts) as dl:
+        async def worker():
+            # Workers pull from a shared iterator: no task per pin for huge lists
+            for pin in pins:
+                results.append(await dl.download(pin))
+
+        await asyncio.gather(*(worker() for _ in range(dl.concurrency)))
+
+    failed = sum(r.status == "failed" for r in results)
+    if failed:
+        log.warning("[WARN] %d downloads failed", failed)
+    return results
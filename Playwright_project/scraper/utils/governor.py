@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from scraper.utils.metrics import Metrics
+
+log = logging.getLogger(__name__)
+
+# Backoff factor per penalty reason: a 429 halves the rate, an empty round nudges it
+PENALTIES = {"429": 0.5, "503": 0.6, "empty": 0.85}
+THROTTLE_STATUSES = {429: "429", 503: "503"}
+
+# Public suffixes of two labels (not the full Public Suffix List): a site
+# under them is three labels long, pinterest.co.uk ≠ bbc.co.uk
+MULTI_LABEL_SUFFIXES = frozenset({
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "com.au", "net.au", "org.au", "co.nz", "co.jp",
+    "ne.jp", "co.kr", "co.in", "com.br", "com.mx", "com.ar", "com.tr", "com.cn", "com.hk", "com.sg",
+    "com.tw", "co.za", "com.ua", "com.pl", "co.id", "com.my", "com.ph", "co.th", "com.vn", "com.co",
+})
+
+
+def domain_key(url_or_host: str) -> str:
+    """
+    Rate-limit key: the registrable domain, so every CDN host of a site
+    shares one budget (i.pinimg.com, v.pinimg.com → pinimg.com) while sites
+    under a country suffix keep their own (www.pinterest.co.uk →
+    pinterest.co.uk).
+    """
+    host = (urlparse(url_or_host).hostname if "//" in url_or_host else url_or_host) or ""
+    host = host.lower().rstrip(".")
+    if host.replace(".", "").isdigit() or ":" in host:
+        return host                             # IP address: no parent domain
+    labels = host.split(".")
+    keep = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
+
+
+@dataclass
+class _Bucket:
+    base_rate: float                    # Configured requests/s
+    rate: float                         # Current requests/s (AIMD-adjusted)
+    burst: float
+    tokens: float
+    updated: float
+    blocked_until: float = 0.0          # Retry-After: nothing passes before this
+    cut_at: float = float("-inf")       # Last multiplicative decrease
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    slots: Optional[asyncio.Semaphore] = None
+    acquired: int = 0
+    throttled_s: float = 0.0
+    penalties: int = 0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class DomainGovernor:
+    """
+    Shared request budget per domain (token bucket) for every crawl and
+    downloader of a process.
+
+    acquire(url) waits until the domain's bucket has a token; waiters queue
+    in arrival order, so N concurrent crawls of one site together stay at
+    its rate instead of each applying its own sleep. `rates` sets requests/s
+    per domain (key as in domain_key), `default_rate` the rest; `burst`
+    tokens may be spent back to back after an idle spell.
+
+    The rate adapts AIMD-style: penalize() (429/503, empty rounds) cuts it
+    multiplicatively down to `min_factor` x configured, at most once per
+    `cooldown_s` per domain (a burst of 429s on many parallel requests is
+    one congestion signal, not N), and honours Retry-After by closing the
+    bucket for that long; reward() (a productive request) adds `recover` x
+    configured back. Sustained throughput stays just under the point where
+    the site starts throttling.
+
+    slot(url) additionally bounds in-flight requests per domain
+    (`max_inflight`, e.g. downloads spread over several CDN hosts).
+
+    Waits are recorded as governor_wait_seconds / governor_throttled_seconds_total
+    and penalties as governor_penalties_total, labelled by domain.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default_rate: float = 2.0,
+                 burst: float = 3.0, min_factor: float = 0.1, recover: float = 0.05,
+                 max_inflight: int = 8, cooldown_s: float = 2.0, metrics: Optional[Metrics] = None):
+        self.rates = {domain_key(k): v for k, v in (rates or {}).items()}
+        self.default_rate = default_rate
+        self.burst = burst
+        self.min_factor = min_factor
+        self.recover = recover
+        self.max_inflight = max_inflight
+        self.cooldown_s = cooldown_s
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._buckets: Dict[str, _Bucket] = {}
+
+    def _bucket(self, domain: str) -> _Bucket:
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            rate = self.rates.get(domain, self.default_rate)
+            bucket = self._buckets[domain] = _Bucket(
+                base_rate=rate, rate=rate, burst=self.burst, tokens=self.burst, updated=time.monotonic(),
+            )
+        return bucket
+
+    async def acquire(self, url: str, cost: float = 1.0) -> float:
+        """Waits for the domain's budget; returns the seconds spent waiting."""
+        domain = domain_key(url)
+        bucket = self._bucket(domain)
+        waited = 0.0
+        async with bucket.lock:                 # FIFO: one waiter drains the bucket at a time
+            while True:
+                now = time.monotonic()
+                bucket.refill(now)
+                if now < bucket.blocked_until:
+                    delay = bucket.blocked_until - now
+                elif bucket.tokens >= cost:
+                    bucket.tokens -= cost
+                    break
+                else:
+                    delay = (cost - bucket.tokens) / bucket.rate
+                await asyncio.sleep(delay)
+                waited += delay
+        bucket.acquired += 1
+        bucket.throttled_s += waited
+        self.metrics.observe("governor_wait_seconds", waited, domain=domain)
+        if waited:
+            self.metrics.inc("governor_throttled_seconds_total", waited, domain=domain)
+        return waited
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """acquire() plus a per-domain in-flight limit held for the request's duration."""
+        bucket = self._bucket(domain_key(url))
+        if bucket.slots is None:
+            bucket.slots = asyncio.Semaphore(self.max_inflight)
+        async with bucket.slots:
+            await self.acquire(url)
+            yield
+
+    def penalize(self, url: str, reason: str = "429", retry_after_s: Optional[float] = None) -> None:
+        domain = domain_key(url)
+        bucket = self._bucket(domain)
+        now = time.monotonic()
+        bucket.tokens = min(bucket.tokens, 0.0)     # No burst right after a throttle signal
+        if retry_after_s:
+            bucket.blocked_until = max(bucket.blocked_until, now + retry_after_s)
+        if now - bucket.cut_at < self.cooldown_s:
+            return                                  # Same congestion episode: already cut
+        bucket.cut_at = now
+        floor = bucket.base_rate * self.min_factor
+        bucket.rate = max(floor, bucket.rate * PENALTIES.get(reason, 0.5))
+        bucket.penalties += 1
+        self.metrics.inc("governor_penalties_total", domain=domain, reason=reason)
+        log.debug("[GOV ] %s: %s → %.2f req/s", domain, reason, bucket.rate)
+
+    def reward(self, url: str) -> None:
+        bucket = self._bucket(domain_key(url))
+        if bucket.rate < bucket.base_rate:
+            bucket.rate = min(bucket.base_rate, bucket.rate + bucket.base_rate * self.recover)
+
+    def on_response(self, response) -> None:
+        """Playwright "response" listener: throttling statuses seen by the browser count too."""
+        reason = THROTTLE_STATUSES.get(response.status)
+        if reason is None:
+            return
+        retry_after = response.headers.get("retry-after", "")
+        self.penalize(response.url, reason, float(retry_after) if retry_after.isdigit() else None)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per domain: current vs configured rate, requests, seconds throttled, penalties."""
+        return {
+            domain: {
+                "rate": round(b.rate, 3),
+                "base_rate": b.base_rate,
+                "requests": b.acquired,
+                "throttled_s": round(b.throttled_s, 3),
+                "penalties": b.penalties,
+            }
+            for domain, b in self._buckets.items()
+        }
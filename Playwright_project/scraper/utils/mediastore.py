@@ -0,0 +1,301 @@
+"""
+Content-addressed media store: every distinct file is kept once, named by
+its SHA-256, and boards get views of hardlinks (or symlinks) into it.
+
+    root/blobs/ab/cd/<sha256>.jpg       one copy per distinct content
+    root/index.db                       url → sha256, blob sizes, perceptual hashes
+    root/tmp/                           downloads in progress
+
+    python runner.py --url ... --download-dir views/ --media-store media/ --phash
+    python -m scraper.utils.mediastore media/ stats
+    python -m scraper.utils.mediastore media/ dupes
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+try:
+    from PIL import Image               # Optional: only needed for perceptual hashes
+except ImportError:
+    Image = None
+
+log = logging.getLogger(__name__)
+
+LINK_MODES = ("hardlink", "symlink", "copy")
+HASH_CHUNK = 1024 * 1024
+PHASH_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+# dHash is 64 bits, indexed as 8 bands of 8: any pair within 7 bits shares a band
+_BANDS = 8
+MAX_NEAR_DISTANCE = _BANDS - 1
+
+
+def _require_pillow() -> None:
+    if Image is None:
+        raise RuntimeError("Perceptual hashing needs the 'Pillow' package (pip install Pillow)")
+
+
+def board_slug(board_url: str) -> str:
+    """Folder name for a board's view: readable host/path plus a short hash against collisions."""
+    parts = urlparse(board_url)
+    readable = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{parts.hostname or ''}{parts.path}").strip("_.")
+    digest = hashlib.sha1(board_url.encode("utf-8")).hexdigest()[:8]
+    return f"{readable[:80]}_{digest}"
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def dhash(path: str, size: int = 8) -> int:
+    """Difference hash: one bit per horizontally adjacent pixel pair of a (size+1)xsize greyscale thumbnail."""
+    _require_pillow()
+    with Image.open(path) as img:
+        img.draft("L", (size * 4, size * 4))    # JPEG: decode at reduced scale
+        pixels = list(img.convert("L").resize((size + 1, size), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            value = (value << 1) | (left > pixels[row * (size + 1) + col + 1])
+    return value
+
+
+def _phash_or_none(path: str) -> Optional[int]:
+    # Runs in a worker process; unreadable/animated oddities just get no hash
+    try:
+        return dhash(path)
+    except Exception:
+        return None
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _bands(value: int) -> List[Tuple[int, int]]:
+    return [(i, (value >> (8 * i)) & 0xFF) for i in range(_BANDS)]
+
+
+@dataclass
+class Blob:
+    sha256: str
+    size: int
+    ext: str
+    phash: Optional[int] = None
+
+
+class MediaStore:
+    """
+    Downloads deduplicated by content.
+
+    ingest() hashes a finished download and moves it into the store, or
+    drops it if the same bytes are already there; the URL is recorded
+    either way, so lookup(url) lets a later crawl skip the network for
+    any URL seen before. link() materializes a blob at a view path:
+    `link` = hardlink (falls back to symlink across filesystems), symlink
+    or copy.
+
+    With `phash`, new images get a 64-bit difference hash computed in a
+    process pool (`phash_workers`); a blob within `near_distance` bits of
+    an earlier one is recorded as similar_to it (rescaled/recompressed
+    repins). Needs Pillow. Call drain() before reading near-duplicates.
+    """
+
+    def __init__(self, root: str, link: str = "hardlink", phash: bool = False,
+                 phash_workers: Optional[int] = None, near_distance: int = 4):
+        if link not in LINK_MODES:
+            raise ValueError(f"Unknown link mode: {link} (use one of {', '.join(LINK_MODES)})")
+        if not 0 <= near_distance <= MAX_NEAR_DISTANCE:
+            raise ValueError(f"near_distance must be 0..{MAX_NEAR_DISTANCE}")
+        if phash:
+            _require_pillow()
+        self.root = Path(root)
+        self.link_mode = link
+        self.phash = phash
+        self.phash_workers = phash_workers
+        self.near_distance = near_distance
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        (self.root / "tmp").mkdir(exist_ok=True)
+        self._db = sqlite3.connect(self.root / "index.db")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, ext TEXT NOT NULL,"
+            " phash TEXT, similar_to TEXT, created_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS urls ("
+            " url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, fetched_at REAL NOT NULL) WITHOUT ROWID;"
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Set[asyncio.Future] = set()
+        self._hashing: Set[str] = set()         # Blobs with a perceptual hash queued
+        self._band_index: Dict[Tuple[int, int], List[Tuple[str, int]]] = {}
+        for sha, ph in self._db.execute("SELECT sha256, phash FROM blobs WHERE phash IS NOT NULL"):
+            self._index_phash(sha, int(ph, 16))
+
+    def blob_path(self, blob: Blob) -> Path:
+        return self.root / "blobs" / blob.sha256[:2] / blob.sha256[2:4] / f"{blob.sha256}{blob.ext}"
+
+    def tmp_path(self, url: str) -> Path:
+        """Stable per-URL download target, so an interrupted transfer can resume."""
+        return self.root / "tmp" / hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _blob(self, sha: str) -> Optional[Blob]:
+        row = self._db.execute("SELECT sha256, size, ext, phash FROM blobs WHERE sha256 = ?", (sha,)).fetchone()
+        if row is None:
+            return None
+        return Blob(row[0], row[1], row[2], int(row[3], 16) if row[3] else None)
+
+    def lookup(self, url: str) -> Optional[Blob]:
+        """The stored blob for a URL fetched before, or None."""
+        row = self._db.execute("SELECT sha256 FROM urls WHERE url = ?", (url,)).fetchone()
+        blob = self._blob(row[0]) if row else None
+        if blob is not None and not self.blob_path(blob).exists():
+            return None                         # Blob deleted by hand: fetch again
+        return blob
+
+    async def ingest(self, path: Path, url: str, ext: str) -> Blob:
+        """Moves a finished download into the store (or drops it as a duplicate) and indexes `url`."""
+        sha = await asyncio.to_thread(file_sha256, str(path))
+        # No await from here on: concurrent ingests of the same bytes see each other's row
+        blob = self._blob(sha)
+        if blob is not None and self.blob_path(blob).exists():
+            path.unlink()
+        else:
+            if blob is None:
+                blob = Blob(sha, path.stat().st_size, ext)
+                self._db.execute(
+                    "INSERT INTO blobs (sha256, size, ext, created_at) VALUES (?, ?, ?, ?)",
+                    (sha, blob.size, ext, time.time()),
+                )
+            target = self.blob_path(blob)               # Known blob deleted by hand: put it back
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+            if self.phash and blob.phash is None and blob.ext in PHASH_EXTS:
+                self._schedule_phash(blob)
+        self._db.execute("INSERT OR REPLACE INTO urls (url, sha256, fetched_at) VALUES (?, ?, ?)",
+                         (url, sha, time.time()))
+        self._db.commit()
+        return blob
+
+    def link(self, blob: Blob, dest: Path) -> Path:
+        """Puts `blob` at `dest` (a board view entry); an existing entry is left alone."""
+        if dest.exists() or dest.is_symlink():
+            return dest
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        src = self.blob_path(blob)
+        if self.link_mode == "hardlink":
+            try:
+                os.link(src, dest)
+                return dest
+            except OSError:
+                pass                            # Other filesystem / no hardlinks: symlink instead
+        if self.link_mode in ("hardlink", "symlink"):
+            try:
+                os.symlink(src.resolve(), dest)
+                return dest
+            except OSError:
+                pass
+        shutil.copyfile(src, dest)
+        return dest
+
+    # --- perceptual hashes ---
+
+    def _schedule_phash(self, blob: Blob) -> None:
+        if blob.sha256 in self._hashing:
+            return
+        self._hashing.add(blob.sha256)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.phash_workers)
+        fut = asyncio.get_running_loop().run_in_executor(self._pool, _phash_or_none, str(self.blob_path(blob)))
+        self._pending.add(fut)
+        fut.add_done_callback(lambda f: self._phash_done(blob.sha256, f))
+
+    def _phash_done(self, sha: str, fut: asyncio.Future) -> None:
+        self._pending.discard(fut)
+        self._hashing.discard(sha)
+        if fut.cancelled() or fut.exception() is not None or fut.result() is None:
+            return
+        value = fut.result()
+        similar = self._nearest(value, exclude=sha)
+        self._db.execute("UPDATE blobs SET phash = ?, similar_to = ? WHERE sha256 = ?",
+                         (f"{value:016x}", similar, sha))
+        self._db.commit()
+        self._index_phash(sha, value)
+        if similar:
+            log.debug("[STORE] %s looks like %s", sha[:12], similar[:12])
+
+    def _nearest(self, value: int, exclude: Optional[str] = None) -> Optional[str]:
+        best: Optional[Tuple[int, str]] = None
+        for band in _bands(value):
+            for sha, other in self._band_index.get(band, ()):
+                if sha == exclude:
+                    continue
+                d = hamming(value, other)
+                if d <= self.near_distance and (best is None or d < best[0]):
+                    best = (d, sha)
+        return best[1] if best else None
+
+    def _index_phash(self, sha: str, value: int) -> None:
+        for band in _bands(value):
+            self._band_index.setdefault(band, []).append((sha, value))
+
+    async def drain(self) -> None:
+        """Waits for queued perceptual hashes."""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def near_duplicates(self) -> List[Tuple[str, str]]:
+        """(blob, earlier blob it looks like) pairs."""
+        return self._db.execute(
+            "SELECT sha256, similar_to FROM blobs WHERE similar_to IS NOT NULL ORDER BY created_at"
+        ).fetchall()
+
+    def stats(self) -> Dict[str, int]:
+        blobs, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        (urls,) = self._db.execute("SELECT COUNT(*) FROM urls").fetchone()
+        (near,) = self._db.execute("SELECT COUNT(*) FROM blobs WHERE similar_to IS NOT NULL").fetchone()
+        return {"blobs": blobs, "bytes": size, "urls": urls, "near_duplicates": near}
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        self._db.commit()
+        self._db.close()
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(prog="python -m scraper.utils.mediastore", description="Inspect a media store")
+    p.add_argument("root")
+    p.add_argument("cmd", choices=["stats", "dupes"])
+    args = p.parse_args()
+    store = MediaStore(args.root)
+    try:
+        if args.cmd == "stats":
+            s = store.stats()
+            print(f"{s['blobs']} blobs, {s['bytes'] / 1e6:.1f} MB, {s['urls']} URLs, "
+                  f"{s['near_duplicates']} near-duplicate(s)")
+        else:
+            for sha, similar in store.near_duplicates():
+                print(f"{store.blob_path(store._blob(sha))}  ~  {store.blob_path(store._blob(similar))}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
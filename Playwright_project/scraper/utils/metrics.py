@@ -0,0 +1,294 @@
+import bisect
+import json
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Seconds: covers a single CDP call up to a slow page load
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Small counts/ratios (e.g. protocol calls per card)
+RATIO_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 25.0)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus semantics: bucket i counts values <= buckets[i])."""
+
+    def __init__(self, buckets: Sequence[float] = TIME_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)     # Last slot: +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        if other.buckets != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 6),
+        }
+
+
+class Metrics:
+    """
+    In-process counters + histograms with optional labels, and pluggable sinks.
+
+    Instrumented code only calls inc()/observe()/timer()/event(); where the
+    numbers go is decided by the sinks (LogMetricsSink, JsonlMetricsSink,
+    PrometheusTextSink). A Metrics without sinks just accumulates, so the
+    collectors always record and callers can read snapshot() afterwards.
+
+    child(**labels) returns a view sharing storage and sinks that adds
+    labels to everything it records (e.g. adapter="pinterest").
+    """
+
+    def __init__(self, sinks: Sequence["MetricsSink"] = (), labels: Optional[Dict[str, Any]] = None):
+        self.sinks: List[MetricsSink] = list(sinks)
+        self.labels = dict(labels or {})
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+
+    def child(self, **labels) -> "Metrics":
+        view = Metrics.__new__(Metrics)
+        view.sinks = self.sinks
+        view.labels = {**self.labels, **labels}
+        view._counters = self._counters
+        view._histograms = self._histograms
+        return view
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _label_key({**self.labels, **labels}))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = TIME_BUCKETS, **labels) -> None:
+        key = (name, _label_key({**self.labels, **labels}))
+        hist = self._histograms.get(key)
+        if hist is None:
+            hist = self._histograms[key] = Histogram(buckets)
+        hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observes the wall time of the block in seconds (also on error)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def event(self, name: str, **fields) -> None:
+        """One structured record (e.g. a finished round) handed to every sink."""
+        if not self.sinks:
+            return
+        record = {**self.labels, **fields}
+        for sink in self.sinks:
+            sink.event(name, record)
+
+    def merge(self, other: "Metrics") -> None:
+        """Adds another registry's counters and histograms (e.g. one sent back by a worker process)."""
+        for key, value in other._counters.items():
+            self._counters[key] = self._counters.get(key, 0) + value
+        for key, hist in other._histograms.items():
+            mine = self._histograms.get(key)
+            if mine is None:
+                mine = self._histograms[key] = Histogram(hist.buckets)
+            mine.merge(hist)
+
+    def counter(self, name: str, **labels) -> float:
+        return self._counters.get((name, _label_key({**self.labels, **labels})), 0)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get((name, _label_key({**self.labels, **labels})))
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ],
+            "histograms": [
+                {"name": name, "labels": dict(labels), **hist.summary()}
+                for (name, labels), hist in sorted(self._histograms.items(), key=lambda kv: kv[0])
+            ],
+        }
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush(self)
+
+    def close(self) -> None:
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+
+
+class MetricsSink:
+    """Receives per-event records and full snapshots on flush()."""
+
+    def event(self, name: str, record: Dict[str, Any]) -> None:
+        pass
+
+    def flush(self, metrics: Metrics) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _fmt_labels(labels: Dict[str, Any]) -> str:
+    return " ".join(f"{k}={v}" for k, v in labels.items())
+
+
+class LogMetricsSink(MetricsSink):
+    """Writes events and the final summary through `logging` at a configurable level."""
+
+    def __init__(self, level: int = logging.INFO, logger: str = "scraper.metrics"):
+        self.level = level
+        self.log = logging.getLogger(logger)
+
+    def event(self, name: str, record: Dict[str, Any]) -> None:
+        self.log.log(self.level, "[METRIC] %s %s", name, _fmt_labels(record))
+
+    def flush(self, metrics: Metrics) -> None:
+        snap = metrics.snapshot()
+        for c in snap["counters"]:
+            self.log.log(self.level, "[METRIC] %s{%s} = %g", c["name"], _fmt_labels(c["labels"]), c["value"])
+        for h in snap["histograms"]:
+            self.log.log(
+                self.level, "[METRIC] %s{%s} n=%d mean=%.4f p50<=%g p95<=%g max=%.4f",
+                h["name"], _fmt_labels(h["labels"]), h["count"], h["mean"], h["p50"], h["p95"], h["max"],
+            )
+
+
+class JsonlMetricsSink(MetricsSink):
+    """One JSON object per line: {"ts", "event", ...} records and {"ts", "snapshot"} on flush."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def _write(self, obj: Dict[str, Any]) -> None:
+        self._f.write(json.dumps(obj, ensure_ascii=False, default=str) + "\n")
+
+    def event(self, name: str, record: Dict[str, Any]) -> None:
+        self._write({"ts": time.time(), "event": name, **record})
+
+    def flush(self, metrics: Metrics) -> None:
+        self._write({"ts": time.time(), "snapshot": metrics.snapshot()})
+        self._f.flush()
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+
+def _prom_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def _prom_value(v: float) -> str:
+    return "+Inf" if v == math.inf else repr(float(v))
+
+
+class PrometheusTextSink(MetricsSink):
+    """
+    Prometheus text exposition format, rewritten atomically on every flush
+    (suitable for node_exporter's textfile collector). Events are ignored.
+    """
+
+    def __init__(self, path: str, prefix: str = "scraper_"):
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def render(self, metrics: Metrics) -> str:
+        lines: List[str] = []
+        typed = set()
+        for (name, labels), value in sorted(metrics._counters.items()):
+            full = self.prefix + name
+            if full not in typed:
+                typed.add(full)
+                lines.append(f"# TYPE {full} counter")
+            lines.append(f"{full}{_prom_labels(labels)} {_prom_value(value)}")
+        for (name, labels), hist in sorted(metrics._histograms.items(), key=lambda kv: kv[0]):
+            full = self.prefix + name
+            if full not in typed:
+                typed.add(full)
+                lines.append(f"# TYPE {full} histogram")
+            cumulative = 0
+            for bound, n in zip(hist.buckets + (math.inf,), hist.counts):
+                cumulative += n
+                le = (("le", _prom_value(bound)),)
+                lines.append(f"{full}_bucket{_prom_labels(labels, le)} {cumulative}")
+            lines.append(f"{full}_sum{_prom_labels(labels)} {_prom_value(hist.sum)}")
+            lines.append(f"{full}_count{_prom_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self, metrics: Metrics) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render(metrics))
+        os.replace(tmp, self.path)
+
+
+def sink_from_spec(spec: str) -> MetricsSink:
+    """
+    CLI helper:
+        "log" / "log:DEBUG" → LogMetricsSink at that level (default INFO)
+        "*.prom"            → PrometheusTextSink
+        "*.jsonl"           → JsonlMetricsSink
+    """
+    if spec == "log" or spec.startswith("log:"):
+        level_name = spec.partition(":")[2].upper() or "INFO"
+        level = logging.getLevelName(level_name)
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level: {level_name}")
+        return LogMetricsSink(level)
+    if spec.endswith(".prom"):
+        return PrometheusTextSink(spec)
+    if spec.endswith(".jsonl"):
+        return JsonlMetricsSink(spec)
+    raise ValueError(f"Unknown metrics sink: {spec} (use log[:LEVEL], *.jsonl or *.prom)")
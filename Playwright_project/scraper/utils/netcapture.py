@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import replace
+from collections import deque
+from typing import Any, Callable, Deque, Iterable, List, Optional, TypeVar
+
+from playwright._impl._errors import TargetClosedError
+from scraper.utils.dedupe import DedupeIndex
+from scraper.utils.governor import DomainGovernor
+from scraper.utils.metrics import Metrics
+from scraper.utils.stream import CollectStats, ItemCollector, MakeKey, OnItem, record_round
+
+T = TypeVar("T")
+log = logging.getLogger(__name__)
+
+# payload, board_url -> items parsed from one feed response
+ParsePayload = Callable[[Any, str], Iterable[T]]
+FeedEnded    = Callable[[Any], bool]
+
+
+class FeedCapture:
+    """
+    Collects JSON feed payloads from network responses.
+
+    Register `on_response` on the browser context *before* navigation
+    (see `open_page(on_response=...)`) so the first feed page is caught too.
+    """
+
+    def __init__(self, url_patterns: List[str]):
+        self.url_patterns = url_patterns      # Substrings identifying feed endpoints
+        self.payloads: Deque[Any] = deque()
+        self._arrived = asyncio.Event()
+        self.responses = 0                    # Matching responses seen
+        self.failures = 0                     # Matching responses that weren't valid JSON
+
+    def matches(self, url: str) -> bool:
+        return any(p in url for p in self.url_patterns)
+
+    async def on_response(self, response) -> None:
+        if not self.matches(response.url):
+            return
+        self.responses += 1
+        try:
+            if not response.ok:
+                raise ValueError(f"HTTP {response.status}")
+            payload = await response.json()
+        except Exception:
+            # Body may be gone (navigation) or not JSON; scrolling will retry the page
+            self.failures += 1
+            return
+        self.payloads.append(payload)
+        self._arrived.set()
+
+    async def wait_for_payload(self, timeout_ms: int) -> bool:
+        """Waits until at least one payload is queued; False on timeout."""
+        if self.payloads:
+            return True
+        self._arrived.clear()
+        try:
+            await asyncio.wait_for(self._arrived.wait(), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def drain(self) -> List[Any]:
+        out = list(self.payloads)
+        self.payloads.clear()
+        return out
+
+
+async def network_scroll_and_collect(
+    page,
+    capture: FeedCapture,
+    parse_payload: ParsePayload,
+    make_key: MakeKey,
+    *,
+    feed_ended: Optional[FeedEnded] = None,
+    initial_payloads: Iterable[Any] = (),
+    stats: Optional[CollectStats] = None,
+    index: Optional[DedupeIndex] = None,
+    on_item: Optional[OnItem] = None,
+    keep_items: bool = True,
+    container: Optional[Any] = None,
+    max_items: int = 1000,
+    max_rounds: int = 3000,
+    stagnant_tolerance: int = 6,
+    response_timeout_ms: int = 4000,
+    wait_jitter_ms: int = 600,
+    metrics: Optional[Metrics] = None,
+    governor: Optional[DomainGovernor] = None,
+) -> List[T]:
+    """
+    Harvests items straight from intercepted feed payloads.
+
+    Scrolling is only used to trigger pagination: each round jumps to the
+    bottom of the page and waits for the next feed response (capped by
+    `response_timeout_ms`). No card is read from the DOM.
+
+    `metrics` gets the same per-round records as the DOM collector; the wait
+    is the time until the next feed response arrived.
+
+    `governor` paces the pagination scrolls per domain like in the DOM
+    collector; a round without a feed response counts as "empty".
+    """
+    collector = ItemCollector(make_key, index=index, stats=stats, on_item=on_item,
+                              keep_items=keep_items, container=container)
+    stats = collector.stats
+    metrics = metrics if metrics is not None else Metrics()
+    board_url = page.url
+    pending = list(initial_payloads)
+    stagnant_counter = 0
+    last_total_found = 0
+    ended = False
+    working_on = 0
+
+    for round_idx in range(max_rounds):
+        stats.rounds += 1
+        before = replace(stats)
+        t_round = time.perf_counter()
+        pending.extend(capture.drain())
+        log.info("--- Round %d | Feed payloads: %d ---", round_idx, len(pending))
+
+        for payload in pending:
+            if feed_ended is not None and feed_ended(payload):
+                ended = True
+            try:
+                items = list(parse_payload(payload, board_url))
+            except Exception as e:
+                stats.errors += 1
+                log.warning("[ERR ] Round %d: Payload parse failed -> %s", round_idx, e)
+                continue
+
+            for item in items:
+                working_on += 1
+                stats.nodes_read += 1
+                await collector.push(item, working_on)
+                if collector.accepted >= max_items:
+                    log.info("[DONE] Target reached: %d items collected.", collector.accepted)
+                    record_round(metrics, stats, before, round_idx, time.perf_counter() - t_round, 0.0)
+                    stats.stop_reason = "target"
+                    return collector.out
+        pending = []
+        extract_s = time.perf_counter() - t_round
+
+        if ended:
+            log.info("[TERMINATE] Feed reports no more pages. Ending crawl.")
+            record_round(metrics, stats, before, round_idx, extract_s, 0.0)
+            stats.stop_reason = "feed_end"
+            break
+
+        # --- STAGNANT CHECK ---
+        if collector.progress <= last_total_found:
+            stagnant_counter += 1
+            log.info("[*] No new unique items this round. Stagnant: %d/%d", stagnant_counter, stagnant_tolerance)
+        else:
+            stagnant_counter = 0
+            last_total_found = collector.progress
+
+        if stagnant_counter >= stagnant_tolerance:
+            log.info("[TERMINATE] No new items found for %d rounds. Ending crawl.", stagnant_tolerance)
+            record_round(metrics, stats, before, round_idx, extract_s, 0.0)
+            stats.stop_reason = "stagnant"
+            break
+
+        # Jump to the bottom to trigger the next feed page, then wait for it
+        try:
+            if governor is not None:
+                stats.throttled_ms += int(await governor.acquire(board_url) * 1000)
+            stats.cdp_calls += 1
+            await page.evaluate("() => window.scrollTo(0, document.documentElement.scrollHeight)")
+            arrived = await capture.wait_for_payload(response_timeout_ms)
+            if governor is not None and arrived:
+                governor.reward(board_url)
+            elif governor is not None:
+                governor.penalize(board_url, "empty")   # No feed page within the timeout
+            if arrived:
+                await page.wait_for_timeout(random.randint(0, wait_jitter_ms))
+        except TargetClosedError:
+            stats.stop_reason = "closed"
+            break
+        wait_s = time.perf_counter() - t_round - extract_s
+        stats.wait_ms += int(wait_s * 1000)
+        record_round(metrics, stats, before, round_idx, extract_s, wait_s)
+
+    stats.stop_reason = stats.stop_reason or "max_rounds"
+    return collector.out
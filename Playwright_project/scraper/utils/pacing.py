@@ -0,0 +1,130 @@
+import random
+from typing import Tuple
+
+# Scrolls, then resolves once cards matching the selector were added (or their
+# media/link attributes changed, e.g. a recycled node) and the DOM stayed quiet
+# for `settleMs`, or when `capMs` runs out. The observer is attached before the
+# scroll so fast responses aren't missed.
+_SCROLL_AND_WAIT_JS = """
+([selector, stepPx, capMs, settleMs]) => new Promise((resolve) => {
+    const start = performance.now();
+    let loaded = false;
+    let settleTimer = null;
+    const finish = () => {
+        observer.disconnect();
+        clearTimeout(capTimer);
+        clearTimeout(settleTimer);
+        resolve({ ms: Math.round(performance.now() - start), loaded, scrollY: window.scrollY });
+    };
+    const isCard = (node) => node.nodeType === 1 &&
+        (node.matches(selector) || node.closest(selector) || node.querySelector(selector));
+    const observer = new MutationObserver((mutations) => {
+        const hit = mutations.some((m) => m.type === "attributes"
+            ? isCard(m.target)
+            : Array.from(m.addedNodes).some(isCard));
+        if (!hit) return;
+        loaded = true;
+        clearTimeout(settleTimer);
+        settleTimer = setTimeout(finish, settleMs);
+    });
+    observer.observe(document.documentElement, {
+        childList: true,
+        subtree: true,
+        attributes: true,
+        attributeFilter: ["src", "srcset", "href"],
+    });
+    const capTimer = setTimeout(finish, capMs);
+    window.scrollBy(0, stepPx);
+})
+"""
+
+
+class FixedPacer:
+    """Original behaviour: constant step, `wait_min_ms + random(0, wait_jitter_ms)` after every scroll."""
+
+    def __init__(self, step_ratio: float = 0.6, wait_min_ms: int = 800, wait_jitter_ms: int = 1500):
+        self.step_ratio = step_ratio
+        self.wait_min_ms = wait_min_ms
+        self.wait_jitter_ms = wait_jitter_ms
+
+    async def scroll_and_wait(self, page, item_selector: str, step_px: int) -> Tuple[int, int]:
+        """Returns (new scroll offset, waited ms)."""
+        scroll_y = await page.evaluate("(y) => { window.scrollBy(0, y); return window.scrollY; }", step_px)
+        delay = self.wait_min_ms + random.randint(0, self.wait_jitter_ms)
+        await page.wait_for_timeout(delay)
+        return scroll_y, delay
+
+    def update(self, new_items: int) -> None:
+        pass
+
+
+class AdaptivePacer:
+    """
+    Waits on real signals instead of a fixed sleep, and tunes the scroll step.
+
+    scroll_and_wait(): scrolls one step and returns as soon as new cards are
+        attached and the DOM settles (MutationObserver in the page), capped
+        at `cap_ms`, plus a small human-like jitter and a `floor_ms` minimum.
+    update(): grows `step_ratio` after rounds with many new items, shrinks
+        it after empty rounds, within [min_ratio, max_ratio].
+    """
+
+    def __init__(
+        self,
+        step_ratio: float = 0.6,
+        min_ratio: float = 0.3,
+        max_ratio: float = 1.5,
+        cap_ms: int = 2500,
+        settle_ms: int = 150,
+        floor_ms: int = 120,
+        jitter_ms: int = 300,
+        many_items: int = 8,
+        grow: float = 1.2,
+        shrink: float = 0.75,
+    ):
+        self.step_ratio = step_ratio
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.cap_ms = cap_ms
+        self.settle_ms = settle_ms
+        self.floor_ms = floor_ms
+        self.jitter_ms = jitter_ms
+        self.many_items = many_items
+        self.grow = grow
+        self.shrink = shrink
+        self.timeouts = 0          # Rounds where nothing arrived before the cap
+
+    async def scroll_and_wait(self, page, item_selector: str, step_px: int) -> Tuple[int, int]:
+        """Returns (new scroll offset, waited ms)."""
+        result = await page.evaluate(
+            _SCROLL_AND_WAIT_JS, [item_selector, step_px, self.cap_ms, self.settle_ms]
+        )
+        if not result["loaded"]:
+            self.timeouts += 1
+        extra = max(0, self.floor_ms - result["ms"]) + random.randint(0, self.jitter_ms)
+        extra = min(extra, max(0, self.cap_ms - result["ms"]))     # A round never outlasts the cap
+        if extra:
+            await page.wait_for_timeout(extra)
+        return result["scrollY"], result["ms"] + extra
+
+    def update(self, new_items: int) -> None:
+        if new_items >= self.many_items:
+            self.step_ratio = min(self.max_ratio, self.step_ratio * self.grow)
+        elif new_items == 0:
+            self.step_ratio = max(self.min_ratio, self.step_ratio * self.shrink)
+
+
+def make_pacer(pacing: str, step_ratio: float, wait_min_ms: int, wait_jitter_ms: int):
+    """
+    Builds the pacer for a collector from its tuning values. The adaptive cap
+    is the old worst-case sleep, so adaptive pacing is never slower per round.
+    """
+    if pacing == "fixed":
+        return FixedPacer(step_ratio, wait_min_ms, wait_jitter_ms)
+    if pacing == "adaptive":
+        return AdaptivePacer(
+            step_ratio=step_ratio,
+            cap_ms=wait_min_ms + wait_jitter_ms,
+            jitter_ms=wait_jitter_ms // 4,
+        )
+    raise ValueError(f"Unknown pacing: {pacing}")
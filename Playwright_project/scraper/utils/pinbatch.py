@@ -0,0 +1,109 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+from scraper.adapters.base import PIN_FIELDS, Pin, pin_json
+
+# Low-cardinality columns stored as small integer codes into a value table
+CATEGORICAL = ("source", "board_url", "media_type")
+
+
+class _Categorical:
+    """Dictionary-encoded string column: 4 bytes per row instead of a pointer."""
+
+    def __init__(self):
+        self.codes = array("I")
+        self.values: List[Any] = []
+        self._index: Dict[Any, int] = {}
+
+    def append(self, value) -> None:
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, i: int):
+        return self.values[self.codes[i]]
+
+    def to_list(self) -> List[Any]:
+        values = self.values
+        return [values[c] for c in self.codes]
+
+
+class PinBatch:
+    """
+    Columnar container for many pins (drop-in for the collector's result list).
+
+    Pins are not kept as objects: ids live in an int64 array, source /
+    board_url / media_type are dictionary-encoded, the remaining fields are
+    one list per column. Iterating or indexing materializes Pin objects on
+    demand (a slice gives a new PinBatch); columns() exports the data
+    column-wise (e.g. for DataFrames or Arrow) and iter_json() serializes
+    rows without building dicts.
+    """
+
+    def __init__(self, pins: Iterable[Pin] = ()):
+        self.ids = array("q")
+        self._columns = {
+            name: (_Categorical() if name in CATEGORICAL else [])
+            for name in PIN_FIELDS[1:]
+        }
+        self._ordered = [self._columns[name] for name in PIN_FIELDS[1:]]
+        self.extend(pins)
+
+    def append(self, pin: Pin) -> None:
+        self.append_row(pin.to_row())
+
+    def append_row(self, row: Tuple) -> None:
+        self.ids.append(row[0])
+        for column, value in zip(self._ordered, row[1:]):
+            column.append(value)
+
+    def extend(self, pins: Iterable[Pin]) -> None:
+        if isinstance(pins, PinBatch):
+            for row in pins.rows():             # Batch → batch: no Pin objects in between
+                self.append_row(row)
+            return
+        for pin in pins:
+            self.append(pin)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, i: int) -> Tuple:
+        return (self.ids[i],) + tuple(column[i] for column in self._ordered)
+
+    def rows(self) -> Iterator[Tuple]:
+        for i in range(len(self.ids)):
+            yield self.row(i)
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Pin, "PinBatch"]:
+        if isinstance(i, slice):                # Like a list: a slice is a new batch
+            batch = PinBatch()
+            for j in range(*i.indices(len(self.ids))):
+                batch.append_row(self.row(j))
+            return batch
+        if i < 0:
+            i += len(self.ids)
+            if i < 0:                           # Wrapping twice would hand out another row
+                raise IndexError("PinBatch index out of range")
+        return Pin.from_row(self.row(i))
+
+    def __iter__(self) -> Iterator[Pin]:
+        for row in self.rows():
+            yield Pin.from_row(row)
+
+    def column(self, name: str) -> List[Any]:
+        if name == "id":
+            return self.ids.tolist()
+        column = self._columns[name]
+        return column.to_list() if isinstance(column, _Categorical) else list(column)
+
+    def columns(self) -> Dict[str, List[Any]]:
+        """Columnar export: {field: values}, all columns the same length."""
+        return {name: self.column(name) for name in PIN_FIELDS}
+
+    def iter_json(self) -> Iterator[str]:
+        """One JSON object string per pin, straight from the columns."""
+        for row in self.rows():
+            yield pin_json(row)
@@ -0,0 +1,188 @@
+import asyncio
+import gzip
+import io
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from scraper.adapters.base import Pin
+from scraper.utils.pinbatch import PinBatch
+
+try:
+    import zstandard                    # Optional: only needed for .zst output
+except ImportError:
+    zstandard = None
+
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+
+
+def is_jsonl_path(path: str) -> bool:
+    return str(path).endswith(JSONL_SUFFIXES)
+
+
+def _compression_for(path: str) -> Optional[str]:
+    if str(path).endswith(".gz"):
+        return "gzip"
+    if str(path).endswith(".zst"):
+        return "zstd"
+    return None
+
+
+def _require_zstd() -> None:
+    if zstandard is None:
+        raise RuntimeError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+
+
+class JsonlSink:
+    """
+    Appends pins to a JSON Lines file as soon as they are accepted.
+
+    Usable directly as a collector `on_item` callback (`await sink(pin)`).
+    Every `fsync_every` pins the buffers (and compressor) are flushed and
+    fsync'ed, so a crash loses at most one batch. Compression follows the
+    suffix: .jsonl, .jsonl.gz (gzip members), .jsonl.zst (zstd frames).
+    An existing file is truncated; append=True continues it instead (all
+    three formats support it), for a resumed crawl whose IDs carry on.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 100, append: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression = _compression_for(path)
+        self.fsync_every = fsync_every
+        self.written = 0
+        self._unsynced = 0
+
+        self._raw = open(self.path, "ab" if append else "wb")
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        elif self.compression == "zstd":
+            _require_zstd()
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+
+    def write(self, pin: Pin) -> None:
+        line = pin.to_json() + "\n"
+        self._stream.write(line.encode("utf-8"))
+        self.written += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.flush(fsync=True)
+
+    async def __call__(self, pin: Pin) -> None:
+        self.write(pin)
+
+    def flush(self, fsync: bool = False) -> None:
+        if self.compression == "gzip":
+            self._stream.flush(zlib.Z_SYNC_FLUSH)       # Everything so far becomes decodable
+        elif self.compression == "zstd":
+            self._stream.flush(zstandard.FLUSH_FRAME)   # Close the frame; later writes start a new one
+        self._raw.flush()
+        if fsync:
+            os.fsync(self._raw.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        if self._raw.closed:
+            return
+        self.flush(fsync=True)
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_json_array(path: str, pins: Iterable[Pin]) -> int:
+    """
+    Writes pins as one JSON array, one object per line, streaming row by row
+    (no list of dicts in between). Returns the number of pins written.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    rows = pins.iter_json() if isinstance(pins, PinBatch) else (p.to_json() for p in pins)
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for text in rows:
+            f.write(",\n  " if count else "\n  ")
+            f.write(text)
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    return count
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    compression = _compression_for(path)
+    if compression == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if compression == "zstd":
+        _require_zstd()
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _parse_line(line: str) -> Optional[Pin]:
+    line = line.strip()
+    if not line:
+        return None
+    return Pin(**json.loads(line))
+
+
+def read_pins(path: str) -> Iterator[Pin]:
+    """
+    Streams pins back from a JSONL sink file (plain, .gz or .zst).
+    A truncated last line (crash mid-write) is skipped, not fatal.
+    """
+    with _open_text(path) as f:
+        try:
+            for line in f:
+                try:
+                    pin = _parse_line(line)
+                except ValueError:
+                    continue
+                if pin is not None:
+                    yield pin
+        except EOFError:
+            # gzip member cut short by a crash; everything before it was yielded
+            return
+
+
+async def tail_pins(path: str, poll_s: float = 1.0, from_start: bool = True) -> AsyncIterator[Pin]:
+    """
+    Follows a growing (uncompressed) JSONL file, like `tail -f`, yielding
+    pins as a running crawl appends them. Runs until cancelled.
+    """
+    if _compression_for(path):
+        raise ValueError("tail_pins only follows uncompressed .jsonl files")
+
+    while not os.path.exists(path):
+        await asyncio.sleep(poll_s)
+
+    with open(path, encoding="utf-8") as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        partial = ""
+        while True:
+            chunk = f.readline()
+            if not chunk:
+                await asyncio.sleep(poll_s)
+                continue
+            partial += chunk
+            if not partial.endswith("\n"):
+                continue                        # Writer is mid-line; wait for the rest
+            line, partial = partial, ""
+            try:
+                pin = _parse_line(line)
+            except ValueError:
+                continue
+            if pin is not None:
+                yield pin
@@ -1,12 +1,255 @@
-import random
-from typing import Awaitable, Callable, List, Optional, Set, TypeVar
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar
 from playwright._impl._errors import TargetClosedError, Error as PWError
+from scraper.utils.checkpoint import Checkpointer, CrawlCheckpoint
+from scraper.utils.dedupe import DedupeIndex, MemoryDedupeIndex
+from scraper.utils.governor import DomainGovernor
+from scraper.utils.metrics import RATIO_BUCKETS, Metrics
+from scraper.utils.pacing import make_pacer
+
+log = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
 # Type hints for better IDE support
-BuildItem = Callable[..., Awaitable[Optional[T]]] 
-MakeKey   = Callable[[T], Optional[str]]           
+BuildItem = Callable[..., Awaitable[Optional[T]]]
+MakeKey   = Callable[[T], Optional[str]]
+OnItem    = Callable[[T], Awaitable[Any]]      # Called for every accepted item (pipelines, sinks)
+
+# Card schema: field name -> (sub-selector, attribute).
+# A None sub-selector reads the card node itself, a None attribute records
+# whether the sub-selector matched at all (True/False).
+CardSchema    = Dict[str, Tuple[Optional[str], Optional[str]]]
+Card          = Dict[str, Any]
+BuildFromCard = Callable[[Card, str], Optional[T]]
+
+# Runs inside the page: reads one card node into a plain dict.
+_READ_CARD_JS = """
+(node, schema) => {
+    const card = {};
+    for (const [field, [sel, attr]] of Object.entries(schema)) {
+        const el = sel ? node.querySelector(sel) : node;
+        card[field] = attr === null ? !!el : (el ? el.getAttribute(attr) : null);
+    }
+    return card;
+}
+"""
+# Serializes every matched card in one go, so a whole grid costs one CDP
+# round trip instead of several per card.
+_EXTRACT_CARDS_JS = f"(nodes, schema) => nodes.map((node) => ({_READ_CARD_JS.strip()})(node, schema))"
+_EXTRACT_CARD_JS = _READ_CARD_JS
+
+# DOM attribute used by incremental mode to tag cards that were already read.
+SEEN_ATTR = "data-ms-seen"
+
+# Clears stale markers and installs a MutationObserver that un-tags a card
+# whenever its content changes (lazy image load, virtualized node recycling),
+# so recycled nodes are read again instead of being skipped forever. Nodes
+# re-attached from a recycling pool are un-tagged too: their attributes were
+# rewritten while detached, where the observer can't see it.
+_INSTALL_SEEN_OBSERVER_JS = """
+(marker) => {
+    document.querySelectorAll(`[${marker}]`).forEach((n) => n.removeAttribute(marker));
+    if (window.__msSeenObserver) return;
+    const observer = new MutationObserver((mutations) => {
+        for (const m of mutations) {
+            for (const added of m.addedNodes) {
+                if (added.nodeType !== 1) continue;
+                added.removeAttribute(marker);
+                added.querySelectorAll(`[${marker}]`).forEach((n) => n.removeAttribute(marker));
+            }
+            const el = m.target.nodeType === 1 ? m.target : m.target.parentElement;
+            const card = el && el.closest(`[${marker}]`);
+            if (card) card.removeAttribute(marker);
+        }
+    });
+    observer.observe(document.documentElement, {
+        subtree: true,
+        childList: true,
+        attributes: true,
+        attributeFilter: ["href", "src", "srcset", "data-src", "data-srcset"],
+    });
+    window.__msSeenObserver = observer;
+}
+"""
+
+# Reads only cards without the seen-marker, tags them, and reports how many
+# already-read nodes were skipped.
+_EXTRACT_NEW_CARDS_JS = f"""
+([selector, schema, marker]) => {{
+    const readCard = {_READ_CARD_JS.strip()};
+    const nodes = document.querySelectorAll(selector);
+    const cards = [];
+    for (const node of nodes) {{
+        if (node.hasAttribute(marker)) continue;
+        node.setAttribute(marker, "");
+        cards.push(readCard(node, schema));
+    }}
+    return {{ cards, skipped: nodes.length - cards.length }};
+}}
+"""
+
+
+@dataclass
+class CollectStats:
+    """Counters filled in by the collector; pass one in to inspect a crawl."""
+    rounds: int = 0
+    nodes_read: int = 0        # Cards serialized / handles built
+    nodes_skipped: int = 0     # Cards skipped by incremental mode (already read)
+    new: int = 0
+    known: int = 0             # Keys already harvested by a previous run (persisted index)
+    dupes: int = 0
+    errors: int = 0
+    wait_ms: int = 0           # Total time spent waiting for content after scrolls
+    cdp_calls: int = 0         # Browser round trips made by the collector (evaluate, count, handles; build_item = 1)
+    stop_reason: str = ""      # target | stagnant | feed_end | max_rounds | closed
+    throttled_ms: int = 0      # Time spent waiting for the shared domain budget (governor)
+
+
+# CollectStats field → result label of crawl_nodes_total
+_NODE_RESULTS = {
+    "nodes_read": "read", "nodes_skipped": "skipped", "new": "new",
+    "known": "known", "dupes": "dupe", "errors": "error",
+}
+
+
+def record_round(metrics: Metrics, stats: CollectStats, before: CollectStats,
+                 round_idx: int, extract_s: float, wait_s: float) -> None:
+    """Turns the stats delta of one round into counters, histograms and a "round" event."""
+    delta = {f: getattr(stats, f) - getattr(before, f) for f in _NODE_RESULTS}
+    calls = stats.cdp_calls - before.cdp_calls
+    for field, result in _NODE_RESULTS.items():
+        if delta[field]:
+            metrics.inc("crawl_nodes_total", delta[field], result=result)
+    metrics.inc("crawl_rounds_total")
+    metrics.inc("crawl_cdp_calls_total", calls)
+    metrics.observe("crawl_round_seconds", extract_s + wait_s)
+    metrics.observe("crawl_extract_seconds", extract_s)
+    metrics.observe("crawl_wait_seconds", wait_s)
+    if delta["nodes_read"]:
+        metrics.observe("crawl_cdp_calls_per_card", calls / delta["nodes_read"], buckets=RATIO_BUCKETS)
+    metrics.event(
+        "round", round=round_idx, extract_s=round(extract_s, 4), wait_s=round(wait_s, 4),
+        cdp_calls=calls, **delta,
+    )
+
+
+class ItemCollector:
+    """
+    Dedupe + sequential ID assignment shared by the collectors.
+
+    `index` maps dedupe keys to item IDs (in-memory by default). With a
+    persisted index (e.g. SqliteDedupeIndex) keys harvested by earlier runs
+    count as known: they are skipped but still count as progress, and new
+    items continue the earlier ID sequence.
+    """
+
+    def __init__(self, make_key: MakeKey, index: Optional[DedupeIndex] = None,
+                 stats: Optional[CollectStats] = None, on_item: Optional[OnItem] = None,
+                 keep_items: bool = True, container: Optional[Any] = None):
+        self.make_key = make_key
+        self.on_item = on_item
+        self.keep_items = keep_items              # False → items only go to on_item (bounded memory)
+        self.accepted = 0
+        self.index = index if index is not None else MemoryDedupeIndex()
+        self.stats = stats if stats is not None else CollectStats()
+        self.out = container if container is not None else []   # Anything with append() (e.g. PinBatch)
+        self.first_run_id = self.index.next_id()   # IDs below this were assigned by a previous run
+        self._revisited: Set[str] = set()           # Previously harvested keys met again in this run
+
+    @property
+    def progress(self) -> int:
+        # New items plus first sightings of previously harvested ones
+        return self.accepted + self.stats.known
+
+    def add(self, item: Optional[T], node_no: int = 0) -> bool:
+        """Returns True if the item was new and got collected."""
+        if item is None:
+            return False
+        key = self.make_key(item)
+        if not key:
+            return False
+
+        matched_id = self.index.get(key)
+        if matched_id is not None:
+            if matched_id < self.first_run_id and key not in self._revisited:
+                self._revisited.add(key)
+                self.stats.known += 1
+                log.debug("[KNWN] Node %03d: Harvested by a previous run as ID %s. Skipping.", node_no, matched_id)
+                return False
+            self.stats.dupes += 1
+            log.debug("[DUPE] Node %03d: Conflicts with ID %s. Skipping.", node_no, matched_id)
+            return False
+
+        # SUCCESS: Assign sequential ID (continues a persisted index)
+        item.id = self.index.next_id()
+        self.index.add(key, item.id)
+        if self.keep_items:
+            self.out.append(item)
+        self.accepted += 1
+        self.stats.new += 1
+
+        log.debug("[NEW ] Node %03d: Assigned ID %s | Saved Total: %d", node_no, item.id, self.accepted)
+        return True
+
+    async def push(self, item: Optional[T], node_no: int = 0) -> bool:
+        """
+        add() + hand the accepted item to `on_item` (awaited, so a full queue
+        slows the crawl). If on_item raises, the key is taken back out of the
+        index so a later run collects the item again, and the error propagates.
+        """
+        accepted = self.add(item, node_no)
+        if accepted and self.on_item is not None:
+            try:
+                await self.on_item(item)
+            except BaseException:
+                self.index.discard(self.make_key(item))
+                self.accepted -= 1
+                self.stats.new -= 1
+                raise
+        return accepted
+
+
+async def extract_cards(loc, schema: CardSchema) -> List[Card]:
+    """Serializes all nodes matched by `loc` with a single evaluate_all call."""
+    return await loc.evaluate_all(_EXTRACT_CARDS_JS, schema)
+
+
+async def extract_card(node, schema: CardSchema) -> Card:
+    """Serializes a single ElementHandle with one evaluate call."""
+    return await node.evaluate(_EXTRACT_CARD_JS, schema)
+
+
+async def extract_new_cards(page, item_selector: str, schema: CardSchema) -> Tuple[List[Card], int]:
+    """Serializes only cards not read before; returns (cards, skipped_count). CSS selectors only."""
+    result = await page.evaluate(_EXTRACT_NEW_CARDS_JS, [item_selector, schema, SEEN_ATTR])
+    return result["cards"], result["skipped"]
+
+
+async def install_seen_observer(page) -> None:
+    """Prepares the page for extract_new_cards (clears old markers, un-tags changed cards)."""
+    await page.evaluate(_INSTALL_SEEN_OBSERVER_JS, SEEN_ATTR)
+
+
+async def fast_scroll_to(page, target_y: int, step_px: int, wait_ms: int = 250, max_stalls: int = 8) -> int:
+    """
+    Scrolls down to `target_y` in large steps with short waits, so an infinite
+    feed keeps loading on the way. Stops early if the page stops growing.
+    Returns the reached offset.
+    """
+    y, stalls = 0, 0
+    await page.evaluate("() => { window.scrollTo(0, 0); }")
+    while y < target_y and stalls < max_stalls:
+        new_y = await page.evaluate(
+            "(y) => { window.scrollBy(0, y); return window.scrollY; }", min(step_px, target_y - y)
+        )
+        stalls = stalls + 1 if new_y <= y else 0
+        y = new_y
+        await page.wait_for_timeout(wait_ms)
+    return y
+
 
 async def streaming_scroll_and_collect_stepwise(
     page,
@@ -14,105 +257,253 @@ async def streaming_scroll_and_collect_stepwise(
     build_item: BuildItem,
     make_key: MakeKey,
     *,
+    card_schema: Optional[CardSchema] = None,
+    build_from_card: Optional[BuildFromCard] = None,
+    incremental: bool = False,
+    stats: Optional[CollectStats] = None,
+    index: Optional[DedupeIndex] = None,
+    on_item: Optional[OnItem] = None,
+    keep_items: bool = True,
+    container: Optional[Any] = None,
+    checkpoint: Optional[Checkpointer] = None,
+    resume_from: Optional[CrawlCheckpoint] = None,
     max_items: int = 1000,
     max_rounds: int = 3000,
     step_ratio: float = 0.6,
     stagnant_tolerance: int = 15,
     wait_min_ms: int = 800,
     wait_jitter_ms: int = 1500,
+    pacing: str = "fixed",
+    metrics: Optional[Metrics] = None,
+    governor: Optional[DomainGovernor] = None,
 ) -> List[T]:
-    seen: Set[str] = set()
-    out: List[T] = []
-    stagnant_counter = 0  
-    last_total_found = 0  
+    """
+    Scrolls the page step by step and collects unique items from `item_selector`.
+
+    Two extraction modes are supported:
+        - batched: when `card_schema` and `build_from_card` are given, the whole
+          visible grid is serialized in one `evaluate_all` call and items are
+          built in Python from plain dicts.
+        - per-node: otherwise every node is turned into an ElementHandle and
+          passed to `build_item(node_handle, page)`.
+
+    With `incremental=True` (batched mode only) cards are tagged in the DOM once
+    read, so each round only serializes freshly attached or changed cards.
+    Skipped nodes are counted in `stats.nodes_skipped`.
+
+    Dedupe goes through `index` (see ItemCollector). Every accepted item is
+    also awaited into `on_item` as soon as it is found, so downstream stages
+    (downloads, output sinks) can run while scrolling continues. With
+    `keep_items=False` nothing is retained and the returned list is empty.
+    `container` replaces the result list (e.g. a columnar PinBatch).
+
+    `checkpoint` saves round/scroll/counter state every few rounds and when
+    the crawl stops for any reason; `resume_from` fast-scrolls to the saved
+    depth before normal pacing resumes (`index` should hold the saved keys).
+    `max_rounds` counts the rounds of this run, not those before the resume;
+    `max_items` counts the items of the whole crawl, including them.
+
+    pacing:
+        "fixed"    → sleep `wait_min_ms + random(0, wait_jitter_ms)` per scroll
+        "adaptive" → wait for new cards to attach (capped at that same worst
+                     case) and tune the step from the yield of each round
+                     (see scraper/utils/pacing.py)
+
+    `metrics` receives per-round counters and timings (nodes by result,
+    browser round trips per card, extraction vs. scroll-wait seconds) and
+    one "round" event per round. Per-node lines are logged at DEBUG only.
+
+    `governor` (scraper/utils/governor.py) is consulted before every scroll,
+    so all crawls of a domain share one request budget; rounds without new
+    items count as an "empty" signal and slow the domain down a little.
+    """
+    pacer = make_pacer(pacing, step_ratio, wait_min_ms, wait_jitter_ms)
+    collector = ItemCollector(make_key, index=index, stats=stats, on_item=on_item,
+                              keep_items=keep_items, container=container)
+    stats = collector.stats
+    metrics = metrics if metrics is not None else Metrics()
+    out = collector.out
+    stagnant_counter = 0
+    last_total_found = 0
     working_on = 0
+    batched = card_schema is not None and build_from_card is not None
 
-    # Start at top & disable smooth scroll
-    await page.evaluate("() => { window.scrollTo(0, 0); }")
+    if incremental and not batched:
+        raise ValueError("incremental mode requires card_schema and build_from_card")
 
-    # Compute scroll step from viewport height
+    # Compute scroll step from viewport height (the pacer may retune the ratio)
     viewport_h = await page.evaluate("() => window.innerHeight || 900")
-    step_px = max(200, int(viewport_h * step_ratio))
+    step_px = max(200, int(viewport_h * pacer.step_ratio))
 
-    for round_idx in range(max_rounds):
-        try:
-            # 1) Round-scoped live locator
-            loc = page.locator(item_selector)
-            count = await loc.count()
-        except TargetClosedError:
-            break
+    start_round = 0
+    collected_before = 0
+    if resume_from is not None:
+        # Fast-forward past the depth harvested before the failure
+        log.info("[RESUME] Round %d, %d items, scrolling to y=%d",
+                 resume_from.round_idx, resume_from.collected, resume_from.scroll_y)
+        start_round = resume_from.round_idx
+        collected_before = resume_from.collected
+        scroll_y = await fast_scroll_to(page, resume_from.scroll_y, step_px * 3)
+    else:
+        # Start at top & disable smooth scroll
+        await page.evaluate("() => { window.scrollTo(0, 0); }")
+        scroll_y = 0
+    rounds_done = start_round
 
-        print(f"\n--- Round {round_idx} | Detected nodes in view: {count} ---")
+    def snapshot(finished: bool) -> CrawlCheckpoint:
+        return CrawlCheckpoint(
+            url=checkpoint.url, round_idx=rounds_done, scroll_y=scroll_y,
+            collected=collected_before + collector.accepted, finished=finished,
+        )
 
-        # Iterate over each card in the current view
-        for i in range(count):
-            working_on += 1
-            node_loc = loc.nth(i)
+    if incremental:
+        await install_seen_observer(page)
 
-            # 2a) Wait for media attachment
+    # max_items counts the whole crawl: a resume only collects what is still missing
+    max_items -= collected_before
+    finished = False
+    try:
+        if max_items <= 0:
+            stats.stop_reason = "target"
+            finished = True
+            return out
+        for round_idx in range(start_round, start_round + max_rounds):
+            stats.rounds += 1
+            skipped = 0
+            progress_before = collector.progress
+            before = replace(stats)
+            t_round = time.perf_counter()
             try:
-                media_loc = node_loc.locator("img, picture source, video, [style*='background-image']")
-                await media_loc.first.wait_for(state="attached", timeout=800)
-            except:
-                pass
+                # 1) Round-scoped live locator
+                loc = page.locator(item_selector)
+                if incremental:
+                    # 2) Serialize only cards not tagged in a previous round
+                    stats.cdp_calls += 1
+                    cards, skipped = await extract_new_cards(page, item_selector, card_schema)
+                    count = len(cards)
+                elif batched:
+                    # 2) Serialize the whole grid in one round trip
+                    stats.cdp_calls += 1
+                    cards = await extract_cards(loc, card_schema)
+                    count = len(cards)
+                else:
+                    stats.cdp_calls += 1
+                    count = await loc.count()
+            except TargetClosedError:
+                stats.stop_reason = "closed"
+                return out                      # Page died: checkpoint stays resumable
+            except PWError as e:
+                stats.errors += 1
+                log.warning("[ERR ] Round %d: Extraction failed -> %s", round_idx, e)
+                cards, count = [], 0
 
-            # 2b) Convert to ElementHandle
-            try:
-                node_handle = await node_loc.element_handle()
-                if node_handle is None: continue
-            except:
-                continue
+            stats.nodes_skipped += skipped
+            log.info("--- Round %d | Detected nodes in view: %d | Skipped (already read): %d ---",
+                     round_idx, count, skipped)
 
-            # 3) Build item via Adapter
-            try:
-                item = await build_item(node_handle, page)
-                if item is None:
-                    continue
-                
-                # 4) Dedupe and collect with ID assignment
-                key = make_key(item)
-                if not key:
+            if batched:
+                board_url = page.url
+                for card in cards:
+                    working_on += 1
+                    stats.nodes_read += 1
+                    try:
+                        item = build_from_card(card, board_url)
+                    except Exception as e:
+                        stats.errors += 1
+                        log.warning("[ERR ] Node %03d: Critical Error -> %s", working_on, e)
+                        continue
+                    # Not guarded: an on_item failure (sink, dead downloaders) ends the crawl
+                    await collector.push(item, working_on)
+
+                    if collector.accepted >= max_items:
+                        log.info("[DONE] Target reached: %d items collected.", collector.accepted)
+                        record_round(metrics, stats, before, round_idx, time.perf_counter() - t_round, 0.0)
+                        stats.stop_reason = "target"
+                        finished = True
+                        return out
+
+            # Iterate over each card in the current view
+            for i in range(0 if batched else count):
+                working_on += 1
+                node_loc = loc.nth(i)
+
+                # 2a) Wait for media attachment
+                stats.cdp_calls += 1
+                try:
+                    media_loc = node_loc.locator("img, picture source, video, [style*='background-image']")
+                    await media_loc.first.wait_for(state="attached", timeout=800)
+                except:
+                    pass
+
+                # 2b) Convert to ElementHandle
+                stats.cdp_calls += 1
+                try:
+                    node_handle = await node_loc.element_handle()
+                    if node_handle is None: continue
+                except:
                     continue
 
-                if key in seen:
-                    # Find the existing item's ID to report the conflict
-                    existing_item = next((x for x in out if make_key(x) == key), None)
-                    matched_id = existing_item.id if existing_item else "Unknown"
-                    print(f"[DUPE] Node {working_on:03}: Conflicts with ID {matched_id}. Skipping.")
+                # 3) Build item via Adapter
+                stats.nodes_read += 1
+                stats.cdp_calls += 1            # SiteAdapter._build_pin: one evaluate per card
+                try:
+                    item = await build_item(node_handle, page)
+                except TargetClosedError:
+                    stats.stop_reason = "closed"
+                    return out
+                except Exception as e:
+                    stats.errors += 1
+                    log.warning("[ERR ] Node %03d: Critical Error -> %s", working_on, e)
                     continue
+                await collector.push(item, working_on)
 
-                # SUCCESS: Assign sequential ID starting from 0
-                item.id = len(out) 
-                seen.add(key)
-                out.append(item)
-                
-                print(f"[NEW ] Node {working_on:03}: Assigned ID {item.id} | Saved Total: {len(out)}")
+                if collector.accepted >= max_items:
+                    log.info("[DONE] Target reached: %d items collected.", collector.accepted)
+                    record_round(metrics, stats, before, round_idx, time.perf_counter() - t_round, 0.0)
+                    stats.stop_reason = "target"
+                    finished = True
+                    return out
+
+            # --- 5) STAGNANT CHECK ---
+            # Known keys count as progress so a re-crawl can scroll past its old harvest
+            progress = collector.progress
+            if progress <= last_total_found:
+                stagnant_counter += 1
+                log.info("[*] No new unique items this round. Stagnant: %d/%d", stagnant_counter, stagnant_tolerance)
+            else:
+                stagnant_counter = 0
+                last_total_found = progress
+
+            extract_s = time.perf_counter() - t_round
+            if stagnant_counter >= stagnant_tolerance:
+                log.info("[TERMINATE] No new items found for %d rounds. Ending crawl.", stagnant_tolerance)
+                record_round(metrics, stats, before, round_idx, extract_s, 0.0)
+                stats.stop_reason = "stagnant"
+                break
+
+            # 6) Scroll and wait for content (fixed sleep or load signals)
+            pacer.update(progress - progress_before)
+            if governor is not None:
+                if progress > progress_before:
+                    governor.reward(page.url)
+                else:
+                    governor.penalize(page.url, "empty")
+                stats.throttled_ms += int(await governor.acquire(page.url) * 1000)
+            step_px = max(200, int(viewport_h * pacer.step_ratio))
+            stats.cdp_calls += 1
+            scroll_y, waited = await pacer.scroll_and_wait(page, item_selector, step_px)
+            stats.wait_ms += waited
+            record_round(metrics, stats, before, round_idx, extract_s, time.perf_counter() - t_round - extract_s)
+
+            rounds_done = round_idx + 1
+            if checkpoint is not None and checkpoint.due(rounds_done):
+                checkpoint.save(snapshot(finished=False))
+
+        finished = True
+        stats.stop_reason = stats.stop_reason or "max_rounds"
+        return out
+
+    finally:
+        if checkpoint is not None:
+            checkpoint.save(snapshot(finished))
 
-            except TargetClosedError:
-                return out
-            except Exception as e:
-                print(f"[ERR ] Node {working_on:03}: Critical Error -> {e}")
-                continue
-
-            if len(out) >= max_items:
-                print(f"\n[DONE] Target reached: {len(out)} items collected.")
-                return out
-
-        # --- 5) STAGNANT CHECK ---
-        if len(out) <= last_total_found:
-            stagnant_counter += 1
-            print(f"[*] No new unique items this round. Stagnant: {stagnant_counter}/{stagnant_tolerance}")
-        else:
-            stagnant_counter = 0  
-            last_total_found = len(out)
-
-        if stagnant_counter >= stagnant_tolerance:
-            print(f"\n[TERMINATE] No new items found for {stagnant_tolerance} rounds. Ending crawl.")
-            break
-
-        # 6) Scroll and human-like wait
-        await page.evaluate("(y) => window.scrollBy(0, y)", step_px)
-        delay = wait_min_ms + random.randint(0, wait_jitter_ms)
-        await page.wait_for_timeout(delay)
-
-    return out
\ No newline at end of file
@@ -0,0 +1,290 @@
+import itertools
+import logging
+import random
+import time
+from dataclasses import replace
+from typing import Any, List, Optional, TypeVar
+
+from playwright._impl._errors import TargetClosedError, Error as PWError
+from scraper.utils.checkpoint import Checkpointer, CrawlCheckpoint
+from scraper.utils.dedupe import DedupeIndex
+from scraper.utils.governor import DomainGovernor
+from scraper.utils.metrics import Metrics
+from scraper.utils.stream import (
+    _READ_CARD_JS, BuildFromCard, CardSchema, CollectStats, ItemCollector, MakeKey, OnItem,
+    fast_scroll_to, record_round,
+)
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# One round trip per round: optionally scroll to `targetY` and wait until new
+# cards attach and the DOM stays quiet for `settleMs` (capped at `capMs`),
+# then read the grid inside a single animation frame. Recycled nodes can't
+# change between reading a card's attributes and its offset, because the
+# whole snapshot runs synchronously in one task.
+#
+# `frontier` is the document offset up to which every card has been rendered
+# (and is therefore in this snapshot): per masonry column the bottom of its
+# lowest rendered card, minimum over columns. Cards ending above `minTop`
+# were covered by earlier snapshots and are not serialized again.
+_SNAPSHOT_JS = f"""
+async ([selector, schema, targetY, minTop, capMs, settleMs]) => {{
+    const readCard = {_READ_CARD_JS.strip()};
+    const startHeight = document.documentElement.scrollHeight;
+    const start = performance.now();
+    let loaded = false;
+    if (targetY !== null) {{
+        await new Promise((resolve) => {{
+            let settleTimer = null;
+            const finish = () => {{
+                observer.disconnect();
+                clearTimeout(capTimer);
+                clearTimeout(settleTimer);
+                resolve();
+            }};
+            const isCard = (node) => node.nodeType === 1 &&
+                (node.matches(selector) || node.closest(selector) || node.querySelector(selector));
+            const observer = new MutationObserver((mutations) => {{
+                if (!mutations.some((m) => Array.from(m.addedNodes).some(isCard))) return;
+                loaded = true;
+                clearTimeout(settleTimer);
+                settleTimer = setTimeout(finish, settleMs);
+            }});
+            observer.observe(document.documentElement, {{ childList: true, subtree: true }});
+            const capTimer = setTimeout(finish, capMs);
+            window.scrollTo(0, targetY);
+        }});
+    }}
+    await new Promise((resolve) => requestAnimationFrame(() => resolve()));
+
+    const y = window.scrollY;
+    const columns = new Map();
+    const cards = [];
+    for (const node of document.querySelectorAll(selector)) {{
+        const r = node.getBoundingClientRect();
+        if (r.height === 0) continue;
+        const bottom = Math.round(r.bottom + y), left = Math.round(r.left);
+        columns.set(left, Math.max(columns.get(left) ?? 0, bottom));
+        if (bottom < minTop) continue;
+        cards.push(readCard(node, schema));
+    }}
+    const height = document.documentElement.scrollHeight;
+    return {{
+        cards,
+        scrollY: y,
+        viewport: window.innerHeight,
+        height,
+        grew: height > startHeight,
+        loaded,
+        frontier: columns.size ? Math.min(...columns.values()) : 0,
+        waitMs: Math.round(performance.now() - start),
+    }};
+}}
+"""
+
+
+async def virtual_scroll_and_collect(
+    page,
+    item_selector: str,
+    card_schema: CardSchema,
+    build_from_card: BuildFromCard,
+    make_key: MakeKey,
+    *,
+    stats: Optional[CollectStats] = None,
+    index: Optional[DedupeIndex] = None,
+    on_item: Optional[OnItem] = None,
+    keep_items: bool = True,
+    container: Optional[Any] = None,
+    checkpoint: Optional[Checkpointer] = None,
+    resume_from: Optional[CrawlCheckpoint] = None,
+    max_items: int = 1000,
+    max_rounds: Optional[int] = None,
+    stagnant_tolerance: int = 12,
+    end_confirm: int = 3,
+    overlap_ratio: float = 0.15,
+    wait_min_ms: int = 800,
+    wait_jitter_ms: int = 1000,
+    settle_ms: int = 150,
+    metrics: Optional[Metrics] = None,
+    governor: Optional[DomainGovernor] = None,
+    pacing: str = "adaptive",
+) -> List[T]:
+    """
+    Collector for virtualized grids (Pinterest masonry) that recycle card
+    nodes while scrolling.
+
+    Each round is one evaluate: scroll, wait for cards to attach (capped at
+    `wait_min_ms + wait_jitter_ms`, done after `settle_ms` of quiet), then
+    snapshot every rendered card in a single animation frame. No element
+    handles are kept, so a recycled node can't be read half old, half new.
+
+    Coverage is tracked by document offset: the snapshot reports the
+    frontier up to which every card was rendered, and the next round
+    scrolls straight there (minus `overlap_ratio` of a viewport) instead of
+    a fixed step; cards wholly above the covered region are not serialized
+    again. Rounds therefore scale with board height / rendered window.
+
+    pacing:
+        "adaptive" → a round ends as soon as the grid settled (above)
+        "fixed"    → every round also lasts at least `wait_min_ms +
+                     random(0, wait_jitter_ms)`, like the stepwise collector's
+                     fixed sleep (e.g. the stealth profile)
+
+    Stops on:
+        target    → max_items collected (items before a resume included)
+        feed_end  → at the bottom of the page, no new cards and no growth
+                    for `end_confirm` consecutive waits
+        stagnant  → `stagnant_tolerance` rounds without progress elsewhere
+                    (e.g. a feed that stopped loading mid-page)
+        max_rounds→ only if `max_rounds` is set (no cap by default; counted
+                    from the resume point)
+
+    Dedupe, on_item, keep_items, container, checkpoint/resume_from, metrics
+    and governor behave as in streaming_scroll_and_collect_stepwise (the
+    checkpointed scroll_y is the covered frontier). The stepwise collector's
+    step_ratio and incremental don't apply here and are a TypeError, like
+    any other unknown option.
+    """
+    if pacing not in ("fixed", "adaptive"):
+        raise ValueError(f"Unknown pacing: {pacing}")
+    collector = ItemCollector(make_key, index=index, stats=stats, on_item=on_item,
+                              keep_items=keep_items, container=container)
+    stats = collector.stats
+    metrics = metrics if metrics is not None else Metrics()
+    cap_ms = wait_min_ms + wait_jitter_ms
+    board_url = page.url
+    working_on = 0
+    stagnant_counter = 0
+    end_checks = 0
+    last_total_found = 0
+    overlap = 0
+
+    start_round = 0
+    collected_before = 0
+    covered = 0                                 # Every card above this offset was read
+    if resume_from is not None:
+        log.info("[RESUME] Round %d, %d items, scrolling to y=%d",
+                 resume_from.round_idx, resume_from.collected, resume_from.scroll_y)
+        start_round = resume_from.round_idx
+        collected_before = resume_from.collected
+        viewport_h = await page.evaluate("() => window.innerHeight || 900")
+        await fast_scroll_to(page, resume_from.scroll_y, viewport_h * 3)
+        covered = resume_from.scroll_y
+        target: Optional[int] = None            # Snapshot where the fast scroll stopped
+    else:
+        target = 0
+    rounds_done = start_round
+
+    def snapshot(finished: bool) -> CrawlCheckpoint:
+        return CrawlCheckpoint(
+            url=checkpoint.url, round_idx=rounds_done, scroll_y=covered,
+            collected=collected_before + collector.accepted, finished=finished,
+        )
+
+    # max_items counts the whole crawl: a resume only collects what is still missing
+    max_items -= collected_before
+    finished = False
+    rounds = itertools.count(start_round) if max_rounds is None else range(start_round, start_round + max_rounds)
+    try:
+        if max_items <= 0:
+            stats.stop_reason = "target"
+            finished = True
+            return collector.out
+        for round_idx in rounds:
+            stats.rounds += 1
+            before = replace(stats)
+            progress_before = collector.progress
+            t_round = time.perf_counter()
+            try:
+                stats.cdp_calls += 1
+                snap = await page.evaluate(
+                    _SNAPSHOT_JS, [item_selector, card_schema, target, max(0, covered - overlap), cap_ms, settle_ms]
+                )
+            except TargetClosedError:
+                stats.stop_reason = "closed"
+                return collector.out
+            except PWError as e:
+                stats.errors += 1
+                log.warning("[ERR ] Round %d: Snapshot failed -> %s", round_idx, e)
+                snap = None
+
+            wait_s = (snap["waitMs"] if snap else 0) / 1000
+            if pacing == "fixed":
+                # Dwell like a reader would, even when the grid settled at once
+                dwell_ms = wait_min_ms + random.randint(0, wait_jitter_ms) - int(wait_s * 1000)
+                if dwell_ms > 0:
+                    await page.wait_for_timeout(dwell_ms)
+                    wait_s += dwell_ms / 1000
+            stats.wait_ms += int(wait_s * 1000)
+            cards = snap["cards"] if snap else []
+            log.info("--- Round %d | y=%s | cards in snapshot: %d | covered to: %d ---",
+                     round_idx, snap["scrollY"] if snap else "?", len(cards), covered)
+
+            for card in cards:
+                working_on += 1
+                stats.nodes_read += 1
+                try:
+                    item = build_from_card(card, board_url)
+                except Exception as e:
+                    stats.errors += 1
+                    log.warning("[ERR ] Node %03d: Critical Error -> %s", working_on, e)
+                    continue
+                # Not guarded: an on_item failure (sink, dead downloaders) ends the crawl
+                await collector.push(item, working_on)
+                if collector.accepted >= max_items:
+                    log.info("[DONE] Target reached: %d items collected.", collector.accepted)
+                    record_round(metrics, stats, before, round_idx, time.perf_counter() - t_round - wait_s, wait_s)
+                    stats.stop_reason = "target"
+                    finished = True
+                    return collector.out
+
+            progress = collector.progress
+            if progress > last_total_found:
+                stagnant_counter = 0
+                last_total_found = progress
+            else:
+                stagnant_counter += 1
+
+            if snap is not None:
+                viewport_h = snap["viewport"] or 900
+                overlap = int(viewport_h * overlap_ratio)
+                covered = max(covered, snap["frontier"])
+                at_bottom = snap["scrollY"] + viewport_h >= snap["height"] - 4
+                if at_bottom and progress == progress_before and not snap["grew"] and not snap["loaded"]:
+                    end_checks += 1
+                    log.info("[*] Bottom of the feed, nothing new. End check %d/%d", end_checks, end_confirm)
+                else:
+                    end_checks = 0
+                # Jump to the covered frontier; always move at least a quarter viewport
+                target = max(covered - overlap, snap["scrollY"] + viewport_h // 4)
+
+            extract_s = time.perf_counter() - t_round - wait_s
+            record_round(metrics, stats, before, round_idx, extract_s, wait_s)
+            rounds_done = round_idx + 1
+            if end_checks >= end_confirm:
+                log.info("[TERMINATE] Reached the end of the feed.")
+                stats.stop_reason = "feed_end"
+                break
+            if stagnant_counter >= stagnant_tolerance:
+                log.info("[TERMINATE] No new items found for %d rounds. Ending crawl.", stagnant_tolerance)
+                stats.stop_reason = "stagnant"
+                break
+
+            if governor is not None:
+                if progress > progress_before:
+                    governor.reward(board_url)
+                else:
+                    governor.penalize(board_url, "empty")
+                stats.throttled_ms += int(await governor.acquire(board_url) * 1000)
+            if checkpoint is not None and checkpoint.due(rounds_done):
+                checkpoint.save(snapshot(finished=False))
+
+        finished = True
+        stats.stop_reason = stats.stop_reason or "max_rounds"
+        return collector.out
+
+    finally:
+        if checkpoint is not None:
+            checkpoint.save(snapshot(finished))
@@ -0,0 +1,32 @@
+import asyncio
+
+from agents.graph import initial_state
+from agents.nodes.extraction import extraction_node
+from agents.runtime import _RUNS, CrawlRun
+from scraper.adapters.pinterest import PinterestAdapter
+from scraper.utils.pacing import make_pacer
+from scraper.utils.stream import ItemCollector
+
+
+class BrokenPage:
+    url = "https://www.pinterest.com/u/board/"
+
+    async def evaluate(self, js, arg=None):
+        raise RuntimeError("Execution context was destroyed")
+
+
+def test_extraction_errors_stop_the_run_at_max_errors():
+    adapter = PinterestAdapter()
+    _RUNS["h"] = CrawlRun(
+        url=BrokenPage.url, adapter=adapter, page=BrokenPage(), collector=ItemCollector(adapter._make_key),
+        pacer=make_pacer("fixed", 0.6, 0, 0), max_errors=3, stagnant_tolerance=100,
+    )
+    state = initial_state(BrokenPage.url, "h")
+    try:
+        for _ in range(3):
+            state["round_idx"] += 1
+            state.update(asyncio.run(extraction_node(state)))
+    finally:
+        _RUNS.pop("h")
+    assert state["error_count"] == 3
+    assert state["is_complete"] and state["stop_reason"] == "errors"
@@ -0,0 +1,60 @@
+import json
+import sqlite3
+
+import pytest
+
+from scraper.utils.checkpoint import Checkpointer, CrawlCheckpoint
+
+URL = "https://www.pinterest.com/u/board/"
+
+
+def _committed_keys(ckpt):
+    with sqlite3.connect(ckpt.keys_path) as db:
+        return {k for (k,) in db.execute("SELECT key FROM dedupe")}
+
+
+def test_save_writes_pins_then_keys_then_state(tmp_path):
+    seen_at_flush = []
+    ckpt = Checkpointer(str(tmp_path / "run.ckpt"), URL,
+                        flush_output=lambda: seen_at_flush.append((_committed_keys(ckpt), ckpt.path.exists())))
+    index = ckpt.open_index()
+    index.add("a", 0)
+    assert _committed_keys(ckpt) == set()       # Only save() commits
+    seen_at_flush.clear()
+    ckpt.save(CrawlCheckpoint(URL, round_idx=5, collected=1))
+    assert seen_at_flush == [(set(), False)]    # Output flushed before keys and state
+    assert _committed_keys(ckpt) == {"a"}
+    assert json.loads(ckpt.path.read_text())["collected"] == 1
+    ckpt.close()
+
+
+def test_postponed_flush_keeps_the_older_state(tmp_path):
+    ckpt = Checkpointer(str(tmp_path / "run.ckpt"), URL)
+    index = ckpt.open_index()
+    ckpt.save(CrawlCheckpoint(URL, round_idx=5, collected=0))
+    index.add("a", 0)
+    index.before_commit = lambda: False          # Pins still on their way
+    ckpt.save(CrawlCheckpoint(URL, round_idx=10, collected=1))
+    assert ckpt.load().round_idx == 5 and _committed_keys(ckpt) == set()
+    index.before_commit = None
+    ckpt.close()
+
+
+def test_resume_refuses_another_board_and_reset_starts_over(tmp_path):
+    ckpt = Checkpointer(str(tmp_path / "run.ckpt"), URL)
+    ckpt.open_index().add("a", 0)
+    ckpt.save(CrawlCheckpoint(URL, round_idx=5, scroll_y=4000, collected=1))
+    ckpt.close()
+
+    with pytest.raises(ValueError):
+        Checkpointer(str(tmp_path / "run.ckpt"), "https://www.pinterest.com/u/other/").load_for_resume()
+    ckpt = Checkpointer(str(tmp_path / "run.ckpt"), URL)
+    cp = ckpt.load_for_resume()
+    assert (cp.round_idx, cp.scroll_y, cp.collected) == (5, 4000, 1)
+    assert "a" in ckpt.open_index()
+    ckpt.close()
+
+    ckpt.reset()
+    assert ckpt.load_for_resume() is None and not ckpt.keys_path.exists()
+    assert len(ckpt.open_index()) == 0
+    ckpt.close()
@@ -0,0 +1,88 @@
+import sqlite3
+
+from scraper.utils.dedupe import MemoryDedupeIndex, SqliteDedupeIndex, connect_dedupe_db
+
+
+def _committed(path, namespace):
+    with sqlite3.connect(path) as db:
+        return {k for (k,) in db.execute("SELECT key FROM dedupe WHERE namespace = ?", (namespace,))}
+
+
+def test_memory_index():
+    index = MemoryDedupeIndex()
+    index.add("a", index.next_id())
+    index.add("b", index.next_id())
+    assert index.get("b") == 1 and "a" in index and "c" not in index
+    index.discard("a")
+    assert len(index) == 1 and "a" not in index
+
+
+def test_keys_persist_per_namespace(tmp_path):
+    path = str(tmp_path / "seen.db")
+    index = SqliteDedupeIndex(path, namespace="board-a")
+    for key in ("x", "y"):
+        index.add(key, index.next_id())
+    index.close()
+
+    index = SqliteDedupeIndex(path, namespace="board-a")
+    assert len(index) == 2 and index.get("y") == 1 and index.next_id() == 2
+    index.add("x", 99)                          # Already known: ignored
+    assert len(index) == 2 and index.get("x") == 0
+    index.close()
+    other = SqliteDedupeIndex(path, namespace="board-b")
+    assert len(other) == 0 and "x" not in other
+    other.close()
+
+
+def test_boards_share_one_connection(tmp_path):
+    path = str(tmp_path / "seen.db")
+    db = connect_dedupe_db(path)
+    a = SqliteDedupeIndex(None, namespace="board-a", db=db)
+    b = SqliteDedupeIndex(None, namespace="board-b", db=db)
+    a.add("x", 0)
+    b.add("x", 0)
+    b.add("y", 1)
+    a.close()
+    b.close()                                   # Commits, but leaves the caller's connection open
+    db.execute("SELECT 1")
+    assert (len(a), len(b)) == (1, 2)
+    assert _committed(path, "board-a") == {"x"} and _committed(path, "board-b") == {"x", "y"}
+    db.close()
+
+
+def test_due_commit_runs_before_the_next_insert(tmp_path):
+    path = str(tmp_path / "seen.db")
+    commits = []
+    index = SqliteDedupeIndex(path, namespace="b", commit_every=2,
+                              before_commit=lambda: commits.append(_committed(path, "b")))
+    for key in "abc":
+        index.add(key, index.next_id())
+    # Third add committed a and b only: c's item has not been passed on yet
+    assert commits == [set()] and _committed(path, "b") == {"a", "b"}
+    index.close()
+    assert _committed(path, "b") == {"a", "b", "c"}
+
+
+def test_before_commit_can_postpone(tmp_path):
+    path = str(tmp_path / "seen.db")
+    ready = False
+    index = SqliteDedupeIndex(path, namespace="b", commit_every=1, before_commit=lambda: ready)
+    index.add("a", 0)
+    index.add("b", 1)
+    assert not index.flush() and _committed(path, "b") == set()
+    ready = True
+    index.add("c", 2)                           # Tries again before inserting c
+    assert _committed(path, "b") == {"a", "b"}
+    assert index.flush() and _committed(path, "b") == {"a", "b", "c"}
+    index.close()
+
+
+def test_uncommitted_keys_roll_back_and_discard_forgets(tmp_path):
+    path = str(tmp_path / "seen.db")
+    index = SqliteDedupeIndex(path, namespace="b", commit_every=0)
+    index.add("a", 0)
+    index.add("b", 1)
+    index.discard("b")
+    assert len(index) == 1 and "b" not in index
+    index._db.close()                           # Crash: no flush, no close()
+    assert _committed(path, "b") == set()
@@ -0,0 +1,105 @@
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+from aiohttp import web
+
+from scraper.adapters.base import Pin
+from scraper.utils.download import Downloader, target_path
+
+BODY = bytes(range(256)) * 400                  # 100 KiB, several chunks
+
+
+def _pin(port: int, name: str) -> Pin:
+    return Pin(id=1, source="pinterest", board_url="https://www.pinterest.com/u/b/", alt_text=None,
+               title=None, page_url=None, image_url=f"http://127.0.0.1:{port}/{name}.jpg")
+
+
+def _serve_range(request: web.Request, body: bytes) -> web.Response:
+    rng = request.headers.get("Range")
+    if not rng:
+        return web.Response(body=body)
+    start = int(rng.removeprefix("bytes=").rstrip("-"))
+    if start >= len(body):
+        return web.Response(status=416, headers={"Content-Range": f"bytes */{len(body)}"})
+    return web.Response(status=206, body=body[start:],
+                        headers={"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"})
+
+
+def _run(handler, name: str, part: Optional[bytes] = None, **dl_opts):
+    """Serves `handler` locally, downloads /<name>.jpg (after writing `part`); returns (result, file, requests)."""
+    requests = []
+
+    async def main(tmp: Path):
+        async def logged(request):
+            requests.append((request.headers.get("Range"), request.path))
+            return handler(request, len(requests))
+
+        app = web.Application()
+        app.router.add_get("/{name}", logged)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            pin = _pin(port, name)
+            path = target_path(tmp, pin, pin.image_url)
+            if part is not None:
+                tmp.mkdir(parents=True, exist_ok=True)
+                path.with_name(path.name + ".part").write_bytes(part)
+            async with Downloader(str(tmp), backoff_s=0.01, **dl_opts) as dl:
+                return await dl.download(pin), path
+        finally:
+            await runner.cleanup()
+
+    return main, requests
+
+
+def test_resumes_part_with_range(tmp_path):
+    main, requests = _run(lambda req, n: _serve_range(req, BODY), "a", part=BODY[:1000])
+    result, path = asyncio.run(main(tmp_path))
+    assert result.status == "ok"
+    assert path.read_bytes() == BODY
+    assert requests == [("bytes=1000-", "/a.jpg")]
+
+
+def test_416_accepts_complete_part(tmp_path):
+    main, requests = _run(lambda req, n: _serve_range(req, BODY), "a", part=BODY)
+    result, path = asyncio.run(main(tmp_path))
+    assert result.status == "ok" and result.bytes == len(BODY)
+    assert path.read_bytes() == BODY
+
+
+def test_416_refetches_stale_part(tmp_path):
+    stale = b"x" * (len(BODY) + 10)            # Over-long leftover of another file version
+    main, requests = _run(lambda req, n: _serve_range(req, BODY), "a", part=stale)
+    result, path = asyncio.run(main(tmp_path))
+    assert result.status == "ok"
+    assert path.read_bytes() == BODY
+    assert [r for r, _ in requests] == [f"bytes={len(stale)}-", None]
+
+
+def test_retries_5xx_then_succeeds(tmp_path):
+    def flaky(req, n):
+        return web.Response(status=503) if n < 3 else web.Response(body=BODY)
+
+    main, requests = _run(flaky, "a", retries=3)
+    result, path = asyncio.run(main(tmp_path))
+    assert result.status == "ok"
+    assert path.read_bytes() == BODY
+    assert len(requests) == 3
+
+
+def test_gives_up_after_retries(tmp_path):
+    main, requests = _run(lambda req, n: web.Response(status=503), "a", retries=2)
+    result, path = asyncio.run(main(tmp_path))
+    assert result.status == "failed" and result.error == "HTTP 503"
+    assert len(requests) == 3 and not path.exists()
+
+
+def test_fatal_status_is_not_retried(tmp_path):
+    main, requests = _run(lambda req, n: web.Response(status=404), "a")
+    result, _ = asyncio.run(main(tmp_path))
+    assert result.status == "failed" and result.error == "HTTP 404"
+    assert len(requests) == 1
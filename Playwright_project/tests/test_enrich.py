@@ -0,0 +1,52 @@
+import asyncio
+import itertools
+
+import pytest
+
+from scraper.adapters.base import Detail, Pin
+from scraper.enrich import Enricher, apply_detail, enriched
+
+
+def _pin(i: int, page_url=None) -> Pin:
+    return Pin(id=i, source="pinterest", board_url="https://www.pinterest.com/u/b/", page_url=page_url,
+               image_url=f"https://i.pinimg.com/236x/{i}.jpg", title=None, alt_text=None)
+
+
+async def endless_crawl(on_item):
+    for i in itertools.count():
+        await on_item(_pin(i))                  # No page_url: the enricher skips it at once
+
+
+def test_on_item_error_cancels_the_crawl():
+    written = []
+
+    async def on_item(pin):
+        if len(written) == 3:
+            raise OSError("disk full")
+        written.append(pin.id)
+
+    enricher = Enricher(browser=False, concurrency=2)
+    with pytest.raises(OSError):
+        asyncio.run(asyncio.wait_for(enriched(endless_crawl, enricher)(on_item), timeout=5))
+    assert len(written) == 3
+    assert enricher.in_flight > 0               # The failed pin (and any dropped ones) never went out
+
+
+def test_in_flight_returns_to_zero():
+    async def crawl(on_item):
+        for i in range(20):
+            await on_item(_pin(i))
+
+    enricher = Enricher(browser=False, concurrency=4)
+    pins = asyncio.run(enriched(crawl, enricher, collect=True)())
+    assert [p.id for p in pins] == list(range(20))
+    assert enricher.in_flight == 0
+
+
+def test_page_details_keep_the_grid_image():
+    pin = _pin(1, "https://www.pinterest.com/pin/1/")
+    apply_detail(pin, Detail(title="t", image_url="https://i.pinimg.com/736x/og.jpg"))
+    assert pin.image_url == "https://i.pinimg.com/236x/1.jpg" and pin.title == "t"
+    apply_detail(pin, Detail(image_url="https://i.pinimg.com/originals/1.jpg", from_api=True))
+    assert pin.image_url == "https://i.pinimg.com/originals/1.jpg"
+    assert pin.thumb_url == "https://i.pinimg.com/236x/1.jpg"
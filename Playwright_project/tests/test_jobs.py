@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from scraper.jobs.broker import SqliteBroker
+
+
+@pytest.fixture
+def broker(tmp_path):
+    b = SqliteBroker(str(tmp_path / "jobs.db"))
+    yield b
+    b.close()
+
+
+def _expire(broker, job_id):
+    broker._db.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_lease_is_exclusive_and_heartbeat_needs_the_owner(broker):
+    job_id = broker.enqueue("https://www.pinterest.com/u/board/")
+    job = broker.lease("w1", 60)
+    assert job.id == job_id and job.attempts == 1 and job.lease_owner == "w1"
+    assert broker.lease("w2", 60) is None
+    assert broker.heartbeat(job_id, "w1", 60)
+    assert not broker.heartbeat(job_id, "w2", 60)
+
+
+def test_expired_lease_goes_to_the_next_worker(broker):
+    job_id = broker.enqueue("https://www.pinterest.com/u/board/")
+    broker.lease("w1", 60)
+    _expire(broker, job_id)
+    job = broker.lease("w2", 60)
+    assert job.id == job_id and job.attempts == 2 and job.lease_owner == "w2"
+    assert not broker.heartbeat(job_id, "w1", 60)
+    assert not broker.complete(job_id, "w1", {"pins": 1})
+    assert broker.complete(job_id, "w2", {"pins": 2})
+    assert broker.get(job_id).result == {"pins": 2}
+
+
+def test_complete_refuses_a_requeued_job(broker):
+    job_id = broker.enqueue("https://www.pinterest.com/u/board/")
+    broker.lease("w1", 60)
+    _expire(broker, job_id)
+    assert broker.requeue_expired() == 1
+    assert not broker.complete(job_id, "w1", {"pins": 1})
+    assert broker.get(job_id).status == "queued"
+
+
+def test_complete_after_expiry_while_nobody_took_over(broker):
+    job_id = broker.enqueue("https://www.pinterest.com/u/board/")
+    broker.lease("w1", 60)
+    _expire(broker, job_id)
+    assert broker.complete(job_id, "w1", {"pins": 1})
+    assert broker.get(job_id).status == "done"
+
+
+def test_fail_retries_until_attempts_are_used_up(broker):
+    job_id = broker.enqueue("https://www.pinterest.com/u/board/", max_attempts=2)
+    broker.lease("w1", 60)
+    assert broker.fail(job_id, "w1", "boom", retry_delay_s=0)
+    assert broker.get(job_id).status == "queued"
+    broker.lease("w1", 60)
+    assert broker.fail(job_id, "w1", "boom", retry_delay_s=0)
+    assert broker.get(job_id).status == "failed"
+
+
+def test_release_does_not_count_the_attempt(broker):
+    job_id = broker.enqueue("https://www.pinterest.com/u/board/")
+    broker.lease("w1", 60)
+    assert broker.release(job_id, "w1")
+    job = broker.get(job_id)
+    assert job.status == "queued" and job.attempts == 0
+
+
+def test_leases_from_many_threads_hand_out_each_job_once(broker):
+    ids = broker.enqueue_many([f"https://www.pinterest.com/u/board-{i}/" for i in range(40)])
+    leased = []
+
+    def work(worker_id):
+        while (job := broker.lease(worker_id, 60)) is not None:
+            leased.append(job.id)
+            broker.heartbeat(job.id, worker_id, 60)
+            broker.complete(job.id, worker_id, {})
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(leased) == ids
+    assert broker.stats()["done"] == 40
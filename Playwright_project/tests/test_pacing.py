@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from scraper.utils.pacing import AdaptivePacer, FixedPacer, make_pacer
+
+
+class FakePage:
+    """Answers the pacer's scroll script with a canned load time."""
+
+    def __init__(self, load_ms: int, loaded: bool = True):
+        self.load_ms = load_ms
+        self.loaded = loaded
+        self.y = 0
+        self.slept = 0
+
+    async def evaluate(self, js, arg):
+        step = arg if isinstance(arg, int) else arg[1]
+        self.y += step
+        if isinstance(arg, int):
+            return self.y
+        return {"ms": self.load_ms, "loaded": self.loaded, "scrollY": self.y}
+
+    async def wait_for_timeout(self, ms):
+        self.slept += ms
+
+
+def test_make_pacer():
+    assert isinstance(make_pacer("fixed", 0.6, 800, 1500), FixedPacer)
+    adaptive = make_pacer("adaptive", 0.6, 800, 1500)
+    assert isinstance(adaptive, AdaptivePacer) and adaptive.cap_ms == 2300
+    with pytest.raises(ValueError):
+        make_pacer("slow", 0.6, 800, 1500)
+
+
+def test_fixed_pacer_sleeps_min_plus_jitter():
+    page = FakePage(0)
+    y, waited = asyncio.run(FixedPacer(wait_min_ms=800, wait_jitter_ms=200).scroll_and_wait(page, "a", 500))
+    assert y == 500 and 800 <= waited <= 1000 and page.slept == waited
+
+
+@pytest.mark.parametrize("load_ms, loaded", [(0, True), (40, True), (1000, True), (2300, False)])
+def test_adaptive_round_stays_within_floor_and_cap(load_ms, loaded):
+    pacer = make_pacer("adaptive", 0.6, 800, 1500)
+    for _ in range(50):
+        page = FakePage(load_ms, loaded)
+        _, waited = asyncio.run(pacer.scroll_and_wait(page, "a", 500))
+        assert pacer.floor_ms <= waited <= pacer.cap_ms
+        assert waited == load_ms + page.slept
+    assert pacer.timeouts == (0 if loaded else 50)
+
+
+def test_adaptive_step_follows_new_items():
+    pacer = AdaptivePacer(step_ratio=0.6, min_ratio=0.3, max_ratio=1.5)
+    for _ in range(20):
+        pacer.update(20)
+    assert pacer.step_ratio == 1.5
+    pacer.update(3)
+    assert pacer.step_ratio == 1.5
+    for _ in range(20):
+        pacer.update(0)
+    assert pacer.step_ratio == 0.3
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from scraper.adapters.base import PIN_FIELDS, Pin
+from scraper.utils.pinbatch import PinBatch
+
+
+def _pins(n: int):
+    return [Pin(i, "pinterest" if i % 3 else "instagram", f"https://example.com/board-{i % 2}/",
+                f"https://example.com/pin/{i}/", f"https://example.com/{i}.jpg",
+                None if i % 4 else f"Pin {i}", "ü" * (i % 2),
+                media_type="video" if i % 5 == 0 else "image",
+                carousel=[f"https://example.com/{i}-{k}.jpg" for k in range(i % 3)] or None)
+            for i in range(n)]
+
+
+def _rows(pins):
+    return [p.to_row() for p in pins]
+
+
+@pytest.mark.parametrize("s", [slice(None), slice(3, 9), slice(-4, None), slice(None, None, -2),
+                               slice(2, 100, 3), slice(8, 2), slice(-100, 5)])
+def test_slices_like_a_list(s):
+    pins = _pins(12)
+    part = PinBatch(pins)[s]
+    assert isinstance(part, PinBatch)
+    assert _rows(part) == _rows(pins[s])
+    assert part.columns() == PinBatch(pins[s]).columns()
+
+
+def test_indexing_like_a_list():
+    pins = _pins(6)
+    batch = PinBatch(pins)
+    assert [batch[i].to_row() for i in range(-6, 6)] == _rows(pins[-6:] + pins)
+    with pytest.raises(IndexError):
+        batch[6]
+    with pytest.raises(IndexError):
+        batch[-7]
+
+
+def test_columns_and_json_match_the_pins():
+    pins = _pins(10)
+    batch = PinBatch()
+    batch.extend(PinBatch(pins))
+    cols = batch.columns()
+    assert list(cols) == list(PIN_FIELDS)
+    assert cols["source"] == [p.source for p in pins]
+    assert cols["carousel"] == [p.carousel for p in pins]
+    assert list(batch.iter_json()) == [p.to_json() for p in pins]
+    assert [json.loads(s)["alt_text"] for s in batch.iter_json()] == [p.alt_text for p in pins]
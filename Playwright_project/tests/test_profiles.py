@@ -0,0 +1,65 @@
+import pytest
+
+from scraper.profiles import (
+    STEPWISE_KEYS, VIRTUAL_KEYS, Profiles, apply_profile, load_profiles, parse_grid, parse_settings,
+)
+
+LAYERS = Profiles({
+    "*": {"default": {"wait_min_ms": 1, "step_ratio": 0.1, "stagnant_tolerance": 1},
+          "fast": {"wait_min_ms": 3, "network": {"wait_jitter_ms": 30}}},
+    "pinterest": {"default": {"wait_min_ms": 2, "step_ratio": 0.2, "dom": {"step_ratio": 0.25}},
+                  "fast": {"stagnant_tolerance": 4}},
+})
+
+
+def test_layers_in_order():
+    assert LAYERS.resolve("pinterest") == {"wait_min_ms": 2, "step_ratio": 0.25, "stagnant_tolerance": 1}
+    assert LAYERS.resolve("pinterest", "fast") == {"wait_min_ms": 3, "step_ratio": 0.25, "stagnant_tolerance": 4}
+    assert LAYERS.resolve("pinterest", "fast", mode="network") == {
+        "wait_min_ms": 3, "step_ratio": 0.2, "stagnant_tolerance": 4, "wait_jitter_ms": 30}
+    assert LAYERS.resolve("instagram", "fast") == {"wait_min_ms": 3, "step_ratio": 0.1, "stagnant_tolerance": 1}
+    with pytest.raises(ValueError):
+        LAYERS.resolve("pinterest", "slow")
+
+
+def test_overlay_merges_per_key():
+    merged = LAYERS.overlay(Profiles({"pinterest": {"default": {"wait_min_ms": 9, "dom": {"max_rounds": 5}}}}))
+    assert merged.resolve("pinterest") == {"wait_min_ms": 9, "step_ratio": 0.25, "stagnant_tolerance": 1,
+                                           "max_rounds": 5}
+    assert LAYERS.resolve("pinterest")["wait_min_ms"] == 2
+
+
+def test_unknown_settings_are_rejected():
+    with pytest.raises(ValueError):
+        Profiles({"pinterest": {"default": {"wait_ms": 1}}})
+    with pytest.raises(ValueError):
+        Profiles({"pinterest": {"default": {"network": {"wait_ms": 1}}}})
+    with pytest.raises(ValueError):
+        parse_settings(["wait_ms=1"])
+
+
+def test_apply_profile_keeps_explicit_options_and_drops_unread_keys():
+    opts = {"profile": "fast", "profiles": LAYERS, "wait_min_ms": 7, "end_confirm": 5, "max_items": 10}
+    assert apply_profile("pinterest", opts, STEPWISE_KEYS) == {
+        "wait_min_ms": 7, "step_ratio": 0.25, "stagnant_tolerance": 4, "max_items": 10}
+    assert apply_profile("pinterest", opts, VIRTUAL_KEYS)["end_confirm"] == 5
+
+
+def test_builtin_default_profile_is_not_incremental():
+    builtin = load_profiles()
+    for adapter in ("pinterest", "instagram", "artstation"):
+        assert "incremental" not in builtin.resolve(adapter)
+    assert builtin.resolve("pinterest", "fast")["incremental"] is True
+
+
+def test_dump_roundtrip(tmp_path):
+    path = tmp_path / "my.toml"
+    LAYERS.dump(path)
+    assert Profiles.load(path).data == LAYERS.data
+
+
+def test_parse_settings_and_grid():
+    assert parse_settings(["wait-min-ms=500", "pacing=fixed", "incremental=true"]) == {
+        "wait_min_ms": 500, "pacing": "fixed", "incremental": True}
+    assert parse_grid(["wait_min_ms=300,800", "step_ratio=0.5"]) == {
+        "wait_min_ms": [300, 800], "step_ratio": [0.5]}
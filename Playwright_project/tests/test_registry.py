@@ -0,0 +1,51 @@
+import pytest
+
+from scraper.adapters.registry import BUILTIN, AdapterRegistry, AdapterSpec
+
+
+def _registry():
+    return AdapterRegistry(BUILTIN, discover=False)
+
+
+def test_routes_by_domain_suffix():
+    reg = _registry()
+    assert reg.name_for_url("https://WWW.Pinterest.com:443./u/board/") == "pinterest"
+    assert reg.name_for_url("https://uk.pinterest.co.uk/u/board/") == "pinterest"
+    for url in ("https://notpinterest.com/x", "https://pinterest.com.evil/x"):
+        with pytest.raises(ValueError):
+            reg.name_for_url(url)
+
+
+def test_register_refuses_a_taken_name_or_domain():
+    reg = _registry()
+    with pytest.raises(ValueError):
+        reg.register(AdapterSpec("pinterest", ("example.com",), "x:Y"))
+    with pytest.raises(ValueError):
+        reg.register(AdapterSpec("pins", ("Pin.it",), "x:Y"))
+    assert "pins" not in reg.names()
+
+
+def test_replace_unregisters_the_displaced_owner():
+    reg = _registry()
+    reg.name_for_url("https://www.pinterest.de/u/board/")          # Fill the host cache
+    reg.register(AdapterSpec("pins", ("pinterest.com",), "x:Y"), replace=True)
+    assert reg.name_for_url("https://www.pinterest.com/u/board/") == "pins"
+    assert "pinterest" not in reg.names()
+    with pytest.raises(ValueError):
+        reg.name_for_url("https://www.pinterest.de/u/board/")
+
+
+def test_replace_under_the_same_name_drops_its_old_domains():
+    reg = _registry()
+    reg.register(AdapterSpec("instagram", ("instagr.am",), "x:Y"), replace=True)
+    assert reg.name_for_url("https://instagr.am/p/1/") == "instagram"
+    with pytest.raises(ValueError):
+        reg.name_for_url("https://www.instagram.com/p/1/")
+
+
+def test_unregister():
+    reg = _registry()
+    reg.unregister("artstation")
+    assert reg.names() == ["pinterest", "instagram"]
+    with pytest.raises(ValueError):
+        reg.unregister("artstation")
@@ -0,0 +1,63 @@
+import gzip
+
+import pytest
+
+from scraper.adapters.base import Pin
+from scraper.utils.sink import JsonlSink, read_pins
+
+BOARD = "https://www.pinterest.com/u/board/"
+
+
+def _pin(i: int) -> Pin:
+    return Pin(i, "pinterest", BOARD, f"https://www.pinterest.com/pin/{i}/",
+               f"https://i.pinimg.com/originals/{i}.jpg", f"Pin {i}", None)
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".jsonl.gz", ".jsonl.zst"])
+def test_roundtrip_across_flushes(tmp_path, suffix):
+    path = str(tmp_path / f"pins{suffix}")
+    with JsonlSink(path, fsync_every=7) as sink:
+        for i in range(50):
+            sink.write(_pin(i))
+    assert [p.to_row() for p in read_pins(path)] == [_pin(i).to_row() for i in range(50)]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".jsonl.gz", ".jsonl.zst"])
+def test_append_continues_and_default_truncates(tmp_path, suffix):
+    path = str(tmp_path / f"pins{suffix}")
+    with JsonlSink(path) as sink:
+        sink.write(_pin(0))
+    with JsonlSink(path, append=True) as sink:
+        sink.write(_pin(1))
+    assert [p.id for p in read_pins(path)] == [0, 1]
+    with JsonlSink(path) as sink:
+        sink.write(_pin(2))
+    assert [p.id for p in read_pins(path)] == [2]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl.gz", ".jsonl.zst"])
+def test_flushed_pins_are_readable_while_the_sink_is_open(tmp_path, suffix):
+    path = str(tmp_path / f"pins{suffix}")
+    sink = JsonlSink(path)
+    for i in range(3):
+        sink.write(_pin(i))
+    sink.flush(fsync=True)
+    assert [p.id for p in read_pins(path)] == [0, 1, 2]
+    sink.close()
+
+
+def test_crash_mid_write_keeps_everything_before_it(tmp_path):
+    path = tmp_path / "pins.jsonl.gz"
+    with JsonlSink(str(path)) as sink:
+        for i in range(10):
+            sink.write(_pin(i))
+    data = path.read_bytes()
+    path.write_bytes(data + gzip.compress(b'{"id": 10, "sou')[:-8])     # Last member cut short
+    assert [p.id for p in read_pins(str(path))] == list(range(10))
+
+    plain = tmp_path / "pins.jsonl"
+    with JsonlSink(str(plain)) as sink:
+        sink.write(_pin(0))
+    with open(plain, "a", encoding="utf-8") as f:
+        f.write('{"id": 1, "sou')
+    assert [p.id for p in read_pins(str(plain))] == [0]
@@ -0,0 +1,174 @@
+import asyncio
+import random
+
+import pytest
+
+from scraper.adapters.pinterest import PinterestAdapter
+from scraper.utils.checkpoint import Checkpointer
+from scraper.utils.dedupe import MemoryDedupeIndex
+from scraper.utils.stream import CollectStats
+from scraper.utils.virtual import virtual_scroll_and_collect
+
+COLUMNS = 5
+VIEWPORT = 900
+RENDER_MARGIN = 1000                            # Cards further than this from the viewport are recycled
+PAGE_SIZE = 50                                  # Cards the feed appends when the bottom comes near
+
+
+def _masonry(total: int, seed: int = 1):
+    """(id, top, bottom) per card, each placed in the shortest of COLUMNS columns."""
+    rng = random.Random(seed)
+    columns = [0] * COLUMNS
+    cards = []
+    for i in range(total):
+        col = min(range(COLUMNS), key=columns.__getitem__)
+        top, height = columns[col], rng.randint(200, 500)
+        cards.append((i, col, top, top + height))
+        columns[col] += height + 10
+    return cards
+
+
+class VirtualGridPage:
+    """
+    Stands in for a Pinterest board in _SNAPSHOT_JS: only cards near the
+    viewport are rendered, and the feed grows by PAGE_SIZE cards as the
+    scroll position nears the bottom of what is loaded.
+    """
+
+    url = "https://www.pinterest.com/u/board/"
+
+    def __init__(self, total: int):
+        self.cards = _masonry(total)
+        self.loaded = min(total, 100)
+        self.y = 0
+
+    def height(self) -> int:
+        return max(bottom for _, _, _, bottom in self.cards[:self.loaded]) + 100
+
+    async def evaluate(self, js, arg=None):
+        if arg is None:                         # window.innerHeight / scrollTo(0, 0)
+            return VIEWPORT
+        if isinstance(arg, int):                # fast_scroll_to: scrollBy(0, arg)
+            self.y = max(0, min(self.y + arg, self.height() - VIEWPORT))
+            return self.y
+        _, _, target, min_top, _, _ = arg
+        start_height = self.height()
+        if target is not None:
+            self.y = max(0, min(target, start_height - VIEWPORT))
+        if self.y + VIEWPORT > start_height - 1500 and self.loaded < len(self.cards):
+            self.loaded = min(len(self.cards), self.loaded + PAGE_SIZE)
+        low, high = self.y - RENDER_MARGIN, self.y + VIEWPORT + RENDER_MARGIN
+        rendered = [c for c in self.cards[:self.loaded] if c[3] >= low and c[2] <= high]
+        columns = {}
+        for _, col, _, bottom in rendered:
+            columns[col] = max(columns.get(col, 0), bottom)
+        height = self.height()
+        return {
+            "cards": [_card(i) for i, _, _, bottom in rendered if bottom >= min_top],
+            "scrollY": self.y,
+            "viewport": VIEWPORT,
+            "height": height,
+            "grew": height > start_height,
+            "loaded": height > start_height,
+            "frontier": min(columns.values()) if columns else 0,
+            "waitMs": 0,
+        }
+
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+
+def _card(i: int) -> dict:
+    return {"href": f"/pin/{i}/", "has_img": True, "src": f"https://i.pinimg.com/236x/{i}.jpg",
+            "srcset": None, "data_srcset": None, "data_src": None, "alt": "", "has_video": False,
+            "video_src": None}
+
+
+def test_collects_every_card_of_a_10k_masonry_board():
+    stats = CollectStats()
+    pins = asyncio.run(PinterestAdapter().stream_scroll_and_collect(
+        VirtualGridPage(10_000), max_items=20_000, stats=stats
+    ))
+    assert len(pins) == 10_000
+    assert {p.page_url for p in pins} == {f"https://www.pinterest.com/pin/{i}/" for i in range(10_000)}
+    assert stats.stop_reason == "feed_end"
+
+
+def test_stops_at_max_items():
+    stats = CollectStats()
+    pins = asyncio.run(PinterestAdapter().stream_scroll_and_collect(
+        VirtualGridPage(1_000), max_items=300, stats=stats
+    ))
+    assert len(pins) == 300 and stats.stop_reason == "target"
+
+
+def test_rejects_unknown_options():
+    page = VirtualGridPage(10)
+    with pytest.raises(TypeError):
+        asyncio.run(virtual_scroll_and_collect(
+            page, "div", {}, lambda card, url: None, lambda pin: None, scroll_step=300
+        ))
+
+
+def test_on_item_error_ends_the_crawl():
+    index = MemoryDedupeIndex()
+    seen = []
+
+    async def on_item(pin):
+        if len(seen) == 5:
+            raise OSError("disk full")
+        seen.append(pin.page_url)
+
+    with pytest.raises(OSError):
+        asyncio.run(PinterestAdapter().stream_scroll_and_collect(
+            VirtualGridPage(1_000), max_items=1_000, index=index, on_item=on_item
+        ))
+    assert len(index) == 5                      # The failed pin's key was taken back out
+    assert all(url in index for url in seen)
+
+
+def test_resume_collects_only_the_rest_of_max_items(tmp_path):
+    url = VirtualGridPage.url
+    written = []
+
+    async def crash_at_300(pin):
+        if len(written) == 300:
+            raise RuntimeError("killed")
+        written.append(pin.page_url)
+
+    ckpt = Checkpointer(str(tmp_path / "run.ckpt"), url, every_rounds=2)
+    with pytest.raises(RuntimeError):
+        asyncio.run(PinterestAdapter().stream_scroll_and_collect(
+            VirtualGridPage(2_000), max_items=500, index=ckpt.open_index(), on_item=crash_at_300,
+            checkpoint=ckpt, keep_items=False,
+        ))
+    ckpt.close()
+
+    ckpt = Checkpointer(str(tmp_path / "run.ckpt"), url)
+    resume_from = ckpt.load_for_resume()
+    assert resume_from.collected == 300 and not resume_from.finished
+    stats = CollectStats()
+    pins = asyncio.run(PinterestAdapter().stream_scroll_and_collect(
+        VirtualGridPage(2_000), max_items=500, index=ckpt.open_index(), stats=stats,
+        checkpoint=ckpt, resume_from=resume_from,
+    ))
+    ckpt.close()
+    assert len(pins) == 200 and stats.stop_reason == "target"
+    assert not set(written) & {p.page_url for p in pins}
+    assert ckpt.load().collected == 500 and ckpt.load().finished
+
+
+def test_fixed_pacing_dwells_per_round():
+    page = VirtualGridPage(200)
+    waits = []
+
+    async def wait_for_timeout(ms):
+        waits.append(ms)
+
+    page.wait_for_timeout = wait_for_timeout
+    stats = CollectStats()
+    asyncio.run(PinterestAdapter().stream_scroll_and_collect(
+        page, max_items=1_000, stats=stats, pacing="fixed", wait_min_ms=500, wait_jitter_ms=100
+    ))
+    assert len(waits) == stats.rounds and all(500 <= ms <= 600 for ms in waits)